@@ -0,0 +1,236 @@
+"""gzip / brotli response compression.
+
+``CompressionMiddleware`` compresses responses of compressible types
+(JSON, text, ...) of at least ``COMPRESSION_MIN_BYTES`` for clients that
+accept it, preferring brotli when the ``brotli`` package is installed.
+Streamed bodies (the JSON exports) are compressed chunk by chunk with a
+flush per chunk, so clients still receive each page as it is produced. SSE
+streams and responses that already carry a Content-Encoding pass through.
+
+Handlers that cache a body can cache its compressed forms with it
+(``CompressedBody``) and send those directly, so hot requests do not
+compress at all. A strong ETag names one exact byte sequence, so compressed
+variants get the encoding appended (``"abc"`` -> ``"abc-br"``);
+``strip_encoding`` undoes that when validators are compared.
+"""
+import gzip
+import zlib
+from typing import Dict, Optional, Tuple
+
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import COMPRESSION_BROTLI_QUALITY, COMPRESSION_GZIP_LEVEL, COMPRESSION_MIN_BYTES
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+# in order of preference when the client accepts several equally
+ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+
+# Cached bodies are compressed once per version per worker, so they can
+# afford better ratios (brotli 11 is far too slow even for that).
+STORED_GZIP_LEVEL = 9
+STORED_BROTLI_QUALITY = 9
+
+# larger bodies are compressed in the threadpool, off the event loop
+INLINE_MAX_BYTES = 64 * 1024
+
+_COMPRESSIBLE_TYPES = {"application/json", "application/javascript", "application/xml", "image/svg+xml"}
+
+
+def compressible(content_type: Optional[str]) -> bool:
+    if not content_type:
+        return False
+    media_type = content_type.split(";", 1)[0].strip().lower()
+    if media_type == "text/event-stream":
+        # must reach the client event by event
+        return False
+    return media_type.startswith("text/") or media_type in _COMPRESSIBLE_TYPES or media_type.endswith("+json")
+
+
+def negotiate(accept_encoding: Optional[str]) -> Optional[str]:
+    """The encoding to send for an ``Accept-Encoding`` value, or None for
+    identity."""
+    if not accept_encoding:
+        return None
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.partition(";")
+        weight = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key.lower() == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[name.strip().lower()] = weight
+    wildcard = weights.get("*", 0.0)
+    best, best_weight = None, 0.0
+    for encoding in ENCODINGS:
+        weight = weights.get(encoding, wildcard)
+        if weight > best_weight:
+            best, best_weight = encoding, weight
+    return best
+
+
+def compress(data: bytes, encoding: str, stored: bool = False) -> bytes:
+    if encoding == "br":
+        return brotli.compress(data, quality=STORED_BROTLI_QUALITY if stored else COMPRESSION_BROTLI_QUALITY)
+    # mtime=0 keeps the output byte-identical for identical input
+    return gzip.compress(data, compresslevel=STORED_GZIP_LEVEL if stored else COMPRESSION_GZIP_LEVEL, mtime=0)
+
+
+def encoded_etag(etag: str, encoding: str) -> str:
+    return etag[:-1] + f'-{encoding}"' if etag.endswith('"') else etag
+
+
+def strip_encoding(etag: str) -> str:
+    for encoding in ("br", "gzip"):
+        suffix = f'-{encoding}"'
+        if etag.endswith(suffix):
+            return etag[: -len(suffix)] + '"'
+    return etag
+
+
+class CompressedBody:
+    """A cacheable response body plus its compressed variants, each
+    produced on first use and kept as long as the body is."""
+
+    __slots__ = ("body", "_variants")
+
+    def __init__(self, body: bytes):
+        self.body = body
+        self._variants: Dict[str, bytes] = {}
+
+    def encoded(self, encoding: str) -> bytes:
+        data = self._variants.get(encoding)
+        if data is None:
+            # concurrent first uses may both compress; the results are identical
+            data = self._variants.setdefault(encoding, compress(self.body, encoding, stored=True))
+        return data
+
+    def for_request(self, accept_encoding: Optional[str]) -> Tuple[Optional[str], bytes]:
+        """``(encoding, bytes)`` to send for an ``Accept-Encoding`` value;
+        encoding is None when sending the body as is."""
+        if COMPRESSION_MIN_BYTES <= 0 or len(self.body) < COMPRESSION_MIN_BYTES:
+            return None, self.body
+        encoding = negotiate(accept_encoding)
+        return encoding, self.encoded(encoding) if encoding else self.body
+
+
+class _StreamCompressor:
+    def __init__(self, encoding: str):
+        self.brotli = encoding == "br"
+        if self.brotli:
+            self._c = brotli.Compressor(quality=COMPRESSION_BROTLI_QUALITY)
+        else:
+            self._c = zlib.compressobj(COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 31)  # 31: gzip container
+
+    def chunk(self, data: bytes) -> bytes:
+        if self.brotli:
+            return self._c.process(data) + self._c.flush()
+        return self._c.compress(data) + self._c.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._c.finish() if self.brotli else self._c.flush()
+
+
+class CompressionMiddleware:
+    def __init__(self, app: ASGIApp, min_bytes: int = COMPRESSION_MIN_BYTES):
+        self.app = app
+        self.min_bytes = min_bytes
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding"))
+        await self.app(scope, receive, _Responder(send, encoding, self.min_bytes).send)
+
+
+class _Responder:
+    """Holds back ``http.response.start`` until the first body chunk shows
+    whether the response is worth compressing."""
+
+    def __init__(self, send: Send, encoding: Optional[str], min_bytes: int):
+        self._send = send
+        self.encoding = encoding
+        self.min_bytes = min_bytes
+        self.start: Optional[Message] = None
+        self.passthrough = False
+        self.stream: Optional[_StreamCompressor] = None
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            headers = Headers(raw=message["headers"])
+            status = message["status"]
+            if (
+                status < 200 or status in (204, 304)
+                or "content-encoding" in headers
+                or "no-transform" in headers.get("cache-control", "")
+                or not compressible(headers.get("content-type"))
+            ):
+                self.passthrough = True
+                await self._send(message)
+            else:
+                self.start = message
+            return
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.stream is not None:
+            data = self.stream.chunk(body) if body else b""
+            if not more_body:
+                data += self.stream.finish()
+            if data or not more_body:
+                await self._send({"type": "http.response.body", "body": data, "more_body": more_body})
+            return
+
+        start, self.start = self.start, None
+        if not more_body and len(body) < self.min_bytes:
+            self.passthrough = True
+            await self._send(start)
+            await self._send(message)
+            return
+
+        headers = MutableHeaders(raw=start["headers"])
+        headers.add_vary_header("Accept-Encoding")
+        if self.encoding is None:
+            self.passthrough = True
+            await self._send(start)
+            await self._send(message)
+            return
+
+        headers["Content-Encoding"] = self.encoding
+        if "etag" in headers:
+            headers["ETag"] = encoded_etag(headers["etag"], self.encoding)
+        if more_body:
+            del headers["Content-Length"]
+            self.stream = _StreamCompressor(self.encoding)
+            await self._send(start)
+            await self._send({"type": "http.response.body", "body": self.stream.chunk(body), "more_body": True})
+            return
+
+        if len(body) > INLINE_MAX_BYTES:
+            body = await run_in_threadpool(compress, body, self.encoding)
+        else:
+            body = compress(body, self.encoding)
+        headers["Content-Length"] = str(len(body))
+        await self._send(start)
+        await self._send({"type": "http.response.body", "body": body})
+
+
+def install(app) -> bool:
+    """Add the middleware to ``app`` unless compression is switched off."""
+    if COMPRESSION_MIN_BYTES <= 0:
+        return False
+    app.add_middleware(CompressionMiddleware)
+    return True
@@ -9,3 +9,137 @@ DATABASE_URL = os.getenv(
 )
 
 SECRET_KEY = os.getenv("SECRET_KEY", "dev-secret")
+
+# Serve handlers from the asyncio engine (psycopg3 async) instead of blocking
+# sessions in the threadpool. Set DB_ASYNC=1 to enable.
+DB_ASYNC = os.getenv("DB_ASYNC", "0").lower() in ("1", "true", "yes")
+
+# Connection pool sizing (per engine, per worker process).
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "1").lower() in ("1", "true", "yes")
+# Seconds after which a pooled connection is replaced; -1 disables recycling.
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+# Server-side per-statement timeout in milliseconds; 0 leaves the server default.
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "0"))
+
+# In-process cache of authenticated principals, keyed by token subject.
+# Set PRINCIPAL_CACHE_TTL_SECONDS=0 to always hit the database.
+PRINCIPAL_CACHE_TTL_SECONDS = float(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "60"))
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000"))
+
+# How often each worker pulls token revocations written by other workers.
+TOKEN_REVOCATION_REFRESH_SECONDS = float(os.getenv("TOKEN_REVOCATION_REFRESH_SECONDS", "15"))
+
+# Password hashing. Work factor for new hashes; hashing runs in a process pool
+# of BCRYPT_WORKERS (0 = inline in the calling thread) with at most
+# BCRYPT_MAX_PENDING hashes in flight before callers are turned away.
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+BCRYPT_WORKERS = int(os.getenv("BCRYPT_WORKERS", str(min(4, os.cpu_count() or 1))))
+BCRYPT_MAX_PENDING = int(os.getenv("BCRYPT_MAX_PENDING", "64"))
+
+# Where outstanding OTPs live: "database" (shared across uvicorn workers) or
+# "memory" (single process only; codes fail to verify on other workers).
+# Expired codes are swept every OTP_SWEEP_SECONDS.
+OTP_BACKEND = os.getenv("OTP_BACKEND", "database").lower()
+OTP_SWEEP_SECONDS = float(os.getenv("OTP_SWEEP_SECONDS", "60"))
+
+# Outgoing SMS. Messages are written to the sms_outbox table and delivered by a
+# background dispatcher: SMS_BATCH_SIZE rows claimed per poll, at most
+# SMS_DISPATCH_CONCURRENCY provider calls in flight, failed sends retried with
+# exponential backoff (SMS_RETRY_BASE_SECONDS doubling up to
+# SMS_RETRY_MAX_SECONDS) until SMS_MAX_ATTEMPTS. SMS_PROVIDER is "twilio" or,
+# for local development only, "fake" (records messages in memory, delivers
+# nothing).
+SMS_PROVIDER = os.getenv("SMS_PROVIDER", "twilio").lower()
+SMS_BATCH_SIZE = int(os.getenv("SMS_BATCH_SIZE", "50"))
+SMS_DISPATCH_CONCURRENCY = int(os.getenv("SMS_DISPATCH_CONCURRENCY", "10"))
+SMS_POLL_SECONDS = float(os.getenv("SMS_POLL_SECONDS", "1"))
+SMS_MAX_ATTEMPTS = int(os.getenv("SMS_MAX_ATTEMPTS", "5"))
+SMS_RETRY_BASE_SECONDS = float(os.getenv("SMS_RETRY_BASE_SECONDS", "2"))
+SMS_RETRY_MAX_SECONDS = float(os.getenv("SMS_RETRY_MAX_SECONDS", "300"))
+TWILIO_ACCOUNT_SID = os.getenv("TWILIO_ACCOUNT_SID")
+TWILIO_AUTH_TOKEN = os.getenv("TWILIO_AUTH_TOKEN")
+TWILIO_FROM_NUMBER = os.getenv("TWILIO_FROM_NUMBER")
+
+# Startup. DB_SCHEMA_CHECK: "fingerprint" runs create_all only when the models
+# changed since the last boot, "always" runs it every boot, "off" never does.
+# ADMIN_PANEL: "lazy" builds the sqladmin panel on its first request, "eager"
+# at import, "off" leaves /admin unmounted (API-only instances).
+DB_SCHEMA_CHECK = os.getenv("DB_SCHEMA_CHECK", "fingerprint").lower()
+ADMIN_PANEL = os.getenv("ADMIN_PANEL", "lazy").lower()
+
+# Request/SQL metrics served at /admin/metrics. METRICS_SAMPLE_RATE is the
+# fraction of requests timed per route (0 disables the middleware and SQL hooks
+# entirely); statements slower than SLOW_QUERY_MS are logged, the last
+# SLOW_QUERY_LOG_SIZE kept for /admin/metrics/slow-queries.
+METRICS_SAMPLE_RATE = float(os.getenv("METRICS_SAMPLE_RATE", "1"))
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+SLOW_QUERY_LOG_SIZE = int(os.getenv("SLOW_QUERY_LOG_SIZE", "100"))
+
+# gzip/brotli response compression (brotli needs the Brotli package).
+# Responses smaller than COMPRESSION_MIN_BYTES go out as they are; 0 turns
+# compression off. The levels apply to per-request compression; cached menu
+# documents are compressed once at higher settings.
+COMPRESSION_MIN_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES", "1024"))
+COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))
+
+# Serialized menu documents for /food_delivery/restaurants_data/{id}, dropped
+# when this worker commits a catalog change; MENU_CACHE_TTL_SECONDS bounds how
+# stale another worker's copy can get. 0 disables the cache.
+MENU_CACHE_TTL_SECONDS = float(os.getenv("MENU_CACHE_TTL_SECONDS", "60"))
+MENU_CACHE_SIZE = int(os.getenv("MENU_CACHE_SIZE", "1000"))
+
+# Cache-Control sent with the catalog responses that carry an ETag
+# (/food_delivery/restaurants_data/{id}, /food_delivery/all_restaurants), so
+# CDNs and app caches can serve repeats and revalidate with If-None-Match.
+# Empty omits the header.
+CATALOG_CACHE_CONTROL = os.getenv("CATALOG_CACHE_CONTROL", "public, max-age=30, stale-while-revalidate=60")
+
+# Spatial index behind /food_delivery/restaurants/nearby. Grid cells are
+# GEO_CELL_DEGREES on a side; locations added by other workers are picked up
+# every GEO_INDEX_REFRESH_SECONDS, edits/deletes by a full rebuild every
+# GEO_INDEX_REBUILD_SECONDS.
+GEO_CELL_DEGREES = float(os.getenv("GEO_CELL_DEGREES", "0.05"))
+GEO_INDEX_REFRESH_SECONDS = float(os.getenv("GEO_INDEX_REFRESH_SECONDS", "5"))
+GEO_INDEX_REBUILD_SECONDS = float(os.getenv("GEO_INDEX_REBUILD_SECONDS", "600"))
+
+# Catalog full-text search index (/food_delivery/search): inserts from other
+# workers are picked up every SEARCH_INDEX_REFRESH_SECONDS, everything is
+# re-read from the database every SEARCH_INDEX_REBUILD_SECONDS.
+SEARCH_INDEX_REFRESH_SECONDS = float(os.getenv("SEARCH_INDEX_REFRESH_SECONDS", "5"))
+SEARCH_INDEX_REBUILD_SECONDS = float(os.getenv("SEARCH_INDEX_REBUILD_SECONDS", "3600"))
+
+# In-process menu item availability bitset: changes made by other workers are
+# picked up every AVAILABILITY_INDEX_REFRESH_SECONDS, everything is re-read
+# every AVAILABILITY_INDEX_REBUILD_SECONDS.
+AVAILABILITY_INDEX_REFRESH_SECONDS = float(os.getenv("AVAILABILITY_INDEX_REFRESH_SECONDS", "2"))
+AVAILABILITY_INDEX_REBUILD_SECONDS = float(os.getenv("AVAILABILITY_INDEX_REBUILD_SECONDS", "600"))
+
+# In-process menu price table behind /food_delivery/quote: changes made by
+# other workers are picked up every PRICE_TABLE_REFRESH_SECONDS, everything is
+# re-read every PRICE_TABLE_REBUILD_SECONDS.
+PRICE_TABLE_REFRESH_SECONDS = float(os.getenv("PRICE_TABLE_REFRESH_SECONDS", "2"))
+PRICE_TABLE_REBUILD_SECONDS = float(os.getenv("PRICE_TABLE_REBUILD_SECONDS", "600"))
+
+# Delivery ETAs (/food_delivery/eta): prep time (median cooking time of the
+# menu, ETA_DEFAULT_PREP_MINUTES when unknown) + ETA_HANDOFF_MINUTES + the
+# straight-line distance times ETA_ROAD_FACTOR at ETA_RIDER_SPEED_KMH. Prep
+# times changed by other workers are picked up every ETA_PREP_REFRESH_SECONDS,
+# everything is re-read every ETA_PREP_REBUILD_SECONDS.
+ETA_DEFAULT_PREP_MINUTES = float(os.getenv("ETA_DEFAULT_PREP_MINUTES", "15"))
+ETA_HANDOFF_MINUTES = float(os.getenv("ETA_HANDOFF_MINUTES", "5"))
+ETA_ROAD_FACTOR = float(os.getenv("ETA_ROAD_FACTOR", "1.3"))
+ETA_RIDER_SPEED_KMH = float(os.getenv("ETA_RIDER_SPEED_KMH", "20"))
+ETA_PREP_REFRESH_SECONDS = float(os.getenv("ETA_PREP_REFRESH_SECONDS", "30"))
+ETA_PREP_REBUILD_SECONDS = float(os.getenv("ETA_PREP_REBUILD_SECONDS", "3600"))
+
+# Live order-status streams (SSE / WebSocket). Each connection buffers at most
+# ORDER_EVENTS_QUEUE_SIZE undelivered events before it is dropped as a slow
+# consumer; idle streams get a heartbeat every ORDER_EVENTS_HEARTBEAT_SECONDS.
+# ORDER_EVENTS_MAX_SUBSCRIBERS caps open streams per worker (503 beyond it).
+ORDER_EVENTS_QUEUE_SIZE = int(os.getenv("ORDER_EVENTS_QUEUE_SIZE", "64"))
+ORDER_EVENTS_HEARTBEAT_SECONDS = float(os.getenv("ORDER_EVENTS_HEARTBEAT_SECONDS", "15"))
+ORDER_EVENTS_MAX_SUBSCRIBERS = int(os.getenv("ORDER_EVENTS_MAX_SUBSCRIBERS", "20000"))
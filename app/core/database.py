@@ -1,17 +1,212 @@
-from sqlalchemy import create_engine
+import hashlib
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, String, Table, create_engine, inspect, select, text
+from sqlalchemy.exc import OperationalError, ProgrammingError
+from sqlalchemy.schema import CreateIndex, CreateTable
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
-from app.core.config import DATABASE_URL
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from starlette.concurrency import run_in_threadpool
+from app.core.config import (
+	DATABASE_URL,
+	DB_ASYNC,
+	DB_MAX_OVERFLOW,
+	DB_POOL_PRE_PING,
+	DB_POOL_RECYCLE,
+	DB_POOL_SIZE,
+	DB_POOL_TIMEOUT,
+	DB_STATEMENT_TIMEOUT_MS,
+)
 
 
 Base = declarative_base()
 
 
-engine = create_engine(DATABASE_URL, future=True, echo=False)
+class _CheckoutTimer:
+	"""Mixin recording how long callers wait to get a connection from the pool."""
+
+	def __init__(self, *args, **kwargs):
+		super().__init__(*args, **kwargs)
+		self._wait_lock = threading.Lock()
+		self.checkouts = 0
+		self.wait_seconds_total = 0.0
+		self.wait_seconds_max = 0.0
+
+	def _do_get(self):
+		started = time.perf_counter()
+		try:
+			return super()._do_get()
+		finally:
+			waited = time.perf_counter() - started
+			with self._wait_lock:
+				self.checkouts += 1
+				self.wait_seconds_total += waited
+				if waited > self.wait_seconds_max:
+					self.wait_seconds_max = waited
+
+
+class TimedQueuePool(_CheckoutTimer, QueuePool):
+	pass
+
+
+class TimedAsyncQueuePool(_CheckoutTimer, AsyncAdaptedQueuePool):
+	pass
+
+
+def _engine_options() -> dict:
+	options = {
+		"echo": False,
+		"pool_size": DB_POOL_SIZE,
+		"max_overflow": DB_MAX_OVERFLOW,
+		"pool_timeout": DB_POOL_TIMEOUT,
+		"pool_pre_ping": DB_POOL_PRE_PING,
+		"pool_recycle": DB_POOL_RECYCLE,
+	}
+	if DB_STATEMENT_TIMEOUT_MS > 0:
+		options["connect_args"] = {"options": f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"}
+	return options
+
+
+engine = create_engine(DATABASE_URL, future=True, poolclass=TimedQueuePool, **_engine_options())
 
 
 SessionLocal = sessionmaker(engine, expire_on_commit=False)
 
 
-def init_models():
-	# Create tables (for development). In production use Alembic migrations.
-	Base.metadata.create_all(engine)
+# asyncio engine on the same URL: the psycopg (v3) dialect picks its async
+# driver automatically when used through create_async_engine.
+async_engine = create_async_engine(DATABASE_URL, poolclass=TimedAsyncQueuePool, **_engine_options())
+
+
+AsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False)
+
+
+def _get_sync_db():
+	with SessionLocal() as session:
+		yield session
+
+
+async def _get_async_db():
+	async with AsyncSessionLocal() as session:
+		yield session
+
+
+# Request-scoped session: one per request, always closed (and its connection
+# returned to the pool) when the request finishes, including on errors.
+get_db = _get_async_db if DB_ASYNC else _get_sync_db
+
+
+async def run_db(session, fn, *args, **kwargs):
+	"""Run ``fn(sync_session, *args, **kwargs)`` on the request session.
+
+	An AsyncSession (DB_ASYNC) runs the function through ``run_sync``
+	(greenlet + psycopg async, no threadpool hop); a blocking Session runs
+	it inside Starlette's threadpool.
+	"""
+	if isinstance(session, AsyncSession):
+		return await session.run_sync(fn, *args, **kwargs)
+	return await run_in_threadpool(fn, session, *args, **kwargs)
+
+
+async def run_in_session(fn, *args, **kwargs):
+	"""Like ``run_db`` but for work outside a request (startup hooks,
+	background loops): opens and closes its own session."""
+	if DB_ASYNC:
+		async with AsyncSessionLocal() as session:
+			return await session.run_sync(fn, *args, **kwargs)
+
+	def _call():
+		with SessionLocal() as session:
+			return fn(session, *args, **kwargs)
+
+	return await run_in_threadpool(_call)
+
+
+def _pool_gauges(pool) -> dict:
+	checkouts = pool.checkouts
+	return {
+		"size": pool.size(),
+		"checked_in": pool.checkedin(),
+		"checked_out": pool.checkedout(),
+		"overflow": max(pool.overflow(), 0),
+		"max_overflow": DB_MAX_OVERFLOW,
+		"checkouts": checkouts,
+		"wait_seconds_total": round(pool.wait_seconds_total, 6),
+		"wait_seconds_avg": round(pool.wait_seconds_total / checkouts, 6) if checkouts else 0.0,
+		"wait_seconds_max": round(pool.wait_seconds_max, 6),
+	}
+
+
+def pool_status() -> dict:
+	"""Live gauges for both engines' pools in this worker process."""
+	return {
+		"mode": "async" if DB_ASYNC else "sync",
+		"sync": _pool_gauges(engine.pool),
+		"async": _pool_gauges(async_engine.sync_engine.pool),
+	}
+
+
+_schema_fingerprint = Table(
+	"schema_fingerprint",
+	Base.metadata,
+	Column("name", String(64), primary_key=True),
+	Column("fingerprint", String(64), nullable=False),
+	Column("applied_at", DateTime, nullable=False),
+)
+
+
+def schema_fingerprint(metadata=Base.metadata) -> str:
+	"""Hash of the DDL the models would emit; changes whenever a table,
+	column, type, default, constraint or index changes."""
+	dialect = engine.dialect
+	digest = hashlib.sha256()
+	for table in metadata.sorted_tables:
+		digest.update(str(CreateTable(table).compile(dialect=dialect)).encode())
+		for index in sorted(table.indexes, key=lambda i: i.name or ""):
+			digest.update(str(CreateIndex(index).compile(dialect=dialect)).encode())
+	return digest.hexdigest()
+
+
+def _stored_fingerprint(conn):
+	try:
+		return conn.execute(
+			select(_schema_fingerprint.c.fingerprint).where(_schema_fingerprint.c.name == "app")
+		).scalar()
+	except (ProgrammingError, OperationalError):
+		return None  # first boot: the table does not exist yet
+
+
+def init_models(mode: str = "always") -> bool:
+	"""Create missing tables (for development; in production use Alembic
+	migrations). Returns whether DDL ran.
+
+	``mode="fingerprint"`` skips ``create_all`` -- one catalog round-trip per
+	table -- when the fingerprint stored by the last run matches the current
+	models, so an unchanged schema costs a single primary-key read. Only the
+	app's startup should use it: scripts that import a subset of the models
+	would compute a different fingerprint. ``mode="off"`` never touches the
+	schema.
+	"""
+	if mode == "off":
+		return False
+	if mode != "fingerprint":
+		Base.metadata.create_all(engine)
+		return True
+
+	fingerprint = schema_fingerprint()
+	with engine.connect() as conn:
+		if _stored_fingerprint(conn) == fingerprint:
+			return False
+	with engine.begin() as conn:
+		if conn.dialect.name == "postgresql":
+			# serialise workers booting at the same time, then re-check
+			conn.execute(text("SELECT pg_advisory_xact_lock(hashtext('init_models'))"))
+			if inspect(conn).has_table(_schema_fingerprint.name) and _stored_fingerprint(conn) == fingerprint:
+				return False
+		Base.metadata.create_all(conn)
+		conn.execute(_schema_fingerprint.delete().where(_schema_fingerprint.c.name == "app"))
+		conn.execute(_schema_fingerprint.insert().values(name="app", fingerprint=fingerprint, applied_at=datetime.utcnow()))
+	return True
@@ -0,0 +1,242 @@
+"""Per-route latency and SQL instrumentation, rendered as Prometheus text.
+
+``MetricsMiddleware`` times a sampled fraction of requests and labels them
+with the route template (``/food_delivery/restaurants/{restaurant_id}``, not
+the raw path). SQLAlchemy cursor hooks count and time every statement; while
+a sampled request is in flight they also charge it to that request through a
+context variable, which follows the request into threadpool and ``run_sync``
+work. Statements slower than ``SLOW_QUERY_MS`` go to a bounded slow-query log.
+
+With ``METRICS_SAMPLE_RATE=0`` neither the middleware nor the hooks are
+installed, so there is no per-request or per-statement cost at all.
+"""
+import random
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import METRICS_SAMPLE_RATE, SLOW_QUERY_LOG_SIZE, SLOW_QUERY_MS
+
+# Seconds. Prometheus' defaults, extended down to 1 ms for DB time.
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """Cumulative-bucket histogram; ``observe`` is a bisect and two adds."""
+
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds=LATENCY_BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class RequestStats:
+    __slots__ = ("statements", "db_seconds")
+
+    def __init__(self):
+        self.statements = 0
+        self.db_seconds = 0.0
+
+
+_current_request: ContextVar[Optional[RequestStats]] = ContextVar("metrics_request", default=None)
+
+
+class MetricsRegistry:
+    def __init__(self, slow_query_ms: float = SLOW_QUERY_MS, slow_log_size: int = SLOW_QUERY_LOG_SIZE):
+        self.slow_query_seconds = slow_query_ms / 1000.0
+        self.slow_queries: deque = deque(maxlen=slow_log_size)
+        self._lock = threading.Lock()
+        # (method, route, status) -> latency histogram
+        self.request_latency: Dict[Tuple[str, str, str], Histogram] = {}
+        # (method, route) -> histogram of DB seconds per request / statement totals
+        self.request_db_time: Dict[Tuple[str, str], Histogram] = {}
+        self.request_statements: Dict[Tuple[str, str], int] = {}
+        self.statements_total = 0
+        self.statement_seconds_total = 0.0
+        self.slow_statements_total = 0
+
+    def observe_request(self, method: str, route: str, status: int, seconds: float, stats: RequestStats) -> None:
+        key = (method, route)
+        with self._lock:
+            hist = self.request_latency.get((method, route, str(status)))
+            if hist is None:
+                hist = self.request_latency[(method, route, str(status))] = Histogram()
+            hist.observe(seconds)
+            db_hist = self.request_db_time.get(key)
+            if db_hist is None:
+                db_hist = self.request_db_time[key] = Histogram()
+            db_hist.observe(stats.db_seconds)
+            self.request_statements[key] = self.request_statements.get(key, 0) + stats.statements
+
+    def observe_statement(self, statement: str, seconds: float) -> None:
+        stats = _current_request.get()
+        if stats is not None:
+            stats.statements += 1
+            stats.db_seconds += seconds
+        slow = seconds >= self.slow_query_seconds
+        with self._lock:
+            self.statements_total += 1
+            self.statement_seconds_total += seconds
+            if slow:
+                self.slow_statements_total += 1
+        if slow:
+            self.slow_queries.append({
+                "at": time.time(),
+                "ms": round(seconds * 1000, 2),
+                "statement": " ".join(statement.split())[:1000],
+            })
+            print(f"⚠ Slow query ({seconds * 1000:.0f} ms): {' '.join(statement.split())[:200]}")
+
+    def render(self, gauges: Optional[Dict[str, Dict[str, float]]] = None) -> str:
+        """Prometheus text exposition format, version 0.0.4. ``gauges`` maps
+        a metric name to ``{label string: value}`` for point-in-time values."""
+        lines: List[str] = []
+        with self._lock:
+            latency = {k: _snapshot(h) for k, h in self.request_latency.items()}
+            db_time = {k: _snapshot(h) for k, h in self.request_db_time.items()}
+            statements = dict(self.request_statements)
+            totals = (self.statements_total, self.statement_seconds_total, self.slow_statements_total)
+
+        lines.append("# HELP http_request_duration_seconds Request latency by route template.")
+        lines.append("# TYPE http_request_duration_seconds histogram")
+        for (method, route, status), snap in sorted(latency.items()):
+            _render_histogram(lines, "http_request_duration_seconds", f'method="{method}",route="{_escape(route)}",status="{status}"', snap)
+
+        lines.append("# HELP http_request_db_seconds Time spent in SQL per request.")
+        lines.append("# TYPE http_request_db_seconds histogram")
+        for (method, route), snap in sorted(db_time.items()):
+            _render_histogram(lines, "http_request_db_seconds", f'method="{method}",route="{_escape(route)}"', snap)
+
+        lines.append("# HELP http_request_sql_statements_total SQL statements issued by sampled requests.")
+        lines.append("# TYPE http_request_sql_statements_total counter")
+        for (method, route), count in sorted(statements.items()):
+            lines.append(f'http_request_sql_statements_total{{method="{method}",route="{_escape(route)}"}} {count}')
+
+        lines.append("# HELP db_statements_total SQL statements executed by this worker.")
+        lines.append("# TYPE db_statements_total counter")
+        lines.append(f"db_statements_total {totals[0]}")
+        lines.append("# HELP db_statement_seconds_total Time spent executing SQL statements.")
+        lines.append("# TYPE db_statement_seconds_total counter")
+        lines.append(f"db_statement_seconds_total {totals[1]:.6f}")
+        lines.append("# HELP db_slow_statements_total Statements slower than the slow-query threshold.")
+        lines.append("# TYPE db_slow_statements_total counter")
+        lines.append(f"db_slow_statements_total {totals[2]}")
+
+        for name, series in sorted((gauges or {}).items()):
+            lines.append(f"# TYPE {name} gauge")
+            for labels, value in sorted(series.items()):
+                lines.append(f"{name}{{{labels}}} {value}" if labels else f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+
+def _snapshot(hist: Histogram):
+    return hist.bounds, list(hist.counts), hist.sum, hist.count
+
+
+def _render_histogram(lines: List[str], name: str, labels: str, snap) -> None:
+    bounds, counts, total, count = snap
+    cumulative = 0
+    for bound, n in zip(bounds, counts):
+        cumulative += n
+        lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+    lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {count}')
+    lines.append(f"{name}_sum{{{labels}}} {total:.6f}")
+    lines.append(f"{name}_count{{{labels}}} {count}")
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"')
+
+
+metrics = MetricsRegistry()
+
+
+def _route_label(scope: Scope) -> str:
+    route = scope.get("route")
+    if route is not None:
+        return getattr(route, "path", "unknown")
+    # mounted apps (the /admin panel) and 404s: don't label by raw path,
+    # that would give every URL its own series
+    root_path = scope.get("root_path") or ""
+    return f"{root_path}/*" if root_path else "unmatched"
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware (no BaseHTTPMiddleware task/queue overhead)."""
+
+    def __init__(self, app: ASGIApp, sample_rate: float = METRICS_SAMPLE_RATE, registry: MetricsRegistry = metrics):
+        self.app = app
+        self.sample_rate = sample_rate
+        self.registry = registry
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or (self.sample_rate < 1.0 and random.random() >= self.sample_rate):
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        stats = RequestStats()
+        token = _current_request.set(stats)
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            _current_request.reset(token)
+            self.registry.observe_request(scope["method"], _route_label(scope), status_code, elapsed, stats)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("metrics_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["metrics_started"].pop()
+    metrics.observe_statement(statement, time.perf_counter() - started)
+
+
+def _handle_error(exception_context):
+    # keep the timing stack balanced when a statement fails
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("metrics_started"):
+        conn.info["metrics_started"].pop()
+
+
+def install_sql_hooks(*engines) -> None:
+    for engine in engines:
+        sync_engine = getattr(engine, "sync_engine", engine)
+        event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(sync_engine, "handle_error", _handle_error)
+
+
+def install(app) -> bool:
+    """Wire the middleware and SQL hooks into ``app`` unless sampling is off."""
+    if METRICS_SAMPLE_RATE <= 0:
+        return False
+    from app.core.database import async_engine, engine
+
+    install_sql_hooks(engine, async_engine)
+    app.add_middleware(MetricsMiddleware)
+    return True
@@ -1,10 +1,12 @@
 from fastapi import Depends, HTTPException, status
 
-from app.modules.auth.security import get_current_user
+from app.modules.auth.security import get_token_principal
 
 
 def require_roles(*roles):
-    def role_dependency(user: dict = Depends(get_current_user)) -> dict:
+    # Authorizes from the verified token claims (no users query); the
+    # returned principal carries id, username and roles only.
+    async def role_dependency(user: dict = Depends(get_token_principal)) -> dict:
         user_roles = set(user.get("roles", []))
         allowed = any(r in user_roles for r in roles)
         if not allowed:
@@ -0,0 +1,22 @@
+"""JSON responses rendered straight from Python values.
+
+``FastJSONResponse`` serializes with pydantic-core, the encoder behind
+``model_dump_json``: datetimes, UUIDs, nested lists and dicts and pydantic
+models are written in one native pass instead of a ``jsonable_encoder`` walk
+followed by ``json.dumps``. NaN and infinities become ``null``.
+
+It is the app's default response class. A handler that returns a
+``FastJSONResponse`` itself also skips FastAPI's response processing:
+nothing is re-validated against the route's ``response_model``, which then
+only documents the shape. Only do that where the handler builds exactly the
+model's fields from database rows.
+"""
+from typing import Any
+
+from pydantic_core import to_json
+from starlette.responses import JSONResponse
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return to_json(content, inf_nan_mode="null")
@@ -1,31 +1,28 @@
+import asyncio
+
 from fastapi import FastAPI
-from sqladmin import Admin
-from app.modules.admin.views.locations import locationAdmin
-from app.modules.admin.views.resturant import MenuCategoryAdmin, MenuItemAdmin, RestaurantAdmin, RestaurantLocatinAdmin
-from app.modules.admin.views.users import UserAdmin
 from app.modules.auth import router as auth_router
 from app.modules.admin import router as admin_router
 
 
 from app.modules.food_delivery import food_delivery
 from app.modules.locations import router as locations_router
-from app.core.database import engine
 from app.modules.order_address_list import address_list_routes
+from app.modules.admin.panel import mount_admin_panel
+from app.core.config import ADMIN_PANEL, DB_SCHEMA_CHECK
+from app.core import compression, metrics
+from app.core.responses import FastJSONResponse
 
 
-app = FastAPI(title="User Management API", version="1.0.0")
+app = FastAPI(title="User Management API", version="1.0.0", default_response_class=FastJSONResponse)
+compression.install(app)
+# added last, so its timings include compression
+metrics.install(app)
 
 
 @app.get("/")
 def root():
     return {"status": "ok", "message": "API is running"}
-admin = Admin(app=app, engine=engine, title="User Admin Panel", base_url="/admin")
-admin.add_view(UserAdmin)
-admin.add_view(locationAdmin)
-admin.add_view(RestaurantAdmin)
-admin.add_view(RestaurantLocatinAdmin)
-admin.add_view(MenuCategoryAdmin)
-admin.add_view(MenuItemAdmin)
 
 
 app.include_router(auth_router)
@@ -35,11 +32,68 @@ app.include_router(locations_router)
 app.include_router(food_delivery.router)
 app.include_router(address_list_routes.router)
 
+# Mounted after the API routers: the /admin mount would otherwise swallow the
+# /admin/... JSON endpoints from admin_router.
+mount_admin_panel(app, ADMIN_PANEL)
+
+
+def _start_background(name: str, coro) -> None:
+    # kept on app.state under ``name`` and cancelled on shutdown
+    task = asyncio.create_task(coro, name=name)
+    setattr(app.state, name, task)
+    app.state.background_tasks.append(task)
+
+
 @app.on_event("startup")
 async def on_startup():
+    app.state.background_tasks = []
     try:
         from app.core.database import init_models
-        init_models()
-        print(" Database tables initialized")
+        if init_models(DB_SCHEMA_CHECK):
+            print(" Database tables initialized")
+        else:
+            print(" Database schema unchanged, skipped table creation")
     except Exception as e:
         print(f" Could not initialize database: {e}")
+
+    # Keep this worker's copy of token revocations current.
+    from app.modules.auth.revocation import token_revocations
+    _start_background("revocation_refresher", token_revocations.run_refresh_loop())
+
+    from app.modules.auth.otp_store import otp_store
+    _start_background("otp_sweeper", otp_store.run_sweeper())
+
+    from app.modules.auth.sms import sms_dispatcher
+    _start_background("sms_dispatcher", sms_dispatcher.run())
+
+    # Builds the nearby-restaurants index, then keeps it in step with other workers.
+    from app.modules.food_delivery.geo import location_index
+    _start_background("location_index_refresher", location_index.run_refresh_loop())
+
+    from app.modules.food_delivery.availability import availability_index
+    _start_background("availability_index_refresher", availability_index.run_refresh_loop())
+
+    from app.modules.food_delivery.pricing import price_table
+    _start_background("price_table_refresher", price_table.run_refresh_loop())
+
+    from app.modules.food_delivery.eta import prep_times
+    _start_background("prep_times_refresher", prep_times.run_refresh_loop())
+
+    from app.modules.food_delivery.search import catalog_search
+    _start_background("catalog_search_refresher", catalog_search.run_refresh_loop())
+
+    # LISTENs for order status events and fans them out to this worker's streams.
+    from app.modules.food_delivery.order_events import order_events
+    _start_background("order_events", order_events.run())
+
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    # the refresh loops, SMS dispatcher and order-events listener run forever
+    tasks = getattr(app.state, "background_tasks", [])
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+    from app.modules.auth.hashing import password_hasher
+    password_hasher.shutdown()
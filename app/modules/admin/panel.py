@@ -0,0 +1,71 @@
+"""The sqladmin panel at /admin.
+
+sqladmin, its templates and the ModelViews are the heaviest imports in the
+app, so by default the panel is only built when /admin is first requested.
+"""
+import threading
+
+from starlette.types import Receive, Scope, Send
+
+from app.core.database import engine
+
+BASE_URL = "/admin"
+
+
+def _build_admin(app):
+    from sqladmin import Admin
+
+    from app.modules.admin.views.locations import locationAdmin
+    from app.modules.admin.views.resturant import MenuCategoryAdmin, MenuItemAdmin, RestaurantAdmin, RestaurantLocatinAdmin
+    from app.modules.admin.views.users import UserAdmin
+
+    admin = Admin(app=app, engine=engine, title="User Admin Panel", base_url=BASE_URL)
+    admin.add_view(UserAdmin)
+    admin.add_view(locationAdmin)
+    admin.add_view(RestaurantAdmin)
+    admin.add_view(RestaurantLocatinAdmin)
+    admin.add_view(MenuCategoryAdmin)
+    admin.add_view(MenuItemAdmin)
+    return admin
+
+
+class LazyAdminPanel:
+    """ASGI app mounted at /admin that builds the real panel on first use.
+
+    ``routes`` is exposed so ``url_for("admin:...")`` resolves through the
+    mount once the panel exists.
+    """
+
+    def __init__(self):
+        self._panel = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._panel is None:
+            with self._lock:
+                if self._panel is None:
+                    from starlette.applications import Starlette
+
+                    # Admin() mounts itself on the app it is given; hand it a
+                    # throwaway one and serve its inner app from this mount.
+                    self._panel = _build_admin(Starlette()).admin
+        return self._panel
+
+    @property
+    def routes(self):
+        return self._panel.router.routes if self._panel is not None else []
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await self._load()(scope, receive, send)
+
+
+def mount_admin_panel(app, mode: str) -> None:
+    """Mount /admin per ADMIN_PANEL: "lazy", "eager" or "off"."""
+    if mode == "off":
+        return
+    if mode == "eager":
+        _build_admin(app)
+    elif mode == "lazy":
+        app.mount(BASE_URL, app=LazyAdminPanel(), name="admin")
+    else:
+        raise ValueError(f"Unknown ADMIN_PANEL {mode!r}")
@@ -1,11 +1,16 @@
-
-from fastapi import APIRouter, Depends, HTTPException, status
-from typing import List
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile, status
+from starlette.concurrency import run_in_threadpool
+from typing import List, Optional
 from app.modules.auth.schemas import UserOut
 from app.core.rbac import require_roles
 from app.modules.auth.security import get_current_user
 from app.modules.auth.models import User
-from app.core.database import SessionLocal
+from app.modules.auth.bulk_import import DEFAULT_CHUNK_SIZE, import_users
+from app.shared.bulk import FORMATS, detect_format, text_stream
+from app.core.database import get_db, pool_status, run_db
+from app.core.metrics import metrics
+from app.core.responses import FastJSONResponse
+from fastapi.responses import PlainTextResponse
 from sqlalchemy import select
 
 router = APIRouter(prefix="/admin", tags=["admin"])
@@ -16,123 +21,145 @@ def get_admin_user(user: dict = Depends(require_roles("admin"))):
     return user
 
 
+def _admin_user_dict(u: User) -> dict:
+    return {
+        "id": u.id,
+        "email": u.email,
+        "username": u.username,
+        "first_name": u.first_name,
+        "last_name": u.last_name,
+        "phone_number": u.phone_number,
+        "role": u.role,
+        "status": u.status,
+        "is_email_verified": u.is_email_verified,
+        "roles": u.roles,
+        "created_at": u.created_at,
+        "updated_at": u.updated_at,
+        "last_login": u.last_login,
+    }
+
+
+def _get_user_or_404(session, user_id: int) -> User:
+    q = select(User).where(User.id == user_id)
+    db_user = session.execute(q).scalars().first()
+    if not db_user:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+    return db_user
+
+
+def _list_users(session) -> list:
+    users = session.query(User).all()
+    return [_admin_user_dict(u) for u in users]
+
+
+# Token revocation and the principal cache follow User writes by themselves
+# (see auth.revocation), so these two are plain ORM updates.
+def _update_user(session, user_id: int, updates: dict) -> dict:
+    db_user = _get_user_or_404(session, user_id)
+
+    # Update allowed fields
+    for key, value in updates.items():
+        if key in ["first_name", "last_name", "phone_number", "role", "status", "is_email_verified"]:
+            setattr(db_user, key, value)
+
+    session.commit()
+    session.refresh(db_user)
+    return _admin_user_dict(db_user)
+
+
+def _delete_user(session, user_id: int) -> None:
+    db_user = _get_user_or_404(session, user_id)
+    session.delete(db_user)
+    session.commit()
+
+
 @router.get("/users", response_model=List[UserOut])
-def list_all_users(admin: dict = Depends(get_admin_user)):
+async def list_all_users(admin: dict = Depends(get_admin_user), db=Depends(get_db)):
     """List all users (admin only)."""
     try:
-        session = SessionLocal()
-        try:
-            users = session.query(User).all()
-            return [
-                {
-                    "id": u.id,
-                    "email": u.email,
-                    "username": u.username,
-                    "first_name": u.first_name,
-                    "last_name": u.last_name,
-                    "phone_number": u.phone_number,
-                    "role": u.role,
-                    "status": u.status,
-                    "is_email_verified": u.is_email_verified,
-                    "roles": u.roles,
-                    "created_at": u.created_at,
-                    "updated_at": u.updated_at,
-                    "last_login": u.last_login,
-                }
-                for u in users
-            ]
-        finally:
-            session.close()
+        # _admin_user_dict is exactly UserOut; skip re-validating every row
+        return FastJSONResponse(await run_db(db, _list_users))
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
 
+@router.post("/users/import")
+async def import_users_file(
+    file: UploadFile = File(...),
+    format: Optional[str] = Query(None, description="csv or ndjson; detected from the file name if omitted"),
+    dry_run: bool = False,
+    chunk_size: int = Query(DEFAULT_CHUNK_SIZE, ge=1, le=10000),
+    admin: dict = Depends(get_admin_user),
+):
+    """Bulk-create users from a CSV or NDJSON upload (admin only).
+
+    Bad rows are reported with their row number and skipped; the rest of the
+    file is still imported.
+    """
+    try:
+        fmt = format or detect_format(file.filename, file.content_type)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    if fmt not in FORMATS:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"format must be one of {FORMATS}")
+    try:
+        return await run_in_threadpool(import_users, text_stream(file.file), fmt, chunk_size=chunk_size, dry_run=dry_run)
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="File must be UTF-8 encoded")
+
+
 @router.get("/users/{user_id}", response_model=UserOut)
-def get_user_by_id(user_id: int, admin: dict = Depends(get_admin_user)):
+async def get_user_by_id(user_id: int, admin: dict = Depends(get_admin_user), db=Depends(get_db)):
     """Get a specific user by ID (admin only)."""
     try:
-        session = SessionLocal()
-        try:
-            q = select(User).where(User.id == user_id)
-            db_user = session.execute(q).scalars().first()
-            if not db_user:
-                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
-            return {
-                "id": db_user.id,
-                "email": db_user.email,
-                "username": db_user.username,
-                "first_name": db_user.first_name,
-                "last_name": db_user.last_name,
-                "phone_number": db_user.phone_number,
-                "role": db_user.role,
-                "status": db_user.status,
-                "is_email_verified": db_user.is_email_verified,
-                "roles": db_user.roles,
-                "created_at": db_user.created_at,
-                "updated_at": db_user.updated_at,
-                "last_login": db_user.last_login,
-            }
-        finally:
-            session.close()
+        return FastJSONResponse(await run_db(db, lambda session: _admin_user_dict(_get_user_or_404(session, user_id))))
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
 
 @router.put("/users/{user_id}")
-def update_user(user_id: int, updates: dict, admin: dict = Depends(get_admin_user)):
+async def update_user(user_id: int, updates: dict, admin: dict = Depends(get_admin_user), db=Depends(get_db)):
     """Update user fields (admin only)."""
     try:
-        session = SessionLocal()
-        try:
-            q = select(User).where(User.id == user_id)
-            db_user = session.execute(q).scalars().first()
-            if not db_user:
-                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
-            
-            # Update allowed fields
-            for key, value in updates.items():
-                if key in ["first_name", "last_name", "phone_number", "role", "status", "is_email_verified"]:
-                    setattr(db_user, key, value)
-            
-            session.commit()
-            session.refresh(db_user)
-            return {
-                "id": db_user.id,
-                "email": db_user.email,
-                "username": db_user.username,
-                "first_name": db_user.first_name,
-                "last_name": db_user.last_name,
-                "phone_number": db_user.phone_number,
-                "role": db_user.role,
-                "status": db_user.status,
-                "is_email_verified": db_user.is_email_verified,
-                "roles": db_user.roles,
-                "created_at": db_user.created_at,
-                "updated_at": db_user.updated_at,
-                "last_login": db_user.last_login,
-            }
-        finally:
-            session.close()
+        return await run_db(db, _update_user, user_id, updates)
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
 
 @router.delete("/users/{user_id}")
-def delete_user(user_id: int, admin: dict = Depends(get_admin_user)):
+async def delete_user(user_id: int, admin: dict = Depends(get_admin_user), db=Depends(get_db)):
     """Delete a user (admin only)."""
     try:
-        session = SessionLocal()
-        try:
-            q = select(User).where(User.id == user_id)
-            db_user = session.execute(q).scalars().first()
-            if not db_user:
-                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
-            
-            session.delete(db_user)
-            session.commit()
-            return {"message": "User deleted successfully", "user_id": user_id}
-        finally:
-            session.close()
+        await run_db(db, _delete_user, user_id)
+        return {"message": "User deleted successfully", "user_id": user_id}
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
+
+@router.get("/db/pool")
+def db_pool_status(admin: dict = Depends(get_admin_user)):
+    """Connection pool gauges for this worker (admin only)."""
+    return pool_status()
+
+
+def _pool_gauges() -> dict:
+    gauges = {}
+    for engine_name, gauge in pool_status().items():
+        if not isinstance(gauge, dict):
+            continue
+        for key in ("size", "checked_in", "checked_out", "overflow"):
+            gauges.setdefault(f"db_pool_{key}", {})[f'engine="{engine_name}"'] = gauge[key]
+        gauges.setdefault("db_pool_wait_seconds_max", {})[f'engine="{engine_name}"'] = gauge["wait_seconds_max"]
+    return gauges
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def metrics_text(admin: dict = Depends(get_admin_user)):
+    """Per-route latency, SQL and pool metrics for this worker in Prometheus text format (admin only)."""
+    return PlainTextResponse(metrics.render(_pool_gauges()), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@router.get("/metrics/slow-queries")
+def slow_queries(admin: dict = Depends(get_admin_user)):
+    """Most recent statements slower than SLOW_QUERY_MS in this worker (admin only)."""
+    return list(metrics.slow_queries)
@@ -0,0 +1,179 @@
+"""Bulk user import: stream CSV/NDJSON, validate, dedupe, hash, load in chunks.
+
+Each chunk is one transaction. Rows are checked against ``UserCreate``, against
+earlier rows of the same file and against existing users before any password is
+hashed, so bad rows never cost a bcrypt round. Rows that still collide at
+insert time (a concurrent registration) are reported, not fatal.
+"""
+import json
+from typing import Iterable, List, Optional, Set
+
+from pydantic import ValidationError
+from sqlalchemy import insert, or_, select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from app.core.database import engine
+from app.modules.auth.hashing import password_hasher
+from app.modules.auth.models import User
+from app.modules.auth.schemas import UserCreate
+from app.shared.bulk import ImportReport, RecordError, chunked, iter_records, split_list, validation_message
+
+DEFAULT_CHUNK_SIZE = 1000
+
+_COLUMNS = ("email", "username", "hashed_password", "first_name", "last_name", "phone_number", "roles")
+
+_STAGING_DDL = text(
+    "CREATE TEMP TABLE IF NOT EXISTS user_import_staging ("
+    " row_number integer, email varchar(256), username varchar(128),"
+    " hashed_password varchar(256), first_name varchar(128), last_name varchar(128),"
+    " phone_number varchar(128), roles jsonb"
+    ") ON COMMIT DELETE ROWS"
+)
+
+_FROM_STAGING = text(
+    "INSERT INTO users (email, username, hashed_password, first_name, last_name, phone_number,"
+    " role, status, is_email_verified, roles, created_at, updated_at)"
+    " SELECT email, username, hashed_password, first_name, last_name, phone_number,"
+    " 'user', 'active', false, roles, timezone('utc', now()), timezone('utc', now())"
+    " FROM user_import_staging ORDER BY row_number"
+    " ON CONFLICT DO NOTHING RETURNING email"
+)
+
+
+def _parse(row_number: int, record, report: ImportReport) -> Optional[UserCreate]:
+    if isinstance(record, RecordError):
+        report.error(row_number, str(record))
+        return None
+    if "roles" in record:
+        record["roles"] = split_list(record["roles"])
+    try:
+        return UserCreate(**record)
+    except ValidationError as e:
+        report.error(row_number, validation_message(e))
+        return None
+
+
+def _existing(conn, users: List[UserCreate]):
+    emails = [u.email for u in users]
+    phones = [u.phone_number for u in users if u.phone_number]
+    q = select(User.email, User.phone_number).where(
+        or_(User.email.in_(emails), User.phone_number.in_(phones)) if phones else User.email.in_(emails)
+    )
+    taken_emails, taken_phones = set(), set()
+    for email, phone in conn.execute(q):
+        taken_emails.add(email)
+        if phone:
+            taken_phones.add(phone)
+    return taken_emails, taken_phones
+
+
+def _copy_rows(conn, rows: List[dict]) -> Set[str]:
+    """COPY the chunk into a temp table, then move it into ``users`` with one
+    INSERT ... SELECT. Returns the emails that were actually inserted."""
+    conn.execute(_STAGING_DDL)
+    cursor = conn.connection.driver_connection.cursor()
+    with cursor.copy(
+        "COPY user_import_staging (row_number, " + ", ".join(_COLUMNS) + ") FROM STDIN"
+    ) as copy:
+        for row in rows:
+            copy.write_row([row["row_number"]] + [
+                json.dumps(row["roles"]) if col == "roles" else row[col] for col in _COLUMNS
+            ])
+    return {email for (email,) in conn.execute(_FROM_STAGING)}
+
+
+def _insert_rows(conn, rows: List[dict]) -> Set[str]:
+    """Multi-row INSERT for drivers without COPY support."""
+    values = [
+        {**{col: row[col] for col in _COLUMNS}, "role": "user", "status": "active", "is_email_verified": False}
+        for row in rows
+    ]
+    if conn.dialect.name == "postgresql":
+        stmt = pg_insert(User).values(values).on_conflict_do_nothing().returning(User.email)
+        return {email for (email,) in conn.execute(stmt)}
+    conn.execute(insert(User), values)
+    return {row["email"] for row in rows}
+
+
+def _load_chunk(parsed, report: ImportReport, method: str, dry_run: bool) -> None:
+    with engine.connect() as conn:
+        taken_emails, taken_phones = _existing(conn, [u for _, u in parsed])
+    fresh = []
+    for row_number, user in parsed:
+        if user.email in taken_emails:
+            report.error(row_number, "A user with this email already exists", email=user.email)
+        elif user.phone_number and user.phone_number in taken_phones:
+            report.error(row_number, "A user with this phone number already exists", email=user.email)
+        else:
+            fresh.append((row_number, user))
+    if dry_run:
+        report.inserted += len(fresh)
+        return
+    if not fresh:
+        return
+
+    # hashing happens outside the transaction; it is by far the slowest step
+    hashes = password_hasher.hash_many([u.password for _, u in fresh])
+    rows = [
+        {
+            "row_number": row_number,
+            "email": u.email,
+            "username": u.username,
+            "hashed_password": hashed,
+            "first_name": u.first_name,
+            "last_name": u.last_name,
+            "phone_number": u.phone_number,
+            "roles": u.roles or [],
+        }
+        for (row_number, u), hashed in zip(fresh, hashes)
+    ]
+    with engine.begin() as conn:
+        use_copy = method == "copy" and conn.dialect.driver == "psycopg"
+        inserted = _copy_rows(conn, rows) if use_copy else _insert_rows(conn, rows)
+
+    report.inserted += len(inserted)
+    for row in rows:
+        if row["email"] not in inserted:
+            report.error(row["row_number"], "Conflicts with a user created during the import", email=row["email"])
+
+
+def import_users(
+    lines: Iterable[str],
+    fmt: str,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    method: str = "copy",
+    dry_run: bool = False,
+    max_errors: int = 1000,
+) -> dict:
+    """Import users from CSV/NDJSON lines; returns the report as a dict.
+
+    ``method`` is "copy" (COPY into a staging table, Postgres + psycopg 3) or
+    "insert" (multi-row INSERT). ``dry_run`` validates and checks for
+    duplicates without hashing or writing anything; ``inserted`` then counts
+    the rows that would have been inserted.
+    """
+    report = ImportReport(max_errors=max_errors)
+    seen_emails: Set[str] = set()
+    seen_phones: Set[str] = set()
+
+    def valid_rows():
+        for row_number, record in iter_records(lines, fmt):
+            report.total += 1
+            user = _parse(row_number, record, report)
+            if user is None:
+                continue
+            email = user.email.lower()
+            if email in seen_emails:
+                report.error(row_number, "Duplicate email in file", email=user.email)
+                continue
+            if user.phone_number and user.phone_number in seen_phones:
+                report.error(row_number, "Duplicate phone number in file", email=user.email)
+                continue
+            seen_emails.add(email)
+            if user.phone_number:
+                seen_phones.add(user.phone_number)
+            yield row_number, user
+
+    for chunk in chunked(valid_rows(), chunk_size):
+        _load_chunk(chunk, report, method, dry_run)
+    return report.as_dict()
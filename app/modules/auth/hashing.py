@@ -0,0 +1,135 @@
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import List
+
+import bcrypt
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import BCRYPT_MAX_PENDING, BCRYPT_ROUNDS, BCRYPT_WORKERS
+
+
+# Module-level so the pool can pickle them.
+def _hash(password: bytes, rounds: int) -> bytes:
+    return bcrypt.hashpw(password, bcrypt.gensalt(rounds))
+
+
+def _hash_batch(passwords: List[bytes], rounds: int) -> List[bytes]:
+    return [_hash(p, rounds) for p in passwords]
+
+
+def _check(password: bytes, hashed: bytes) -> bool:
+    return bcrypt.checkpw(password, hashed)
+
+
+def _pool_context():
+    # A plain fork would copy the server's listening socket and signal
+    # handlers into the workers. forkserver starts clean and, unlike spawn,
+    # does not re-run the __main__ script (most of scripts/ are unguarded).
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        ctx = multiprocessing.get_context("forkserver")
+        ctx.set_forkserver_preload([__name__])
+        return ctx
+    return multiprocessing.get_context("spawn")
+
+
+class HashingBusy(RuntimeError):
+    """Raised when too many hashes are already queued; shed the request."""
+
+
+class PasswordHasher:
+    """bcrypt off the request threads.
+
+    Hashes run in a process pool so a burst of registrations only competes
+    for the pool's cores, not for the threadpool or the event loop. At most
+    ``max_pending`` jobs may be queued or running; beyond that callers get
+    HashingBusy immediately instead of piling up.
+    """
+
+    def __init__(self, workers: int = BCRYPT_WORKERS, max_pending: int = BCRYPT_MAX_PENDING, rounds: int = BCRYPT_ROUNDS):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.rounds = rounds
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=_pool_context())
+        return self._executor
+
+    def _submit(self, fn, *args, wait: bool = False) -> Future:
+        if not self._slots.acquire(blocking=wait):
+            raise HashingBusy("Too many password hashing requests in flight")
+        try:
+            future = self._pool().submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def hash(self, password: str) -> str:
+        if self.workers <= 0:
+            return _hash(password.encode(), self.rounds).decode()
+        return self._submit(_hash, password.encode(), self.rounds).result().decode()
+
+    def hash_many(self, passwords: List[str], batch_size: int = 32) -> List[str]:
+        """Hash a list for bulk jobs. Passwords go to the pool in batches to
+        amortise the IPC round-trip; callers wait for pool slots instead of
+        being shed, but never hold more than ``workers * 2`` of them so
+        interactive registrations keep getting through."""
+        encoded = [p.encode() for p in passwords]
+        if self.workers <= 0:
+            return [h.decode() for h in _hash_batch(encoded, self.rounds)]
+        window = threading.BoundedSemaphore(max(1, min(self.workers * 2, self.max_pending // 2)))
+        futures = []
+        for start in range(0, len(encoded), batch_size):
+            window.acquire()
+            try:
+                future = self._submit(_hash_batch, encoded[start:start + batch_size], self.rounds, wait=True)
+            except BaseException:
+                window.release()
+                raise
+            future.add_done_callback(lambda _: window.release())
+            futures.append(future)
+        return [h.decode() for f in futures for h in f.result()]
+
+    def verify(self, plain_password: str, hashed_password: str) -> bool:
+        try:
+            if self.workers <= 0:
+                return _check(plain_password.encode(), hashed_password.encode())
+            return self._submit(_check, plain_password.encode(), hashed_password.encode()).result()
+        except HashingBusy:
+            raise
+        except Exception:
+            return False
+
+    async def hash_async(self, password: str) -> str:
+        if self.workers <= 0:
+            return await run_in_threadpool(self.hash, password)
+        hashed = await asyncio.wrap_future(self._submit(_hash, password.encode(), self.rounds))
+        return hashed.decode()
+
+    async def verify_async(self, plain_password: str, hashed_password: str) -> bool:
+        if self.workers <= 0:
+            return await run_in_threadpool(self.verify, plain_password, hashed_password)
+        try:
+            future = self._submit(_check, plain_password.encode(), hashed_password.encode())
+            return await asyncio.wrap_future(future)
+        except HashingBusy:
+            raise
+        except Exception:
+            return False
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+
+password_hasher = PasswordHasher()
@@ -1,4 +1,4 @@
-from sqlalchemy import BigInteger, Column, Float, Integer, String, Boolean, DateTime, false, func
+from sqlalchemy import BigInteger, Column, Float, Index, Integer, String, Boolean, DateTime, false, func
 from sqlalchemy.dialects.postgresql import JSONB
 from datetime import datetime
 
@@ -24,4 +24,43 @@ class User(Base):
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
     last_login = Column(DateTime, nullable=True)
-    
\ No newline at end of file
+    
+
+class TokenRevocation(Base):
+    """Per-user minimum token version.
+
+    Access tokens carry the version that was current when they were issued
+    (the ``pv`` claim); anything below ``min_version`` is rejected. Deleted
+    users get the maximum version so every outstanding token dies.
+    """
+    __tablename__ = "token_revocation"
+
+    user_id = Column(Integer, primary_key=True)
+    min_version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False, index=True)
+
+
+class OTPCode(Base):
+    """Outstanding one-time passwords, shared by every worker (OTP_BACKEND=database)."""
+    __tablename__ = "otp_code"
+
+    phone_number = Column(String(128), primary_key=True)
+    code = Column(String(16), nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
+
+
+class SMSOutbox(Base):
+    """Undelivered SMS messages. Rows are deleted once the provider accepts
+    them; ones that exhaust their retries stay behind with status "failed"
+    and their body redacted."""
+    __tablename__ = "sms_outbox"
+    __table_args__ = (Index("ix_sms_outbox_due", "status", "next_attempt_at"),)
+
+    id = Column(BigInteger, primary_key=True)
+    phone_number = Column(String(128), nullable=False)
+    body = Column(String(1600), nullable=False)
+    status = Column(String(16), nullable=False, default="pending")
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    last_error = Column(String(512), nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
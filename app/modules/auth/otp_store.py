@@ -0,0 +1,158 @@
+import asyncio
+import heapq
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import delete
+from sqlalchemy.dialects.postgresql import insert
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import OTP_BACKEND, OTP_SWEEP_SECONDS
+from app.modules.auth.models import OTPCode
+
+
+class OTPStore(ABC):
+    """Outstanding OTPs keyed by phone number. ``verify`` consumes the code."""
+
+    @abstractmethod
+    def put(self, phone_number: str, code: str, ttl_seconds: float) -> None:
+        ...
+
+    @abstractmethod
+    def verify(self, phone_number: str, code: str) -> bool:
+        ...
+
+    @abstractmethod
+    def sweep(self) -> int:
+        """Drop expired codes; returns how many were removed."""
+
+    async def run_sweeper(self, interval: float = OTP_SWEEP_SECONDS) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                removed = await run_in_threadpool(self.sweep)
+                if removed:
+                    print(f"✓ Swept {removed} expired OTPs")
+            except Exception as e:
+                print(f"⚠ OTP sweep failed: {e}")
+
+
+class MemoryOTPStore(OTPStore):
+    """Single-process store. Expiry is tracked in a min-heap so a sweep only
+    touches codes that are actually due; entries overwritten by a newer
+    ``put`` are skipped lazily. ``put`` sweeps as it goes, so the store stays
+    bounded even without the background sweeper."""
+
+    def __init__(self):
+        self._codes: Dict[str, Tuple[str, float]] = {}
+        self._expiry: List[Tuple[float, str]] = []
+        self._lock = threading.Lock()
+
+    def put(self, phone_number: str, code: str, ttl_seconds: float) -> None:
+        now = time.monotonic()
+        expires_at = now + ttl_seconds
+        with self._lock:
+            self._sweep_locked(now)
+            self._codes[phone_number] = (code, expires_at)
+            heapq.heappush(self._expiry, (expires_at, phone_number))
+
+    def verify(self, phone_number: str, code: str) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._codes.get(phone_number)
+            if entry is None:
+                return False
+            stored_code, expires_at = entry
+            if expires_at <= now:
+                del self._codes[phone_number]
+                return False
+            if stored_code != str(code):
+                return False
+            del self._codes[phone_number]
+            return True
+
+    def sweep(self) -> int:
+        with self._lock:
+            return self._sweep_locked(time.monotonic())
+
+    def _sweep_locked(self, now: float) -> int:
+        removed = 0
+        heap = self._expiry
+        while heap and heap[0][0] <= now:
+            expires_at, phone_number = heapq.heappop(heap)
+            entry = self._codes.get(phone_number)
+            # only drop it if it wasn't replaced by a later put
+            if entry is not None and entry[1] == expires_at:
+                del self._codes[phone_number]
+                removed += 1
+        # verified codes leave stale heap entries behind; compact when they dominate
+        if len(heap) > 1024 and len(heap) > 4 * len(self._codes):
+            self._expiry = [(exp, phone) for phone, (_, exp) in self._codes.items()]
+            heapq.heapify(self._expiry)
+        return removed
+
+    def __len__(self) -> int:
+        return len(self._codes)
+
+
+class DatabaseOTPStore(OTPStore):
+    """Postgres-backed store shared by all workers. Verification is a single
+    conditional DELETE, so a code can only be consumed once even if two
+    workers race on it. Expired rows go through the ``expires_at`` index."""
+
+    def __init__(self, engine=None):
+        self._engine = engine
+
+    @property
+    def engine(self):
+        if self._engine is None:
+            from app.core.database import engine
+            self._engine = engine
+        return self._engine
+
+    def put(self, phone_number: str, code: str, ttl_seconds: float) -> None:
+        expires_at = datetime.utcnow() + timedelta(seconds=ttl_seconds)
+        stmt = insert(OTPCode).values(phone_number=phone_number, code=code, expires_at=expires_at)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[OTPCode.phone_number],
+            set_={"code": stmt.excluded.code, "expires_at": stmt.excluded.expires_at},
+        )
+        with self.engine.begin() as conn:
+            conn.execute(stmt)
+
+    def verify(self, phone_number: str, code: str) -> bool:
+        stmt = (
+            delete(OTPCode)
+            .where(
+                OTPCode.phone_number == phone_number,
+                OTPCode.code == str(code),
+                OTPCode.expires_at > datetime.utcnow(),
+            )
+            .returning(OTPCode.phone_number)
+        )
+        with self.engine.begin() as conn:
+            return conn.execute(stmt).first() is not None
+
+    def sweep(self) -> int:
+        with self.engine.begin() as conn:
+            result = conn.execute(delete(OTPCode).where(OTPCode.expires_at <= datetime.utcnow()))
+            return result.rowcount or 0
+
+
+def build_otp_store(backend: Optional[str] = None) -> OTPStore:
+    backend = backend or OTP_BACKEND
+    if backend == "database":
+        return DatabaseOTPStore()
+    if backend == "memory":
+        workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+        if workers > 1:
+            print(f"⚠ OTP_BACKEND=memory with {workers} workers: codes sent by one worker will not verify on the others")
+        return MemoryOTPStore()
+    raise ValueError(f"Unknown OTP_BACKEND {backend!r}")
+
+
+otp_store = build_otp_store()
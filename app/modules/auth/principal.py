@@ -0,0 +1,67 @@
+from dataclasses import dataclass
+from typing import Any, Optional, Tuple
+
+from app.core.cache import TTLCache
+from app.core.config import PRINCIPAL_CACHE_SIZE, PRINCIPAL_CACHE_TTL_SECONDS
+
+
+@dataclass(frozen=True, slots=True)
+class Principal:
+    """The authenticated user as seen by request handlers.
+
+    Only what authorization and handlers need; no password hash. Supports
+    ``user["id"]`` / ``user.get("roles")`` so existing dict-style callers keep
+    working.
+    """
+
+    id: int
+    username: str
+    email: Optional[str]
+    phone_number: Optional[str]
+    role: Optional[str]
+    status: Optional[str]
+    roles: Tuple[str, ...]
+
+    @classmethod
+    def from_user(cls, user: dict) -> "Principal":
+        return cls(
+            id=user.get("id"),
+            username=user.get("username"),
+            email=user.get("email"),
+            phone_number=user.get("phone_number"),
+            role=user.get("role"),
+            status=user.get("status"),
+            roles=tuple(user.get("roles") or ()),
+        )
+
+    @classmethod
+    def from_claims(cls, claims: dict) -> "Principal":
+        return cls(
+            id=claims["uid"],
+            username=claims.get("name"),
+            email=None,
+            phone_number=claims.get("sub"),
+            role=claims.get("role"),
+            status=None,
+            roles=tuple(claims.get("roles") or ()),
+        )
+
+    def __getitem__(self, key: str) -> Any:
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key, default)
+
+
+# token subject (phone number) -> Principal
+principal_cache = TTLCache(maxsize=PRINCIPAL_CACHE_SIZE, ttl=PRINCIPAL_CACHE_TTL_SECONDS)
+
+
+def invalidate_principal(*subjects: Optional[str]) -> None:
+    """Drop cached principals after the underlying user row changed."""
+    for subject in subjects:
+        if subject is not None:
+            principal_cache.pop(subject)
@@ -0,0 +1,137 @@
+import asyncio
+import threading
+from datetime import datetime, timedelta
+from itertools import chain
+from typing import Dict, Optional, Set
+
+from sqlalchemy import event, inspect, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.core.config import TOKEN_REVOCATION_REFRESH_SECONDS
+from app.modules.auth.models import TokenRevocation, User
+from app.modules.auth.principal import invalidate_principal
+
+# Version given to deleted users: no token can carry it.
+REVOKE_ALL = 2**31 - 1
+
+# Re-read a little before the watermark so rows committed by other workers
+# with a slightly older clock are not skipped.
+_CLOCK_SLACK = timedelta(seconds=5)
+
+# Changing any of these invalidates the user's outstanding access tokens;
+# ``roles`` is what require_roles authorizes on.
+TOKEN_BOUND_FIELDS = ("phone_number", "role", "roles", "status")
+
+_PENDING_KEY = "token_revocations"
+
+
+class TokenRevocations:
+    """In-process mirror of the ``token_revocation`` table.
+
+    ``is_revoked`` is a dict lookup, so authorization never queries the
+    database. Changes made by this worker apply immediately; changes from
+    other workers arrive through ``refresh`` (incremental, by ``updated_at``).
+    """
+
+    def __init__(self):
+        self._min_versions: Dict[int, int] = {}
+        self._watermark: Optional[datetime] = None
+        self._lock = threading.Lock()
+
+    def is_revoked(self, user_id: int, version: int) -> bool:
+        return version < self._min_versions.get(user_id, 0)
+
+    def current_version(self, session, user_id: int) -> int:
+        """Version to stamp on a newly issued token (one PK lookup at login)."""
+        row = session.execute(
+            select(TokenRevocation.min_version).where(TokenRevocation.user_id == user_id)
+        ).scalar()
+        return row or 0
+
+    def bump(self, session, user_id: int, revoke_all: bool = False) -> int:
+        """Invalidate the user's outstanding tokens. Runs in the caller's
+        transaction (a session or connection); call ``apply`` with the result
+        after commit. ORM writes to ``User`` do both by themselves, see
+        ``_revoke_changed_users``."""
+        now = datetime.utcnow()
+        new_version = REVOKE_ALL if revoke_all else 1
+        stmt = insert(TokenRevocation).values(user_id=user_id, min_version=new_version, updated_at=now)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[TokenRevocation.user_id],
+            set_={
+                "min_version": REVOKE_ALL if revoke_all else TokenRevocation.min_version + 1,
+                "updated_at": now,
+            },
+        ).returning(TokenRevocation.min_version)
+        return session.execute(stmt).scalar_one()
+
+    def apply(self, user_id: int, min_version: int) -> None:
+        with self._lock:
+            if min_version > self._min_versions.get(user_id, 0):
+                self._min_versions[user_id] = min_version
+
+    def refresh(self, session) -> int:
+        q = select(TokenRevocation.user_id, TokenRevocation.min_version, TokenRevocation.updated_at)
+        if self._watermark is not None:
+            q = q.where(TokenRevocation.updated_at >= self._watermark - _CLOCK_SLACK)
+        rows = session.execute(q).all()
+        for user_id, min_version, updated_at in rows:
+            self.apply(user_id, min_version)
+            if self._watermark is None or updated_at > self._watermark:
+                self._watermark = updated_at
+        return len(rows)
+
+    async def run_refresh_loop(self, interval: float = TOKEN_REVOCATION_REFRESH_SECONDS) -> None:
+        from app.core.database import run_in_session
+
+        while True:
+            try:
+                await run_in_session(self.refresh)
+            except Exception as e:
+                print(f"⚠ Could not refresh token revocations: {e}")
+            await asyncio.sleep(interval)
+
+
+token_revocations = TokenRevocations()
+
+
+def _changed(state, field: str) -> bool:
+    history = state.attrs[field].history
+    return bool(history.added) and list(history.added) != list(history.deleted)
+
+
+@event.listens_for(Session, "after_flush")
+def _revoke_changed_users(session, flush_context):
+    """Every ORM write path (admin API, sqladmin panel, scripts) bumps the
+    token version of users whose token-bound fields changed or who were
+    deleted, in the same transaction; cached principals go after commit."""
+    pending = session.info.get(_PENDING_KEY)
+    for user in chain(session.dirty, session.deleted):
+        if not isinstance(user, User) or user.id is None:
+            continue
+        state = inspect(user)
+        deleted = user in session.deleted
+        if not deleted and not session.is_modified(user):
+            continue
+        subjects: Set[Optional[str]] = {user.phone_number, *state.attrs.phone_number.history.deleted}
+        if deleted or any(_changed(state, field) for field in TOKEN_BOUND_FIELDS):
+            version = token_revocations.bump(session.connection(), user.id, revoke_all=deleted)
+        else:
+            version = None
+        if pending is None:
+            pending = session.info[_PENDING_KEY] = []
+        pending.append((user.id, version, subjects))
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_revocations(session):
+    for user_id, version, subjects in session.info.pop(_PENDING_KEY, ()):
+        if version is not None:
+            token_revocations.apply(user_id, version)
+        invalidate_principal(*subjects)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_revocations(session):
+    session.info.pop(_PENDING_KEY, None)
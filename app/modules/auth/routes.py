@@ -2,11 +2,16 @@
 from datetime import timedelta
 
 from fastapi import APIRouter, Depends, HTTPException, status
+from starlette.concurrency import run_in_threadpool
 
 # avoid module-level import to prevent circular imports
 from app.modules.auth.schemas import   OTPRequest, OTPSender, UserCreate, UserOut, Token, LoginRequest, loginOut
-from app.modules.auth.services import authenticate_user_by_phone_number, authenticate_user_by_phone_number, create_user
-from app.modules.auth.security import create_access_token, ACCESS_TOKEN_EXPIRE_MINUTES, get_current_user
+from app.modules.auth.services import authenticate_user_by_phone_number, create_user, create_user_async
+from app.core.config import DB_ASYNC
+from app.core.database import get_db, run_db
+from app.modules.auth.security import create_user_access_token, ACCESS_TOKEN_EXPIRE_MINUTES, get_current_user
+from app.modules.auth.revocation import token_revocations
+from app.modules.auth.hashing import HashingBusy
 from app.core.rbac import require_roles
 from fastapi.security import OAuth2PasswordBearer
 
@@ -17,21 +22,24 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
 
 @router.post("/register", response_model=UserOut)
-def register(user: UserCreate):
+async def register(user: UserCreate):
     try:
-        stored = create_user(user)
-        return stored
+        if DB_ASYNC:
+            return await create_user_async(user)
+        return await run_in_threadpool(create_user, user)
+    except HashingBusy:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Too many registrations, retry shortly", headers={"Retry-After": "1"})
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
 
 
 @router.get("/users/{user_id}", )
-def getUserById(user_id: int):
+async def getUserById(user_id: int, db=Depends(get_db)):
     # import inside the function to avoid circular import at module import time
     from app.modules.admin.routes import get_user_by_id
 
-    user = get_user_by_id(user_id)
+    user = await get_user_by_id(user_id, db=db)
     if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="The system does not recognize your account!.Please create new account")
     # access_token = create_access_token(subject=user["username"], expires_delta=timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
@@ -66,7 +74,7 @@ def admin_only(user: dict = Depends(require_roles("admin"))):
 
 
 from fastapi import APIRouter, HTTPException
-from app.modules.auth.services import send_otp, verify_otp, get_user_by_phone_number
+from app.modules.auth.services import send_otp, verify_otp, get_user_by_phone_number, get_user_by_phone_number_async
 
 
 
@@ -78,16 +86,20 @@ def api_send_otp(body: OTPSender):
     return {"ok": True, "message": "OTP sent"}
 
 @router.post("/verify-otp")
-def api_verify_otp(body: OTPRequest):
-    user = get_user_by_phone_number(body.phone_number)
+async def api_verify_otp(body: OTPRequest, db=Depends(get_db)):
+    if DB_ASYNC:
+        user = await get_user_by_phone_number_async(body.phone_number)
+    else:
+        user = await run_in_threadpool(get_user_by_phone_number, body.phone_number)
     if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="The system does not recognize your account!.Please create new account")
-    ok = verify_otp(body.phone_number, body.otp)
+    ok = await run_in_threadpool(verify_otp, body.phone_number, body.otp)
     if not ok:
         raise HTTPException(400, "Invalid or expired OTP")
     
   
-    access_token = create_access_token(subject=user["phone_number"], expires_delta=timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
+    token_version = await run_db(db, token_revocations.current_version, user["id"])
+    access_token = create_user_access_token(user, token_version, expires_delta=timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
    # location = db.query(Loaction).filter(Loaction.user_id == user['id']).first()  or []
 
     re = {"access_token": access_token, "token_type": "bearer", "user":user,
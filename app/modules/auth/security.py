@@ -2,13 +2,16 @@ from datetime import datetime, timedelta
 import os
 from typing import Optional
 
-import bcrypt
 from jose import JWTError
 import jwt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from app.core.config import SECRET_KEY
-from app.modules.auth.services import get_user_by_phone_number
+from starlette.concurrency import run_in_threadpool
+from app.core.config import DB_ASYNC, SECRET_KEY
+from app.modules.auth.hashing import password_hasher
+from app.modules.auth.principal import Principal, principal_cache
+from app.modules.auth.revocation import token_revocations
+from app.modules.auth.services import get_user_by_phone_number, get_user_by_phone_number_async
 
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "60"))
@@ -17,26 +20,35 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
 
 def get_password_hash(password: str) -> str:
-    return bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
+    return password_hasher.hash(password)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    
-    try:
-
-        return bcrypt.checkpw(plain_password.encode(), hashed_password.encode())
-    except Exception:
-        return False
+    return password_hasher.verify(plain_password, hashed_password)
 
 
-def create_access_token(subject: int, expires_delta: Optional[timedelta] = None) -> str:
+def create_access_token(subject: int, expires_delta: Optional[timedelta] = None, claims: Optional[dict] = None) -> str:
     now = datetime.utcnow()
     expire = now + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
-    to_encode = {"sub": subject, "exp": expire}
+    to_encode = dict(claims or {})
+    to_encode.update({"sub": subject, "exp": expire})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
 
+def create_user_access_token(user: dict, token_version: int, expires_delta: Optional[timedelta] = None) -> str:
+    """Token that carries enough claims for require_roles to authorize
+    without loading the user: id, username, roles and the permissions
+    version (``pv``) checked against token revocations."""
+    claims = {
+        "uid": user["id"],
+        "name": user.get("username"),
+        "role": user.get("role"),
+        "roles": list(user.get("roles") or []),
+        "pv": token_version,
+    }
+    return create_access_token(subject=user["phone_number"], expires_delta=expires_delta, claims=claims)
+
 
 def decode_token(token: str) -> dict:
     try:
@@ -48,17 +60,39 @@ def decode_token(token: str) -> dict:
         raise HTTPException(status.HTTP_401_UNAUTHORIZED, "Could not validate credentials")
 
 
-def get_current_user(token: str = Depends(oauth2_scheme)) -> dict:
-    # from app.modules.auth.services import get_user_by_username
-    
+def _verified_claims(token: str) -> dict:
     payload = decode_token(token)
-    phone_number = payload.get("sub")
-    if phone_number is None:
+    if payload.get("sub") is None:
         raise HTTPException(status.HTTP_401_UNAUTHORIZED, "Invalid token payload")
-    user = get_user_by_phone_number(phone_number)
-    if not user:
-        raise HTTPException(status.HTTP_401_UNAUTHORIZED, "User not found")
-    return user
+    if "uid" in payload and token_revocations.is_revoked(payload["uid"], payload.get("pv", 0)):
+        raise HTTPException(status.HTTP_401_UNAUTHORIZED, "Token has been revoked")
+    return payload
+
+
+async def get_current_user(token: str = Depends(oauth2_scheme)) -> Principal:
+    # Cache hits stay on the event loop; only misses touch the database
+    # (natively in DB_ASYNC mode, otherwise through the threadpool).
+    subject = _verified_claims(token)["sub"]
+    principal = principal_cache.get(subject)
+    if principal is None:
+        if DB_ASYNC:
+            user = await get_user_by_phone_number_async(subject)
+        else:
+            user = await run_in_threadpool(get_user_by_phone_number, subject)
+        if not user:
+            raise HTTPException(status.HTTP_401_UNAUTHORIZED, "User not found")
+        principal = Principal.from_user(user)
+        principal_cache.set(subject, principal)
+    return principal
+
+
+async def get_token_principal(token: str = Depends(oauth2_scheme)) -> Principal:
+    """Principal built from verified token claims alone, no user lookup.
+    Tokens issued before claims were added fall back to get_current_user."""
+    claims = _verified_claims(token)
+    if "uid" not in claims or "roles" not in claims:
+        return await get_current_user(token)
+    return Principal.from_claims(claims)
 
 
 
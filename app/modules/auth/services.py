@@ -1,16 +1,18 @@
 # app/modules/auth/services.py
 from typing import Optional, Dict, Any
-from datetime import datetime, timedelta
+from datetime import datetime
 from random import randint
 
-from sqlalchemy import select, true
+from sqlalchemy import or_, select, true
 
 # Import User model at module level (models are safe)
 from app.modules.auth.models import User
+from app.modules.auth.hashing import HashingBusy, password_hasher
+from app.modules.auth.otp_store import otp_store
+from app.modules.auth.sms import sms_dispatcher
 
 # in-memory fallback stores (for development/testing)
 _memory_users: Dict[str, Dict[str, Any]] = {}
-_otp_store: Dict[str, Dict[str, Any]] = {}  # phone -> {"code": str, "expires_at": datetime}
 
 
 # --------------------------
@@ -36,6 +38,61 @@ def _user_to_dict(db_user) -> dict:
     }
 
 
+def _existing_user_clause(user):
+    # Python `or` between two SQL expressions silently keeps only the first one.
+    clauses = [User.email == getattr(user, "email", None)]
+    if getattr(user, "phone_number", None):
+        clauses.append(User.phone_number == user.phone_number)
+    return or_(*clauses)
+
+
+def _new_db_user(user, hashed: str) -> User:
+    return User(
+        email=getattr(user, "email", None),
+        username=getattr(user, "username", None),
+        hashed_password=hashed,
+        first_name=getattr(user, "first_name", None),
+        last_name=getattr(user, "last_name", None),
+        phone_number=getattr(user, "phone_number", None),
+        role="user",
+        status="active",
+        is_email_verified=False,
+        # is_phone_verified=True,
+        roles=getattr(user, "roles", []) or []
+    )
+
+
+def _create_memory_user(user) -> dict:
+    username = getattr(user, "username", None) or getattr(user, "email", None)
+    if not username:
+        raise ValueError("Invalid user payload")
+
+    if username in _memory_users:
+        raise ValueError("User already exists")
+
+    # local import for password hashing (safe)
+    from app.modules.auth.security import get_password_hash
+
+    hashed = get_password_hash(getattr(user, "password", None) or "")
+    u = {
+        "id": len(_memory_users) + 1,
+        "email": getattr(user, "email", None),
+        "username": username,
+        "first_name": getattr(user, "first_name", None),
+        "last_name": getattr(user, "last_name", None),
+        "phone_number": getattr(user, "phone_number", None),
+        "role": "user",
+        "status": "active",
+        "is_email_verified": False,
+        "is_phone_verified": False,
+        "roles": getattr(user, "roles", []) or [],
+        "created_at": datetime.utcnow(),
+        "updated_at": datetime.utcnow(),
+        "last_login": None,
+        "hashed_password": hashed,
+    }
+    _memory_users[username] = u
+    return u
 
 
 def create_user(user) -> dict:
@@ -52,7 +109,7 @@ def create_user(user) -> dict:
         session = SessionLocal()
         try:
          
-            q = select(User).where((User.email == getattr(user, "email", None)) or (User.phone_number == getattr(user, "phone_number", None)))
+            q = select(User).where(_existing_user_clause(user))
             existing = session.execute(q).scalars().first()
             if existing:
                 raise ValueError("User already exists")
@@ -62,19 +119,7 @@ def create_user(user) -> dict:
 
             hashed = get_password_hash(getattr(user, "password", None) or "")
 
-            db_user = User(
-                email=getattr(user, "email", None),
-                username=getattr(user, "username", None),
-                hashed_password=hashed,
-                first_name=getattr(user, "first_name", None),
-                last_name=getattr(user, "last_name", None),
-                phone_number=getattr(user, "phone_number", None),
-                role="user",
-                status="active",
-                is_email_verified=False,
-                # is_phone_verified=True,
-                roles=getattr(user, "roles", []) or []
-            )
+            db_user = _new_db_user(user, hashed)
             session.add(db_user)
             session.commit()
             session.refresh(db_user)
@@ -85,38 +130,11 @@ def create_user(user) -> dict:
             raise db_err
         finally:
             session.close()
+    except HashingBusy:
+        raise
     except Exception as e:
         # fallback to in-memory store for dev/testing
-        username = getattr(user, "username", None) or getattr(user, "email", None)
-        if not username:
-            raise ValueError("Invalid user payload")
-
-        if username in _memory_users:
-            raise ValueError("User already exists")
-
-        # local import for password hashing (safe)
-        from app.modules.auth.security import get_password_hash
-
-        hashed = get_password_hash(getattr(user, "password", None) or "")
-        u = {
-            "id": len(_memory_users) + 1,
-            "email": getattr(user, "email", None),
-            "username": username,
-            "first_name": getattr(user, "first_name", None),
-            "last_name": getattr(user, "last_name", None),
-            "phone_number": getattr(user, "phone_number", None),
-            "role": "user",
-            "status": "active",
-            "is_email_verified": False,
-            "is_phone_verified": False,
-            "roles": getattr(user, "roles", []) or [],
-            "created_at": datetime.utcnow(),
-            "updated_at": datetime.utcnow(),
-            "last_login": None,
-            "hashed_password": hashed,
-        }
-        _memory_users[username] = u
-        return u
+        return _create_memory_user(user)
 
 
 # --------------------------
@@ -183,56 +201,98 @@ def authenticate_user_by_phone_number(phone_number: str) -> Optional[dict]:
 
 
 # --------------------------
-# OTP helpers (in same file)
+# asyncio variants (DB_ASYNC)
 # --------------------------
-def _generate_otp(length: int = 6) -> int:
-    start = 10 ** (length - 1)
-    end = (10 ** length) - 1
-    return randint(start, end)
+async def create_user_async(user) -> dict:
+    try:
+        from app.core.database import AsyncSessionLocal
+        async with AsyncSessionLocal() as session:
+            try:
+                existing = (await session.execute(select(User).where(_existing_user_clause(user)))).scalars().first()
+                if existing:
+                    raise ValueError("User already exists")
+
+                hashed = await password_hasher.hash_async(getattr(user, "password", None) or "")
+                db_user = _new_db_user(user, hashed)
+                session.add(db_user)
+                await session.commit()
+                await session.refresh(db_user)
+                return _user_to_dict(db_user)
+            except Exception:
+                await session.rollback()
+                raise
+    except HashingBusy:
+        raise
+    except Exception:
+        return _create_memory_user(user)
 
 
-def _send_via_twilio(phone: str, message: str):
-    """Send SMS using Twilio. Local import to avoid extra top-level deps."""
+async def get_user_by_username_async(username: str) -> Optional[dict]:
     try:
-        from twilio.rest import Client
-    except Exception as e:
-        raise RuntimeError("twilio package not available") from e
+        from app.core.database import AsyncSessionLocal
+        async with AsyncSessionLocal() as session:
+            db_user = (await session.execute(select(User).where(User.username == username))).scalars().first()
+            if not db_user:
+                return None
+            return _user_to_dict(db_user)
+    except Exception:
+        return _memory_users.get(username)
 
-  
-    if not (account_sid and auth_token and from_number):
-        raise RuntimeError("Twilio credentials not configured")
 
-    client = Client(account_sid, auth_token)
-    client.messages.create(body=message, from_=from_number, to=str(phone))
+async def get_user_by_phone_number_async(phone_number: str) -> Optional[dict]:
+    try:
+        from app.core.database import AsyncSessionLocal
+        async with AsyncSessionLocal() as session:
+            db_user = (await session.execute(select(User).where(User.phone_number == phone_number))).scalars().first()
+            if not db_user:
+                return None
+            return _user_to_dict(db_user)
+    except Exception:
+        for u in _memory_users.values():
+            if u.get("phone_number") == phone_number:
+                return u
+        return None
+
+
+async def authenticate_user_async(username: str, password: str) -> Optional[dict]:
+    user = await get_user_by_username_async(username)
+    if not user:
+        return None
+    if not await password_hasher.verify_async(password, user.get("hashed_password", "")):
+        return None
+    return user
+
+
+async def authenticate_user_by_phone_number_async(phone_number: str) -> Optional[dict]:
+    return await get_user_by_phone_number_async(phone_number)
+
+
+# --------------------------
+# OTP helpers (in same file)
+# --------------------------
+def _generate_otp(length: int = 6) -> int:
+    start = 10 ** (length - 1)
+    end = (10 ** length) - 1
+    return randint(start, end)
 
 
 def send_otp(phone_number: str, expire_minutes: int = 5) -> bool:
+    """Store a fresh code and queue the SMS; delivery happens in the
+    background (see ``app.modules.auth.sms``)."""
     code = _generate_otp()
-    expires_at = datetime.utcnow() + timedelta(minutes=expire_minutes)
     message = f"Your OTP is {code}. Valid for {expire_minutes} minutes."
 
+    otp_store.put(phone_number, str(code), expire_minutes * 60)
     try:
-        _send_via_twilio(phone_number, message)
-        _otp_store[phone_number] = {"code": str(code), "expires_at": expires_at}
-        return True
+        sms_dispatcher.enqueue(phone_number, message)
     except Exception as err:
-        # log and still store OTP for dev/testing
-        print("SMS send failed:", err)
-        _otp_store[phone_number] = {"code": str(code), "expires_at": expires_at}
-        return True
+        # log and keep the stored OTP for dev/testing
+        print("SMS enqueue failed:", err)
+    return True
 
 
 def verify_otp(phone_number: str, otp_code: str) -> bool:
-    entry = _otp_store.get(phone_number)
-    if not entry:
-        return False
-    if datetime.utcnow() > entry["expires_at"]:
-        _otp_store.pop(phone_number, None)
-        return False
-    if str(entry["code"]) == str(otp_code):
-        _otp_store.pop(phone_number, None)
-        return True
-    return False
+    return otp_store.verify(phone_number, str(otp_code))
 
 
 def authenticate_user_by_phone_otp(phone_number: str, otp: str) -> Optional[dict]:
@@ -0,0 +1,240 @@
+import asyncio
+import random
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+from sqlalchemy import delete, insert, select, update
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import (
+    SMS_BATCH_SIZE,
+    SMS_DISPATCH_CONCURRENCY,
+    SMS_MAX_ATTEMPTS,
+    SMS_POLL_SECONDS,
+    SMS_PROVIDER,
+    SMS_RETRY_BASE_SECONDS,
+    SMS_RETRY_MAX_SECONDS,
+    TWILIO_ACCOUNT_SID,
+    TWILIO_AUTH_TOKEN,
+    TWILIO_FROM_NUMBER,
+)
+from app.core.database import engine, run_in_session
+from app.modules.auth.models import SMSOutbox
+
+# A claimed row is invisible to other dispatchers for this long. If the
+# worker dies mid-send the row simply becomes due again afterwards.
+_CLAIM_LEASE = timedelta(seconds=60)
+# Failed rows are kept for inspection, but not their text: it holds OTPs.
+_REDACTED_BODY = "[redacted]"
+
+
+# --------------------------
+# Providers
+# --------------------------
+class SMSProvider(ABC):
+    """Delivers one message. Raise on failure; the dispatcher retries."""
+
+    @abstractmethod
+    def send(self, phone_number: str, body: str) -> None:
+        ...
+
+
+class FakeSMSProvider(SMSProvider):
+    """Local provider (``SMS_PROVIDER=fake``): delivers nothing, keeps the
+    most recent messages in ``sent`` and logs only the recipient, since
+    bodies carry OTPs. ``latency`` and ``failure_rate`` simulate a real
+    gateway."""
+
+    def __init__(self, latency: float = 0.0, failure_rate: float = 0.0, keep: int = 1000):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.sent: deque = deque(maxlen=keep)
+
+    def send(self, phone_number: str, body: str) -> None:
+        if self.latency:
+            time.sleep(self.latency)
+        if self.failure_rate and random.random() < self.failure_rate:
+            raise RuntimeError("simulated provider failure")
+        self.sent.append((phone_number, body))
+        print(f"📱 SMS to {phone_number} (fake provider, not delivered)")
+
+
+class TwilioSMSProvider(SMSProvider):
+    def __init__(self, account_sid=TWILIO_ACCOUNT_SID, auth_token=TWILIO_AUTH_TOKEN, from_number=TWILIO_FROM_NUMBER):
+        self.account_sid = account_sid
+        self.auth_token = auth_token
+        self.from_number = from_number
+        self._client = None
+
+    def _get_client(self):
+        if self._client is None:
+            # local import to avoid extra top-level deps
+            try:
+                from twilio.rest import Client
+            except Exception as e:
+                raise RuntimeError("twilio package not available") from e
+            if not (self.account_sid and self.auth_token and self.from_number):
+                raise RuntimeError("Twilio credentials not configured")
+            self._client = Client(self.account_sid, self.auth_token)
+        return self._client
+
+    def send(self, phone_number: str, body: str) -> None:
+        self._get_client().messages.create(body=body, from_=self.from_number, to=str(phone_number))
+
+
+def build_sms_provider(name: Optional[str] = None) -> SMSProvider:
+    name = name or SMS_PROVIDER
+    if name == "fake":
+        return FakeSMSProvider()
+    if name == "twilio":
+        return TwilioSMSProvider()
+    raise ValueError(f"Unknown SMS_PROVIDER {name!r}")
+
+
+# --------------------------
+# Outbox + dispatcher
+# --------------------------
+def retry_delay(attempts: int) -> float:
+    """Exponential backoff with jitter for a message that failed ``attempts`` times."""
+    delay = min(SMS_RETRY_BASE_SECONDS * 2 ** (attempts - 1), SMS_RETRY_MAX_SECONDS)
+    return delay * random.uniform(0.5, 1.0)
+
+
+class SMSDispatcher:
+    """Delivers ``sms_outbox`` rows in the background.
+
+    Each round claims up to ``batch_size`` due rows (``FOR UPDATE SKIP
+    LOCKED``, so several workers can dispatch side by side), sends them with
+    at most ``concurrency`` provider calls in flight, then deletes the
+    delivered rows and reschedules the failed ones in one transaction.
+    ``enqueue`` wakes the loop so fresh messages do not wait for the poll.
+    """
+
+    def __init__(
+        self,
+        provider: SMSProvider,
+        batch_size: int = SMS_BATCH_SIZE,
+        concurrency: int = SMS_DISPATCH_CONCURRENCY,
+        poll_interval: float = SMS_POLL_SECONDS,
+        max_attempts: int = SMS_MAX_ATTEMPTS,
+    ):
+        self.provider = provider
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+
+    def enqueue(self, phone_number: str, body: str) -> None:
+        with engine.begin() as conn:
+            conn.execute(insert(SMSOutbox).values(phone_number=phone_number, body=body))
+        self.notify()
+
+    def notify(self) -> None:
+        """Wake the dispatch loop; safe to call from any thread."""
+        loop, wakeup = self._loop, self._wakeup
+        if loop is not None and wakeup is not None:
+            loop.call_soon_threadsafe(wakeup.set)
+
+    def _claim(self, session) -> List[Tuple[int, str, str, int]]:
+        now = datetime.utcnow()
+        due = (
+            select(SMSOutbox.id)
+            .where(SMSOutbox.status == "pending", SMSOutbox.next_attempt_at <= now)
+            .order_by(SMSOutbox.next_attempt_at)
+            .limit(self.batch_size)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        )
+        stmt = (
+            update(SMSOutbox)
+            .where(SMSOutbox.id.in_(due))
+            .values(attempts=SMSOutbox.attempts + 1, next_attempt_at=now + _CLAIM_LEASE)
+            .returning(SMSOutbox.id, SMSOutbox.phone_number, SMSOutbox.body, SMSOutbox.attempts)
+            .execution_options(synchronize_session=False)
+        )
+        rows = session.execute(stmt).all()
+        session.commit()
+        return [tuple(r) for r in rows]
+
+    def _record(self, session, sent_ids: List[int], failures: List[Tuple[int, int, str]]) -> None:
+        if sent_ids:
+            session.execute(
+                delete(SMSOutbox).where(SMSOutbox.id.in_(sent_ids)).execution_options(synchronize_session=False)
+            )
+        if failures:
+            now = datetime.utcnow()
+            session.execute(
+                update(SMSOutbox),
+                [
+                    {
+                        "id": msg_id,
+                        "status": "failed" if attempts >= self.max_attempts else "pending",
+                        "next_attempt_at": now + timedelta(seconds=retry_delay(attempts)),
+                        "last_error": error[:512],
+                    }
+                    for msg_id, attempts, error in failures
+                ],
+            )
+            given_up = [msg_id for msg_id, attempts, _ in failures if attempts >= self.max_attempts]
+            if given_up:
+                session.execute(
+                    update(SMSOutbox)
+                    .where(SMSOutbox.id.in_(given_up))
+                    .values(body=_REDACTED_BODY)
+                    .execution_options(synchronize_session=False)
+                )
+        session.commit()
+
+    async def dispatch_once(self) -> int:
+        """One claim/send/record round; returns how many messages it handled."""
+        batch = await run_in_session(self._claim)
+        if not batch:
+            return 0
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        sent_ids: List[int] = []
+        failures: List[Tuple[int, int, str]] = []
+
+        async def deliver(msg_id, phone_number, body, attempts):
+            async with semaphore:
+                try:
+                    await run_in_threadpool(self.provider.send, phone_number, body)
+                    sent_ids.append(msg_id)
+                except Exception as e:
+                    failures.append((msg_id, attempts, str(e) or type(e).__name__))
+
+        await asyncio.gather(*(deliver(*row) for row in batch))
+        await run_in_session(self._record, sent_ids, failures)
+        if failures:
+            print(f"⚠ {len(failures)} of {len(batch)} SMS sends failed")
+        return len(batch)
+
+    async def run(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        healthy = True
+        while True:
+            handled = 0
+            try:
+                handled = await self.dispatch_once()
+                healthy = True
+            except Exception as e:
+                if healthy:
+                    print(f"⚠ SMS dispatch failed: {e}")
+                healthy = False
+            # a full batch means more may be due right now
+            if handled >= self.batch_size:
+                continue
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+
+sms_dispatcher = SMSDispatcher(build_sms_provider())
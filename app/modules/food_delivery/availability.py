@@ -0,0 +1,206 @@
+"""Menu item availability: bulk toggling and an in-process bitset.
+
+``set_availability`` flips any number of items in one statement: an
+``UPDATE ... RETURNING`` that only touches rows whose flag actually changes,
+with the owning restaurants' version bump (``catalog.next_version``) in a
+data-modifying CTE of the same statement.
+
+``AvailabilityIndex`` keeps two bitsets indexed by ``menu_item_id`` (the item
+is known, the item is available), an eighth of a byte per item, so order
+placement can turn away unavailable items before it runs a query. It is a
+``CatalogMirror``, re-reading restaurants' items as they change (every
+``AVAILABILITY_INDEX_REFRESH_SECONDS`` for other workers' changes, all of them
+every ``AVAILABILITY_INDEX_REBUILD_SECONDS``). Cached menu documents of
+restaurants whose availability changed elsewhere are dropped when that is
+noticed, instead of waiting out their TTL.
+
+The database stays authoritative: an item the bitset does not know, or thinks
+is available, is still checked by the order's own read.
+"""
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+from sqlalchemy import Boolean, Integer, any_, bindparam, select, update
+from sqlalchemy.dialects.postgresql import ARRAY
+
+from app.core.config import AVAILABILITY_INDEX_REBUILD_SECONDS, AVAILABILITY_INDEX_REFRESH_SECONDS
+from app.modules.food_delivery.catalog import next_version, notify_catalog_change, on_catalog_change
+from app.modules.food_delivery.catalog_mirror import CatalogMirror
+from app.modules.food_delivery.model import MenuItem, Restaurant
+
+
+def _set_availability_statement():
+    items = MenuItem.__table__
+    restaurants = Restaurant.__table__
+    # bind names must differ from column names in an UPDATE
+    available = bindparam("available", type_=Boolean)
+    only_restaurant = bindparam("only_restaurant_id", type_=Integer)
+    flipped = (
+        update(items)
+        .where(
+            items.c.id == any_(bindparam("menu_item_ids", type_=ARRAY(Integer))),
+            items.c.is_available.is_distinct_from(available),
+            # NULL restaurant_id: any restaurant
+            only_restaurant.is_(None) | (items.c.restaurant_id == only_restaurant),
+        )
+        .values(is_available=available)
+        .returning(items.c.id, items.c.restaurant_id)
+        .cte("flipped")
+    )
+    touched = (
+        update(restaurants)
+        .where(restaurants.c.id.in_(select(flipped.c.restaurant_id)))
+        .values(updated_at=next_version())
+        .cte("touched")
+    )
+    return select(flipped.c.id, flipped.c.restaurant_id).add_cte(touched)
+
+
+_SET_AVAILABILITY = _set_availability_statement()
+
+
+class _Bits:
+    """``known`` and ``available`` bitsets; bit ``id & 7`` of byte ``id >> 3``.
+    Not thread-safe by itself."""
+
+    def __init__(self, known: Optional[np.ndarray] = None, available: Optional[np.ndarray] = None):
+        self.known = np.zeros(1024, dtype=np.uint8) if known is None else known
+        self.available = np.zeros_like(self.known) if available is None else available
+
+    @classmethod
+    def from_rows(cls, ids: np.ndarray, available: np.ndarray) -> "_Bits":
+        size = max(int(ids.max()) + 1 if len(ids) else 0, 8)
+        known_flags = np.zeros(size, dtype=bool)
+        available_flags = np.zeros(size, dtype=bool)
+        known_flags[ids] = True
+        available_flags[ids] = available
+        return cls(np.packbits(known_flags, bitorder="little"), np.packbits(available_flags, bitorder="little"))
+
+    def _grow(self, max_id: int) -> None:
+        needed = (max_id >> 3) + 1
+        if needed <= len(self.known):
+            return
+        capacity = max(needed, 2 * len(self.known))
+        for name in ("known", "available"):
+            grown = np.zeros(capacity, dtype=np.uint8)
+            old = getattr(self, name)
+            grown[: len(old)] = old
+            setattr(self, name, grown)
+
+    def set(self, ids: np.ndarray, available: np.ndarray) -> np.ndarray:
+        """Record ``available[i]`` for ``ids[i]``; returns which of them were
+        known before with the other value."""
+        self._grow(int(ids.max()))
+        byte, mask = ids >> 3, (1 << (ids & 7)).astype(np.uint8)
+        was_known = (self.known[byte] & mask) != 0
+        was_available = (self.available[byte] & mask) != 0
+        # ufunc.at: several ids can share a byte
+        np.bitwise_or.at(self.known, byte, mask)
+        np.bitwise_or.at(self.available, byte[available], mask[available])
+        np.bitwise_and.at(self.available, byte[~available], ~mask[~available])
+        return was_known & (was_available != available)
+
+    def lookup(self, ids: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """``(known, available)`` flags for ``ids``."""
+        inside = (ids >= 0) & (ids < len(self.known) * 8)
+        byte, mask = np.where(inside, ids >> 3, 0), (1 << (ids & 7)).astype(np.uint8)
+        known = inside & ((self.known[byte] & mask) != 0)
+        return known, known & ((self.available[byte] & mask) != 0)
+
+
+class AvailabilityIndex(CatalogMirror):
+    def __init__(self):
+        super().__init__("menu availability index", AVAILABILITY_INDEX_REFRESH_SECONDS, AVAILABILITY_INDEX_REBUILD_SECONDS)
+        self._bits: Optional[_Bits] = None
+
+    @property
+    def stats(self) -> dict:
+        bits = self._bits
+        if bits is None:
+            return {"ready": False}
+        return {
+            "ready": True,
+            "items": int(np.unpackbits(bits.known).sum()),
+            "available": int(np.unpackbits(bits.available).sum()),
+            "bytes": bits.known.nbytes + bits.available.nbytes,
+        }
+
+    @staticmethod
+    def _arrays(rows) -> Tuple[np.ndarray, np.ndarray]:
+        ids = np.fromiter((r[0] for r in rows), dtype=np.int64, count=len(rows))
+        available = np.fromiter((bool(r[-1]) for r in rows), dtype=bool, count=len(rows))
+        return ids, available
+
+    def _load(self, session, watermark: Optional[datetime]) -> int:
+        rows = session.execute(select(MenuItem.id, MenuItem.is_available)).all()
+        bits = _Bits.from_rows(*self._arrays(rows))
+        with self._lock:
+            self._bits = bits
+            self._installed(watermark)
+        return len(rows)
+
+    def apply(self, rows: Iterable[Tuple[int, int, bool]]) -> Set[int]:
+        """Record ``(menu_item_id, restaurant_id, is_available)`` rows; returns
+        the restaurants where an item known before changed availability."""
+        rows = list(rows)
+        if not rows:
+            return set()
+        ids, available = self._arrays(rows)
+        with self._lock:
+            if self._bits is None:
+                return set()
+            changed = self._bits.set(ids, available)
+        return {rows[i][1] for i in np.flatnonzero(changed)}
+
+    def _reread(self, session, restaurant_ids: List[int]) -> None:
+        changed = self.apply(session.execute(
+            select(MenuItem.id, MenuItem.restaurant_id, MenuItem.is_available)
+            .where(MenuItem.restaurant_id.in_(restaurant_ids))
+        ).all())
+        if changed:
+            from app.modules.food_delivery.menu import menu_cache
+
+            menu_cache.invalidate(changed)
+
+    def unavailable(self, session, menu_item_ids: Iterable[int]) -> List[int]:
+        """The ids this worker knows to be unavailable; unknown ids are left
+        for the database to judge."""
+        ids = np.fromiter(menu_item_ids, dtype=np.int64)
+        if not self._ready or not len(ids):
+            return []
+        self.sync(session)
+        with self._lock:
+            known, available = self._bits.lookup(ids)
+        return sorted(ids[known & ~available].tolist())
+
+
+availability_index = AvailabilityIndex()
+on_catalog_change(availability_index.mark_stale)
+
+
+def set_availability(session, menu_item_ids: List[int], is_available: bool, restaurant_id: Optional[int] = None) -> dict:
+    """Set ``is_available`` on many items at once and commit. Items already
+    in that state, of another restaurant than ``restaurant_id`` or not found
+    are reported back unchanged."""
+    requested = list(dict.fromkeys(menu_item_ids))
+    rows = session.connection().execute(_SET_AVAILABILITY, {
+        "menu_item_ids": requested,
+        "available": is_available,
+        "only_restaurant_id": restaurant_id,
+    }).all()
+    session.commit()
+
+    by_restaurant: Dict[int, List[int]] = {}
+    for item_id, rid in rows:
+        by_restaurant.setdefault(rid, []).append(item_id)
+    availability_index.apply((item_id, rid, is_available) for item_id, rid in rows)
+    # Core writes bypass the session hooks
+    notify_catalog_change(by_restaurant)
+    updated = {item_id for item_id, _ in rows}
+    return {
+        "is_available": is_available,
+        "updated": sorted(updated),
+        "unchanged": [item_id for item_id in requested if item_id not in updated],
+        "restaurants": sorted(by_restaurant),
+    }
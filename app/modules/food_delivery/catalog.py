@@ -0,0 +1,112 @@
+"""Change notifications for restaurant catalog data.
+
+Anything derived from restaurants, locations, categories or menu items (the
+cached menu documents, search and spatial indexes, ...) subscribes with
+``on_catalog_change`` and is told which restaurant ids changed once the
+writing transaction has committed.
+
+ORM writes are picked up automatically from every Session, including the
+sqladmin panel's. Code that writes with Core statements (bulk inserts) calls
+``notify_catalog_change`` itself after committing.
+
+Every change also bumps ``restaurant.updated_at`` in the writing transaction
+(``touch_restaurants``), so that column versions everything derived from the
+restaurant's catalog rows, not just the restaurant row: it is what the menu
+document's ETag and Last-Modified are built from. Core writers call
+``touch_restaurants`` before committing.
+"""
+from datetime import datetime
+from itertools import chain
+from typing import Callable, Iterable, List, Set
+
+from sqlalchemy import event, func, inspect, literal_column, select, update
+from sqlalchemy.orm import Session
+
+from app.modules.food_delivery.model import (
+    MenuCategory,
+    MenuItem,
+    Restaurant,
+    RestaurantLocation,
+    restaurant_category,
+)
+
+_subscribers: List[Callable[[Set[int]], None]] = []
+
+_PENDING_KEY = "catalog_changed_restaurants"
+
+
+def on_catalog_change(fn: Callable[[Set[int]], None]) -> Callable[[Set[int]], None]:
+    """Register ``fn(restaurant_ids)``; usable as a decorator."""
+    _subscribers.append(fn)
+    return fn
+
+
+def notify_catalog_change(restaurant_ids: Iterable[int]) -> None:
+    ids = {rid for rid in restaurant_ids if rid is not None}
+    if not ids:
+        return
+    for fn in _subscribers:
+        try:
+            fn(ids)
+        except Exception as e:
+            print(f"⚠ Catalog change subscriber {getattr(fn, '__name__', fn)} failed: {e}")
+
+
+def next_version():
+    """Postgres expression for a restaurant's bumped ``updated_at``: strictly
+    increasing per restaurant, even across skewed clocks, so every change
+    yields a new version."""
+    return func.greatest(
+        func.timezone("utc", func.clock_timestamp()),
+        Restaurant.__table__.c.updated_at + literal_column("interval '1 microsecond'"),
+    )
+
+
+def touch_restaurants(conn, restaurant_ids: Iterable[int]) -> None:
+    """Bump ``updated_at`` of the given restaurants on ``conn``; the caller
+    commits."""
+    ids = sorted({rid for rid in restaurant_ids if rid is not None})
+    if not ids:
+        return
+    table = Restaurant.__table__
+    now = next_version() if conn.dialect.name == "postgresql" else datetime.utcnow()
+    conn.execute(update(table).where(table.c.id.in_(ids)).values(updated_at=now))
+
+
+def _restaurant_ids_of(session: Session, obj) -> Set[int]:
+    if isinstance(obj, Restaurant):
+        return {obj.id}
+    if isinstance(obj, (RestaurantLocation, MenuItem)):
+        # moved to another restaurant: the one it left changed too
+        return {obj.restaurant_id, *inspect(obj).attrs.restaurant_id.history.deleted}
+    if isinstance(obj, MenuCategory) and obj.id is not None:
+        # a category is shared; every restaurant it is attached to changes
+        rows = session.connection().execute(
+            select(restaurant_category.c.restaurant_id).where(restaurant_category.c.category_id == obj.id)
+        )
+        return {rid for (rid,) in rows}
+    return set()
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_changes(session, flush_context):
+    changed: Set[int] = set()
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, (Restaurant, RestaurantLocation, MenuItem, MenuCategory)):
+            changed |= _restaurant_ids_of(session, obj)
+    changed.discard(None)
+    if changed:
+        touch_restaurants(session.connection(), changed)
+        session.info.setdefault(_PENDING_KEY, set()).update(changed)
+
+
+@event.listens_for(Session, "after_commit")
+def _dispatch_changes(session):
+    pending = session.info.pop(_PENDING_KEY, None)
+    if pending:
+        notify_catalog_change(pending)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changes(session):
+    session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,124 @@
+"""In-process copies of catalog data and how they are kept current.
+
+The location index (``geo``), catalog search (``search``), the availability
+bitset (``availability``), the price table (``pricing``) and the prep-time
+statistics (``eta``) answer from memory what would otherwise take a query per
+request. ``CatalogMirror`` is the bookkeeping they share:
+
+  * this worker's commits mark the touched restaurants stale (catalog change
+    feed, see ``catalog``); ``sync`` re-reads them right before the next use;
+  * ``refresh`` (every ``refresh_seconds``, see ``run_refresh_loop``)
+    re-reads the restaurants whose ``updated_at`` moved, which every catalog
+    change does, so other workers' changes show up within seconds;
+  * a full rebuild every ``rebuild_seconds``, which is also when restaurants
+    deleted by other workers drop out.
+
+A version is stamped before its transaction commits, so a poll can see a
+later stamp before an earlier one commits; restaurants stamped less than
+``REFRESH_OVERLAP`` ago are re-read by every poll.
+
+A mirror implements ``_load`` (read everything and swap it in, calling
+``_installed``) and ``_reread`` (replace what it holds for some restaurants).
+"""
+import asyncio
+import threading
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+from typing import List, Optional, Set
+
+from sqlalchemy import func, select
+from starlette.concurrency import run_in_threadpool
+
+from app.modules.food_delivery.model import Restaurant
+
+REFRESH_OVERLAP = timedelta(seconds=10)
+
+_LATEST_VERSION = select(func.max(Restaurant.updated_at))
+
+
+class CatalogMirror(ABC):
+    def __init__(self, description: str, refresh_seconds: float, rebuild_seconds: float):
+        self.description = description
+        self.refresh_seconds = refresh_seconds
+        self.rebuild_seconds = rebuild_seconds
+        # guards the bookkeeping below; mirrors may use it for their data too
+        self._lock = threading.Lock()
+        self._stale: Set[int] = set()
+        self._ready = False
+        self._built_at = 0.0
+        self._watermark: Optional[datetime] = None
+
+    @property
+    def ready(self) -> bool:
+        return self._ready
+
+    def mark_stale(self, restaurant_ids: Set[int]) -> None:
+        with self._lock:
+            self._stale |= restaurant_ids
+
+    @abstractmethod
+    def _load(self, session, watermark: Optional[datetime]):
+        """Read everything, swap it in and call ``_installed(watermark)``."""
+
+    @abstractmethod
+    def _reread(self, session, restaurant_ids: List[int]) -> None:
+        """Replace whatever is held for ``restaurant_ids`` with the database's
+        current rows, including none for restaurants since deleted."""
+
+    def _installed(self, watermark: Optional[datetime]) -> None:
+        """Record that a full copy as of ``watermark`` is in place; call with
+        ``self._lock`` held."""
+        self._ready = True
+        self._watermark = watermark
+        self._built_at = time.monotonic()
+
+    def rebuild(self, session):
+        with self._lock:
+            self._stale.clear()
+        # taken first: changes stamped while everything is read get re-read
+        watermark = session.execute(_LATEST_VERSION).scalar()
+        return self._load(session, watermark)
+
+    def sync(self, session) -> None:
+        """Build on first use and re-read restaurants this worker changed."""
+        if not self._ready:
+            self.rebuild(session)
+            return
+        with self._lock:
+            stale, self._stale = self._stale, set()
+        if stale:
+            self._reread(session, sorted(stale))
+
+    def refresh(self, session) -> int:
+        """Periodic catch-up with other workers, or a full rebuild once
+        ``rebuild_seconds`` have passed; returns how many restaurants were
+        re-read."""
+        if not self._ready or time.monotonic() - self._built_at >= self.rebuild_seconds:
+            self.rebuild(session)
+            return 0
+        self.sync(session)
+        since = self._watermark or datetime.min
+        watermark = session.execute(_LATEST_VERSION).scalar()
+        window_start = func.least(since, func.timezone("utc", func.now()) - REFRESH_OVERLAP)
+        changed = session.execute(select(Restaurant.id).where(Restaurant.updated_at > window_start)).scalars().all()
+        if changed:
+            self._reread(session, list(changed))
+        self._watermark = watermark
+        return len(changed)
+
+    def _refresh_in_new_session(self) -> int:
+        from app.core.database import SessionLocal
+
+        with SessionLocal() as session:
+            return self.refresh(session)
+
+    async def run_refresh_loop(self, interval: Optional[float] = None) -> None:
+        while True:
+            try:
+                # a rebuild is seconds of Python: off the event loop, also in
+                # DB_ASYNC mode, where run_in_session would run it on the loop
+                await run_in_threadpool(self._refresh_in_new_session)
+            except Exception as e:
+                print(f"⚠ Could not refresh the {self.description}: {e}")
+            await asyncio.sleep(self.refresh_seconds if interval is None else interval)
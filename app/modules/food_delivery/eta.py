@@ -0,0 +1,153 @@
+"""Delivery ETAs for a batch of restaurants, in one NumPy pass.
+
+The ETA of a restaurant for a delivery point is
+
+    prep time + ETA_HANDOFF_MINUTES + road distance / ETA_RIDER_SPEED_KMH
+
+with the road distance taken as ``ETA_ROAD_FACTOR`` times the great-circle
+distance from the restaurant's nearest branch. Branch coordinates come from the
+location index (``geo``); every branch of every candidate goes through one
+haversine call and the nearest per restaurant is picked with a sort, so a
+request costs the same handful of array operations for 5 restaurants or 500.
+
+Prep time is the median ``cooking_time_minutes`` of the restaurant's menu
+(``eta_max_minutes`` uses the 90th percentile), or ``ETA_DEFAULT_PREP_MINUTES``
+when none is set. ``PrepTimes`` caches both per restaurant, aggregated by the
+database; it is a ``CatalogMirror`` (other workers' changes every
+``ETA_PREP_REFRESH_SECONDS``, everything every ``ETA_PREP_REBUILD_SECONDS``).
+"""
+from datetime import datetime
+from typing import Iterable, List, Optional
+
+import numpy as np
+from sqlalchemy import func, select
+
+from app.core.config import (
+    ETA_DEFAULT_PREP_MINUTES,
+    ETA_HANDOFF_MINUTES,
+    ETA_PREP_REBUILD_SECONDS,
+    ETA_PREP_REFRESH_SECONDS,
+    ETA_RIDER_SPEED_KMH,
+    ETA_ROAD_FACTOR,
+)
+from app.modules.food_delivery.catalog import on_catalog_change
+from app.modules.food_delivery.catalog_mirror import CatalogMirror
+from app.modules.food_delivery.geo import haversine_km, location_index
+from app.modules.food_delivery.model import MenuItem
+
+_PREP_STATS = (
+    select(
+        MenuItem.restaurant_id,
+        func.percentile_cont(0.5).within_group(MenuItem.cooking_time_minutes),
+        func.percentile_cont(0.9).within_group(MenuItem.cooking_time_minutes),
+    )
+    .where(MenuItem.cooking_time_minutes.is_not(None))
+    .group_by(MenuItem.restaurant_id)
+)
+
+
+class PrepTimes(CatalogMirror):
+    """Median and 90th-percentile prep minutes per restaurant, in arrays
+    indexed by restaurant id (NaN: no cooking times known)."""
+
+    def __init__(self):
+        super().__init__("restaurant prep-time cache", ETA_PREP_REFRESH_SECONDS, ETA_PREP_REBUILD_SECONDS)
+        self._median: Optional[np.ndarray] = None
+        self._p90: Optional[np.ndarray] = None
+
+    @property
+    def stats(self) -> dict:
+        if self._median is None:
+            return {"ready": False}
+        return {"ready": True, "restaurants": int(np.count_nonzero(~np.isnan(self._median)))}
+
+    def load(self, rows, watermark: Optional[datetime] = None) -> int:
+        """Replace everything with ``(restaurant_id, median, p90)`` rows."""
+        rows = list(rows)
+        size = max((r[0] for r in rows), default=0) + 1
+        median, p90 = np.full(size, np.nan), np.full(size, np.nan)
+        for rid, mid, high in rows:
+            median[rid], p90[rid] = mid, high
+        with self._lock:
+            self._median, self._p90 = median, p90
+            self._installed(watermark)
+        return len(rows)
+
+    def _load(self, session, watermark: Optional[datetime]) -> int:
+        return self.load(session.execute(_PREP_STATS).all(), watermark)
+
+    def _reread(self, session, restaurant_ids: List[int]) -> None:
+        rows = session.execute(_PREP_STATS.where(MenuItem.restaurant_id.in_(restaurant_ids))).all()
+        with self._lock:
+            if self._median is None:
+                return
+            needed = max(restaurant_ids) + 1
+            if needed > len(self._median):
+                capacity = max(needed, 2 * len(self._median))
+                for name in ("_median", "_p90"):
+                    grown = np.full(capacity, np.nan)
+                    old = getattr(self, name)
+                    grown[: len(old)] = old
+                    setattr(self, name, grown)
+            # restaurants without cooking times any more have no row
+            self._median[restaurant_ids] = np.nan
+            self._p90[restaurant_ids] = np.nan
+            for rid, mid, high in rows:
+                self._median[rid], self._p90[rid] = mid, high
+
+    def lookup(self, restaurant_ids: np.ndarray):
+        """``(median, p90)`` minutes for ``restaurant_ids``, defaults filled in."""
+        with self._lock:
+            median, p90 = self._median, self._p90
+            if median is None:
+                default = np.full(len(restaurant_ids), float(ETA_DEFAULT_PREP_MINUTES))
+                return default, default
+            inside = restaurant_ids < len(median)
+            at = np.where(inside, restaurant_ids, 0)
+            mid = np.where(inside, median[at], np.nan)
+            high = np.where(inside, p90[at], np.nan)
+        mid = np.where(np.isnan(mid), ETA_DEFAULT_PREP_MINUTES, mid)
+        return mid, np.where(np.isnan(high), mid, high)
+
+
+prep_times = PrepTimes()
+on_catalog_change(prep_times.mark_stale)
+
+
+def travel_minutes(distance_km: np.ndarray) -> np.ndarray:
+    return distance_km * ETA_ROAD_FACTOR / ETA_RIDER_SPEED_KMH * 60.0
+
+
+def estimate(latitude: float, longitude: float, restaurant_ids: Iterable[int]) -> List[dict]:
+    """ETAs from each restaurant's nearest branch to the given point, in the
+    order of ``restaurant_ids``; restaurants without a known location are
+    left out."""
+    wanted = list(dict.fromkeys(restaurant_ids))
+    owners, location_ids, lats, lons = location_index.branches(wanted)
+    if not len(owners):
+        return []
+    distances = haversine_km(latitude, longitude, lats, lons)
+    # nearest branch of each restaurant: sort by (restaurant, distance), keep the first
+    order = np.lexsort((distances, owners))
+    owners, location_ids, distances = owners[order], location_ids[order], distances[order]
+    first = np.flatnonzero(np.r_[True, owners[1:] != owners[:-1]])
+    owners, location_ids, distances = owners[first], location_ids[first], distances[first]
+
+    median, p90 = prep_times.lookup(owners)
+    travel = travel_minutes(distances) + ETA_HANDOFF_MINUTES
+    eta, eta_max = np.ceil(median + travel), np.ceil(p90 + travel)
+    by_restaurant = {
+        rid: {
+            "restaurant_id": rid,
+            "location_id": location_id,
+            "distance_km": distance,
+            "prep_minutes": prep,
+            "eta_minutes": low,
+            "eta_max_minutes": high,
+        }
+        for rid, location_id, distance, prep, low, high in zip(
+            owners.tolist(), location_ids.tolist(), np.round(distances, 3).tolist(), np.round(median, 1).tolist(),
+            eta.astype(np.int64).tolist(), eta_max.astype(np.int64).tolist(),
+        )
+    }
+    return [by_restaurant[rid] for rid in wanted if rid in by_restaurant]
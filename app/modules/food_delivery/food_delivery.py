@@ -1,107 +1,79 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import asyncio
+from typing import Any, List, Optional
+
+from fastapi import APIRouter, Body, Depends, File, HTTPException, Query, Request, Response, UploadFile, WebSocket, WebSocketDisconnect, status
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from pydantic_core import to_json
 from requests import Session
-from sqlalchemy import insert
-from app.modules.auth.security import get_current_user
+from sqlalchemy import select
+from app.core.rbac import require_roles
+from app.modules.auth.security import get_current_user, get_token_principal
 
-from app.core.database import SessionLocal
-from app.modules.food_delivery.model import  Restaurant, RestaurantLocation
-from app.modules.food_delivery.schemas import CreateRestaurant, FoodOrderCreate, format_address 
+from app.core.database import get_db, run_db, run_in_session
+from app.core.responses import FastJSONResponse
+from app.modules.food_delivery.model import  Restaurant
+from app.modules.food_delivery.schemas import CreateRestaurant, FoodOrderCreate
 
 from app.modules.food_delivery import model as m
 from app.modules.food_delivery import schemas as s
+from app.modules.food_delivery.availability import set_availability
+from app.modules.food_delivery.eta import estimate, prep_times
+from app.modules.food_delivery.geo import location_index
+from app.modules.food_delivery.menu import menu_cache, menu_etag, menu_version
+from app.modules.food_delivery.menu_import import DEFAULT_CHUNK_SIZE, import_menu
+from app.modules.food_delivery.onboarding import (
+    CONFLICT_FIELDS,
+    DEFAULT_BATCH_CHUNK_SIZE,
+    MAX_BATCH_SIZE,
+    create_one,
+    onboard_restaurants,
+)
+from app.modules.food_delivery.order_events import HEARTBEAT, order_events
+from app.modules.food_delivery.orders import place_order
+from app.modules.food_delivery.pricing import price_table
+from app.modules.food_delivery.search import catalog_search
 from app.modules.order_address_list.models import Address
+from app.shared.bulk import FORMATS, detect_format, text_stream
+from app.shared.http_cache import conditional_response, is_conditional, not_modified, not_modified_response
+from app.shared.pagination import decode_cursor, keyset_page, page_response, stream_json_array
 router = APIRouter(prefix="/food_delivery", tags=["food_delivery"])
 
 
-@router.post("/restaurants")
-def create_restaurant(payload: CreateRestaurant,
-                       #user: dict = Depends(get_current_user)
-                       ):
-
-    session = SessionLocal()
+def _create_restaurant(session, payload: CreateRestaurant) -> dict:
     try:
-     
-        phone = str(payload.phone_number) if getattr(payload, "phone_number", None) is not None else None
-
-     
-        # try:
-        #     lat = float(payload.latitude)
-        #     lon = float(payload.longitude)
-        # except Exception:
-        #     raise HTTPException(status_code=400, detail="latitude and longitude must be numeric")
-
-     
-        db_rest = Restaurant(
-            name=payload.name,
-            
-            cuisine_type=getattr(payload, "cuisine_type", None),
-            phone_number=phone,
-            email=getattr(payload, "email", None),
-            logo_url=getattr(payload, "logo_url", None),
-            banner_url=getattr(payload, "banner_url", None),
-            status=payload.status or "open",
-            is_favorite=bool(getattr(payload, "is_favorite", False)),
-        )
-
-
-        session.add(db_rest)
-       
-        session.flush()
-        # many-to-many: associate categories
-        from app.modules.food_delivery.model import restaurant_category
-        rest_categories = (
-            insert(restaurant_category).values([
-                {"restaurant_id": db_rest.id, "category_id": cat_id}
-                for cat_id in (payload.categories_id or [])
-            ])
-        )
-        session.execute(rest_categories)
-
-       
-        loc = RestaurantLocation(
-            restaurant_id=db_rest.id,
-            latitude=payload.location.latitude,
-            longitude=payload.location.longitude,
-            address=payload.location.address,
-            city=payload.location.city,
-            state=payload.location.state,
-            country=payload.location.country,
-            postal_code=payload.location.postal_code,
-            location_id=payload.location.location_id,
-            dining_type=payload.location.dining_type
-        )
-        session.add(loc)
+        created, error = create_one(session, payload)
+    except Exception as exc:
+        session.rollback()
+        raise HTTPException(status_code=500, detail=f"Failed to create restaurant: {exc}")
+    if error is not None:
+        raise HTTPException(status_code=409 if error.get("field") in CONFLICT_FIELDS else 400, detail=error["error"])
+    return {"id": created["id"], "name": created["name"]}
 
-        # commit both records together
-        session.commit()
 
-        # refresh to get DB-populated fields
-        session.refresh(db_rest)
+@router.post("/restaurants")
+async def create_restaurant(payload: CreateRestaurant,
+                       #user: dict = Depends(get_current_user)
+                       db=Depends(get_db),
+                       ):
+    return await run_db(db, _create_restaurant, payload)
 
-        return {"id": db_rest.id, "name": db_rest.name}
 
-    except HTTPException:
-      
-        try:
-            session.rollback()
-        except Exception:
-            pass
-        raise
-    except Exception as exc:
-       
-        try:
-            session.rollback()
-        except Exception:
-            pass
-        raise HTTPException(status_code=500, detail=f"Failed to create restaurant: {exc}")
-    finally:
-        session.close()
+@router.post("/restaurants/batch")
+async def create_restaurants_batch(
+    payload: List[Any] = Body(..., max_length=MAX_BATCH_SIZE, description="CreateRestaurant objects"),
+    chunk_size: int = Query(DEFAULT_BATCH_CHUNK_SIZE, ge=1, le=MAX_BATCH_SIZE),
+    admin: dict = Depends(require_roles("admin")),
+):
+    """Onboard many restaurants at once (admin only), one transaction per
+    chunk. Entries that fail validation or clash on name/email (with existing
+    restaurants or earlier entries) are reported by index; the rest are
+    created."""
+    return await run_in_threadpool(onboard_restaurants, payload, chunk_size=chunk_size)
 
 
 
-@router.post("/menu/category")
-def create_menu_category(payload: s.MenuCategoryCreate):
-    session: Session = SessionLocal()
+def _create_menu_category(session: Session, payload: s.MenuCategoryCreate) -> dict:
     try:
        
         # restaurant = session.query(m.Restaurant).filter(m.Restaurant.id == payload.restaurant_id).first()
@@ -128,13 +100,14 @@ def create_menu_category(payload: s.MenuCategoryCreate):
     except Exception as exc:
         session.rollback()
         raise HTTPException(status_code=500, detail=str(exc))
-    finally:
-        session.close()
 
-@router.post("/menu/item")
-def create_menu_item(payload: s.MenuItemCreate):
-    session = SessionLocal()
-    
+
+@router.post("/menu/category")
+async def create_menu_category(payload: s.MenuCategoryCreate, db=Depends(get_db)):
+    return await run_db(db, _create_menu_category, payload)
+
+
+def _create_menu_item(session, payload: s.MenuItemCreate) -> dict:
     try:
         restaurant = session.query(m.Restaurant).filter(m.Restaurant.id == payload.restaurant_id).first()
         if not restaurant:
@@ -162,181 +135,564 @@ def create_menu_item(payload: s.MenuItemCreate):
     except Exception as exc:
         session.rollback()
         raise HTTPException(status_code=500, detail=str(exc))
-    finally:
-        session.close()
 
-@router.get("/restaurants_data/{restaurant_id}")
-def get_restaurant(restaurant_id: int):
-    session = SessionLocal()
-    try:
-        restaurant = session.query(m.Restaurant).filter(m.Restaurant.id == restaurant_id).first()
-        if not restaurant:
-            raise HTTPException(status_code=404, detail="Restaurant not found")
 
-        res = {
-            "id": restaurant.id,
-            "name": restaurant.name,
-            "cuisine_type": restaurant.cuisine_type,
-            "phone_number": restaurant.phone_number,
-            "email": restaurant.email,
-            "logo_url": restaurant.logo_url,
-            "banner_url": restaurant.banner_url,
-            "status": restaurant.status,
-            "is_favorite": restaurant.is_favorite,
-            "created_at": restaurant.created_at,
-            "locations": [],
-            "categories": [],
-        }
-        for loc in restaurant.locations:
-             res["locations"].append({
-                "id": loc.id,
-                "latitude": loc.latitude,
-                "longitude": loc.longitude,
-                "address": loc.address,
-                "city": loc.city,
-                "state": loc.state,
-                "country": loc.country,
-                "postal_code": loc.postal_code,
-                "location_id": loc.location_id,
-                "dining_type": loc.dining_type,
-                "created_at": loc.created_at
-            })
-        for cat in restaurant.categories:
-            cat_data = {
-                "id": cat.id,
-                "name": cat.name,
-                "description": cat.description,
-                "created_at": cat.created_at,
-                "items": []
-            }
-            for item in cat.items:
-                cat_data["items"].append({
-                    "id": item.id,
-                    "name": item.name,
-                    "description": item.description,
-                    "price": item.price,
-                    "is_available": item.is_available,
-                    "image_url": item.image_url,
-                    "is_vegetarian": item.is_vegetarian,
-                    "cooking_time_minutes": item.cooking_time_minutes,
-                    "created_at": item.created_at
-                })  
-            res["categories"].append(cat_data)
-
-        return res
+@router.post("/menu/item")
+async def create_menu_item(payload: s.MenuItemCreate, db=Depends(get_db)):
+    return await run_db(db, _create_menu_item, payload)
 
-    except HTTPException:
-        raise
+
+def _set_availability(session, payload: s.MenuItemAvailabilityUpdate) -> dict:
+    try:
+        return set_availability(session, payload.menu_item_ids, payload.is_available, payload.restaurant_id)
     except Exception as exc:
+        session.rollback()
         raise HTTPException(status_code=500, detail=str(exc))
-    finally:
-        session.close()
 
-@router.get("/all_restaurants")
-def get_all_restaurants():
-    session = SessionLocal()
+
+@router.patch("/menu/items/availability")
+async def update_menu_item_availability(
+    payload: s.MenuItemAvailabilityUpdate,
+    user: dict = Depends(require_roles("admin", "restaurant_owner")),
+    db=Depends(get_db),
+):
+    """Mark many menu items available or unavailable in one statement.
+    ``unchanged`` lists the ids that were already in that state, belong to
+    another restaurant than ``restaurant_id`` or do not exist. Only admins
+    may leave ``restaurant_id`` out."""
+    if payload.restaurant_id is None and "admin" not in user.get("roles", ()):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="restaurant_id is required")
+    return await run_db(db, _set_availability, payload)
+
+
+@router.post("/menu/import")
+async def import_menu_items(
+    file: UploadFile = File(...),
+    format: Optional[str] = Query(None, description="csv or ndjson; detected from the file name if omitted"),
+    restaurant_id: Optional[int] = Query(None, description="restaurant for rows that do not name one"),
+    dry_run: bool = False,
+    chunk_size: int = Query(DEFAULT_CHUNK_SIZE, ge=1, le=10000),
+    admin: dict = Depends(require_roles("admin")),
+):
+    """Bulk-create menu items from a CSV or NDJSON upload of ``MenuItemCreate``
+    rows (admin only). Bad rows are reported with their row number and
+    skipped; the rest of the file is still imported."""
+    try:
+        fmt = format or detect_format(file.filename, file.content_type)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    if fmt not in FORMATS:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"format must be one of {FORMATS}")
     try:
-        restaurants = session.query(m.Restaurant).all()
-        res_list = []
-        for restaurant in restaurants:
-            res_list.append({
-                "id": restaurant.id,
-                "name": restaurant.name,
-                "cuisine_type": restaurant.cuisine_type,
-                "phone_number": restaurant.phone_number,
-                "email": restaurant.email,
-                "logo_url": restaurant.logo_url,
-                "banner_url": restaurant.banner_url,
-                "status": restaurant.status,
-                "is_favorite": restaurant.is_favorite,
-                "created_at": restaurant.created_at
-            })
-        return res_list
+        return await run_in_threadpool(
+            import_menu, text_stream(file.file), fmt,
+            restaurant_id=restaurant_id, chunk_size=chunk_size, dry_run=dry_run,
+        )
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="File must be UTF-8 encoded")
 
+
+def _get_restaurant(session, restaurant_id: int, headers) -> Response:
+    try:
+        version = None
+        if is_conditional(headers):
+            # answered from the version alone, without building the document
+            version = menu_version(session, restaurant_id)
+            etag = menu_etag(restaurant_id, version)
+            if not_modified(headers, etag, version):
+                return not_modified_response(etag, version)
+        body, version = menu_cache.get(session, restaurant_id, version)
+        return conditional_response(headers, body, menu_etag(restaurant_id, version), version)
+    except HTTPException:
+        raise
     except Exception as exc:
         raise HTTPException(status_code=500, detail=str(exc))
-    finally:
-        session.close()    
 
 
-router.get("/all_items")  
-def get_all_menu_items():
-    session = SessionLocal()
-    try:
-        items = session.query(m.MenuItem).all()
-        item_list = []
-        for item in items:
-            item_list.append({
-                "id": item.id,
-                "name": item.name,
-                "description": item.description,
-                "price": item.price,
-                "is_available": item.is_available,
-                "image_url": item.image_url,
-                "is_vegetarian": item.is_vegetarian,
-                "cooking_time_minutes": item.cooking_time_minutes,
-                "created_at": item.created_at
-            })
-        return item_list
+@router.get("/restaurants_data/{restaurant_id}")
+async def get_restaurant(restaurant_id: int, request: Request, db=Depends(get_db)):
+    """The restaurant's menu document, with a strong ETag and Last-Modified;
+    revalidate with ``If-None-Match`` for a 304."""
+    return await run_db(db, _get_restaurant, restaurant_id, request.headers)
+
+
+_RESTAURANT_LIST_COLUMNS = (
+    m.Restaurant.id,
+    m.Restaurant.name,
+    m.Restaurant.cuisine_type,
+    m.Restaurant.phone_number,
+    m.Restaurant.email,
+    m.Restaurant.logo_url,
+    m.Restaurant.banner_url,
+    m.Restaurant.status,
+    m.Restaurant.is_favorite,
+    m.Restaurant.created_at,
+)
+
+_MENU_ITEM_LIST_COLUMNS = (
+    m.MenuItem.id,
+    m.MenuItem.restaurant_id,
+    m.MenuItem.category_id,
+    m.MenuItem.name,
+    m.MenuItem.description,
+    m.MenuItem.price,
+    m.MenuItem.is_available,
+    m.MenuItem.image_url,
+    m.MenuItem.is_vegetarian,
+    m.MenuItem.cooking_time_minutes,
+    m.MenuItem.created_at,
+)
+
+# rows per query while streaming a full export
+EXPORT_PAGE_SIZE = 1000
+
+
+def _restaurants_page(session, limit: int, after, status_filter, cuisine_type):
+    stmt = select(*_RESTAURANT_LIST_COLUMNS)
+    if status_filter:
+        stmt = stmt.where(m.Restaurant.status == status_filter)
+    if cuisine_type:
+        stmt = stmt.where(m.Restaurant.cuisine_type == cuisine_type)
+    return keyset_page(session, stmt, m.Restaurant.created_at, m.Restaurant.id, limit, after)
+
+
+def _menu_items_page(session, limit: int, after, restaurant_id, category_id):
+    stmt = select(*_MENU_ITEM_LIST_COLUMNS)
+    if restaurant_id is not None:
+        stmt = stmt.where(m.MenuItem.restaurant_id == restaurant_id)
+    if category_id is not None:
+        stmt = stmt.where(m.MenuItem.category_id == category_id)
+    return keyset_page(session, stmt, m.MenuItem.created_at, m.MenuItem.id, limit, after)
+
+
+def _export_response(page_fn, *filters) -> StreamingResponse:
+    async def fetch_page(after):
+        return await run_in_session(page_fn, EXPORT_PAGE_SIZE, after, *filters)
+
+    return StreamingResponse(stream_json_array(fetch_page), media_type="application/json")
+
 
+@router.get("/all_restaurants")
+async def get_all_restaurants(
+    request: Request,
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    status_filter: Optional[str] = Query(None, alias="status"),
+    cuisine_type: Optional[str] = None,
+    stream: bool = Query(False, description="stream every matching restaurant as one JSON array"),
+    db=Depends(get_db),
+):
+    """Restaurants ordered by creation, ``limit`` per page. Pass the returned
+    ``next_cursor`` back as ``cursor`` for the following page; it is null on
+    the last one.
+
+    Pages carry an ETag of their exact bytes: a page costs one indexed query
+    either way, and a 304 saves sending it."""
+    if stream:
+        return _export_response(_restaurants_page, status_filter, cuisine_type)
+    rows, next_cursor = await run_db(db, _restaurants_page, limit, decode_cursor(cursor), status_filter, cuisine_type)
+    return conditional_response(request.headers, to_json(page_response(rows, next_cursor)))
+
+
+@router.get("/all_items")
+async def get_all_menu_items(
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    restaurant_id: Optional[int] = None,
+    category_id: Optional[int] = None,
+    stream: bool = Query(False, description="stream every matching item as one JSON array"),
+    db=Depends(get_db),
+):
+    if stream:
+        return _export_response(_menu_items_page, restaurant_id, category_id)
+    rows, next_cursor = await run_db(db, _menu_items_page, limit, decode_cursor(cursor), restaurant_id, category_id)
+    return FastJSONResponse(page_response(rows, next_cursor))
+
+
+NEARBY_MAX_RADIUS_KM = 50.0
+
+
+def _nearby_restaurants(session, latitude, longitude, address_id, radius_km: float, limit: int) -> list:
+    if address_id is not None:
+        address = session.get(Address, address_id)
+        if address is None:
+            raise HTTPException(status_code=404, detail="Address not found")
+        latitude, longitude = address.latitude, address.longitude
+    elif latitude is None or longitude is None:
+        raise HTTPException(status_code=400, detail="Provide latitude and longitude, or address_id")
+
+    location_index.sync(session)
+    hits = location_index.nearby(latitude, longitude, radius_km, limit)
+    if not hits:
+        return []
+
+    # one query for the details of the page of hits
+    rows = session.execute(
+        select(
+            m.RestaurantLocation.id.label("location_id"),
+            m.RestaurantLocation.latitude,
+            m.RestaurantLocation.longitude,
+            m.RestaurantLocation.address,
+            m.RestaurantLocation.city,
+            m.RestaurantLocation.dining_type,
+            m.Restaurant.id,
+            m.Restaurant.name,
+            m.Restaurant.cuisine_type,
+            m.Restaurant.logo_url,
+            m.Restaurant.status,
+            m.Restaurant.rating,
+        )
+        .join(m.Restaurant, m.Restaurant.id == m.RestaurantLocation.restaurant_id)
+        .where(m.RestaurantLocation.id.in_([location_id for _, location_id, _ in hits]))
+    ).mappings()
+    by_location = {row["location_id"]: row for row in rows}
+    result = []
+    for _, location_id, distance in hits:
+        row = by_location.get(location_id)
+        if row is not None:  # deleted since the index last saw it
+            result.append({**row, "distance_km": round(distance, 3)})
+    return result
+
+
+@router.get("/restaurants/nearby")
+async def nearby_restaurants(
+    latitude: Optional[float] = Query(None, ge=-90, le=90),
+    longitude: Optional[float] = Query(None, ge=-180, le=180),
+    address_id: Optional[int] = Query(None, description="search around a saved address instead"),
+    radius_km: float = Query(5.0, gt=0, le=NEARBY_MAX_RADIUS_KM),
+    limit: int = Query(20, ge=1, le=100),
+    db=Depends(get_db),
+):
+    """Restaurants with a location within ``radius_km``, nearest first, each
+    listed once with its closest location."""
+    return await run_db(db, _nearby_restaurants, latitude, longitude, address_id, radius_km, limit)
+
+
+def _restaurant_etas(session, payload: s.RestaurantEtaRequest) -> FastJSONResponse:
+    if payload.address_id is not None:
+        address = session.get(Address, payload.address_id)
+    elif payload.user_id is not None:
+        address = session.execute(
+            select(Address).where(Address.user_id == payload.user_id, Address.is_default.is_(True)).limit(1)
+        ).scalar()
+    else:
+        raise HTTPException(status_code=400, detail="Provide address_id or user_id")
+    if address is None:
+        raise HTTPException(status_code=404, detail="Address not found")
+
+    location_index.sync(session)
+    prep_times.sync(session)
+    return FastJSONResponse(
+        {"address_id": address.id, "etas": estimate(address.latitude, address.longitude, payload.restaurant_ids)}
+    )
+
+
+@router.post("/eta")
+async def restaurant_etas(payload: s.RestaurantEtaRequest, db=Depends(get_db)):
+    """Delivery ETAs of up to 500 restaurants (e.g. a listing page) to a
+    saved address, or the user's default one, from each restaurant's nearest
+    branch. Restaurants without a location are left out."""
+    return await run_db(db, _restaurant_etas, payload)
+
+
+def _search_catalog(session, q: str, kind: Optional[str], offset: int, limit: int) -> dict:
+    catalog_search.sync(session)
+    total, hits = catalog_search.search(q, kind, offset, limit)
+
+    restaurant_ids = [entity_id for k, entity_id, _ in hits if k == "restaurant"]
+    item_ids = [entity_id for k, entity_id, _ in hits if k == "item"]
+    details = {}
+    if restaurant_ids:
+        for row in session.execute(
+            select(m.Restaurant.id, m.Restaurant.name, m.Restaurant.cuisine_type, m.Restaurant.logo_url, m.Restaurant.status)
+            .where(m.Restaurant.id.in_(restaurant_ids))
+        ).mappings():
+            details["restaurant", row["id"]] = row
+    if item_ids:
+        for row in session.execute(
+            select(m.MenuItem.id, m.MenuItem.restaurant_id, m.MenuItem.name, m.MenuItem.description,
+                   m.MenuItem.price, m.MenuItem.is_available, m.MenuItem.image_url)
+            .where(m.MenuItem.id.in_(item_ids))
+        ).mappings():
+            details["item", row["id"]] = row
+
+    results = []
+    for k, entity_id, score in hits:
+        row = details.get((k, entity_id))
+        if row is not None:  # deleted since it was indexed
+            results.append({"type": k, "score": round(score, 3), **row})
+    return {"total": total, "offset": offset, "limit": limit, "results": results}
+
+
+@router.get("/search")
+async def search_catalog(
+    q: str = Query(..., min_length=1, max_length=200),
+    type: Optional[str] = Query(None, pattern="^(restaurant|item)$", description="only restaurants or only menu items"),
+    offset: int = Query(0, ge=0, le=1000),
+    limit: int = Query(20, ge=1, le=100),
+    db=Depends(get_db),
+):
+    """Ranked, typo-tolerant search over restaurant names and cuisines and
+    menu item names and descriptions."""
+    return await run_db(db, _search_catalog, q, type, offset, limit)
+
+
+def _quote(session, payload: s.FoodOrderQuote) -> dict:
+    return price_table.quote(
+        session,
+        payload.restaurant_id,
+        [line.menu_item_id for line in payload.items],
+        [line.quantity for line in payload.items],
+    )
+
+
+@router.post("/quote")
+async def quote_cart(payload: s.FoodOrderQuote, db=Depends(get_db)):
+    """Price a cart without placing it. Items that cannot be ordered are
+    listed (unknown, sold by another restaurant, unavailable) rather than
+    refused; ``total_amount`` covers the priced lines and is what
+    ``/food_order`` expects while prices stay the same."""
+    return await run_db(db, _quote, payload)
+
+
+def _create_food_order(session, payload: FoodOrderCreate) -> dict:
+    try:
+        return place_order(session, payload)
+    except HTTPException:
+        session.rollback()
+        raise
     except Exception as exc:
+        session.rollback()
         raise HTTPException(status_code=500, detail=str(exc))
-    finally:
-        session.close()
+
 
 @router.post("/food_order")
-def create_food_order(payload: FoodOrderCreate) -> dict:
-    """
-    payload: FoodOrderCreate
-    SessionLocal: SQLAlchemy session factory (callable)
-    m: module containing ORM models (MenuItem, FoodOrder, FoodOrderItem, Restaurant)
-    """
-    # collect menu item ids
-    menu_item_ids = [it.menu_item_id for it in payload.items]
-    if not menu_item_ids:
+async def create_food_order(payload: FoodOrderCreate, db=Depends(get_db)) -> dict:
+    """Prices, totals and the branch are worked out server-side; a
+    ``total_amount`` in the payload is only checked against them (409 on a
+    mismatch)."""
+    if not payload.items:
         raise HTTPException(status_code=400, detail="No order items provided")
 
-    # Use session context manager if available
-    with SessionLocal() as session:  # assumes SessionLocal() returns a context-manageable Session
+    return await run_db(db, _create_food_order, payload)
+
+
+_ORDER_HISTORY_COLUMNS = (
+    m.FoodOrder.id,
+    m.FoodOrder.restaurant_id,
+    m.Restaurant.name.label("restaurant_name"),
+    m.FoodOrder.restaurant_location_id,
+    m.FoodOrder.status,
+    m.FoodOrder.total_amount,
+    m.FoodOrder.delivery_address,
+    m.FoodOrder.delivery_instructions,
+    m.FoodOrder.created_at,
+    m.FoodOrder.updated_at,
+)
+
+
+def _user_orders_page(session, user_id: int, limit: int, after, status_filter):
+    stmt = (
+        select(*_ORDER_HISTORY_COLUMNS)
+        .join(m.Restaurant, m.Restaurant.id == m.FoodOrder.restaurant_id)
+        .where(m.FoodOrder.user_id == user_id)
+    )
+    if status_filter:
+        stmt = stmt.where(m.FoodOrder.status == status_filter)
+    orders, next_cursor = keyset_page(session, stmt, m.FoodOrder.created_at, m.FoodOrder.id, limit, after, newest_first=True)
+    if not orders:
+        return orders, next_cursor
+
+    # the whole page's items, with their menu names, in one query
+    by_order = {order["id"]: order for order in orders}
+    for order in orders:
+        order["items"] = []
+    items = session.execute(
+        select(
+            m.OrderItem.order_id,
+            m.OrderItem.menu_item_id,
+            m.MenuItem.name,
+            m.OrderItem.quantity,
+            m.OrderItem.price_per_item,
+            m.OrderItem.total_price,
+            m.OrderItem.special_instructions,
+        )
+        .outerjoin(m.MenuItem, m.MenuItem.id == m.OrderItem.menu_item_id)
+        .where(m.OrderItem.order_id.in_(list(by_order)))
+        .order_by(m.OrderItem.order_id, m.OrderItem.id)
+    ).mappings()
+    for row in items:
+        item = dict(row)
+        by_order[item.pop("order_id")]["items"].append(item)
+    return orders, next_cursor
+
+
+@router.get("/users/{user_id}/orders")
+async def get_user_orders(
+    user_id: int,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    status_filter: Optional[str] = Query(None, alias="status"),
+    user: dict = Depends(get_current_user),
+    db=Depends(get_db),
+):
+    """A user's orders, newest first, each with its items. Pass the returned
+    ``next_cursor`` back as ``cursor`` for older orders. Only the user
+    themselves and admins may list them."""
+    if user["id"] != user_id and "admin" not in user.get("roles", ()):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not enough permissions")
+    rows, next_cursor = await run_db(db, _user_orders_page, user_id, limit, decode_cursor(cursor), status_filter)
+    return FastJSONResponse(page_response(rows, next_cursor))
+
+
+# restaurant streams carry every order of the restaurant
+_RESTAURANT_STREAM_ROLES = ("admin", "restaurant_owner")
+
+
+def _order_snapshot(session, order_id: int, user: dict) -> Optional[bytes]:
+    row = session.execute(
+        select(m.FoodOrder.user_id, m.FoodOrder.id.label("order_id"), m.FoodOrder.restaurant_id, m.FoodOrder.status,
+               m.FoodOrder.updated_at.label("at"))
+        .where(m.FoodOrder.id == order_id)
+    ).mappings().first()
+    if row is None:
+        raise HTTPException(status_code=404, detail="Order not found")
+    snapshot = dict(row)
+    if snapshot.pop("user_id") != user["id"] and "admin" not in user.get("roles", ()):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not enough permissions")
+    return to_json(snapshot)
+
+
+def _restaurant_snapshot(session, restaurant_id: int) -> Optional[bytes]:
+    # no per-restaurant state to replay, only check it exists
+    if session.execute(select(Restaurant.id).where(Restaurant.id == restaurant_id)).first() is None:
+        raise HTTPException(status_code=404, detail="Restaurant not found")
+    return None
+
+
+async def _open_stream(kind: str, key: int, snapshot_fn, *args):
+    # subscribe before reading the snapshot so no change falls in between
+    sub = order_events.subscribe(kind, key)
+    try:
+        return sub, await run_in_session(snapshot_fn, key, *args)
+    except BaseException:
+        order_events.unsubscribe(sub)
+        raise
+
+
+def _sse_event(payload) -> bytes:
+    return b"event: status\ndata: " + (payload if isinstance(payload, bytes) else payload.encode()) + b"\n\n"
+
+
+async def _sse_stream(kind: str, key: int, snapshot_fn, *args) -> StreamingResponse:
+    sub, snapshot = await _open_stream(kind, key, snapshot_fn, *args)
+
+    async def events():
         try:
-            # validate that all menu items belong to the same restaurant
-            restaurant_id = session.query(m.MenuItem.restaurant_id).filter(m.MenuItem.id.in_(menu_item_ids) and m.MenuItem.restaurant_id == payload.restaurant_id).first()
-            if not restaurant_id:
-                raise HTTPException(status_code=400, detail="Invalid menu items")
-
-            address = session.query(Address).filter(Address.user_id == payload.user_id and Address.is_default == True).first()
-            delivery_addr_str = format_address(address) if payload.delivery_address else None
-
-            # create order
-            food_order = m.FoodOrder(
-                user_id=payload.user_id,
-                restaurant_id=payload.restaurant_id,
-                total_amount=payload.total_amount,
-                delivery_address=delivery_addr_str,
-                delivery_instructions=payload.delivery_instructions,
-            )
-            session.add(food_order)
-            session.flush()  # populate food_order.id
-
-            # create all order items
-            order_items = [
-                m.FoodOrderItem(
-                    order_id=food_order.id,
-                    menu_item_id=item.menu_item_id,
-                    quantity=item.quantity,
-                )
-                for item in payload.items
-            ]
-            session.add_all(order_items)
-
-            session.commit()
-            session.refresh(food_order)
-
-            return {"order_id": food_order.id, "message": "Food order placed successfully"}
-
-        except HTTPException:
-            session.rollback()
-            raise
-        except Exception as exc:
-            session.rollback()
-            raise HTTPException(status_code=500, detail=str(exc))
\ No newline at end of file
+            yield b"retry: 3000\n\n" + (_sse_event(snapshot) if snapshot else b"")
+            while (payload := await sub.next()) is not None:
+                yield b": heartbeat\n\n" if payload == HEARTBEAT else _sse_event(payload)
+            if sub.evicted:
+                yield b"event: evicted\ndata: {}\n\n"
+        finally:
+            order_events.unsubscribe(sub)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _websocket_token(websocket: WebSocket) -> str:
+    # browsers cannot set headers on a WebSocket, so ?token= is accepted too
+    token = websocket.query_params.get("token")
+    if token:
+        return token
+    scheme, _, credentials = websocket.headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not credentials:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
+    return credentials
+
+
+def _websocket_close_code(status_code: int) -> int:
+    if status_code in (status.HTTP_401_UNAUTHORIZED, status.HTTP_403_FORBIDDEN):
+        return 1008  # policy violation
+    # 1013 "try again later" when full; 4404 (application range) when missing
+    return 1013 if status_code == 503 else 4000 + status_code
+
+
+async def _websocket_stream(websocket: WebSocket, kind: str, key: int, authorize, snapshot_fn) -> None:
+    """``authorize(token)`` returns the arguments for ``snapshot_fn`` after
+    the key, raising ``HTTPException`` to refuse the socket."""
+    # accepted first so a refusal can carry a close code and reason
+    await websocket.accept()
+    try:
+        args = await authorize(_websocket_token(websocket))
+        sub, snapshot = await _open_stream(kind, key, snapshot_fn, *args)
+    except HTTPException as e:
+        await websocket.close(code=_websocket_close_code(e.status_code), reason=str(e.detail))
+        return
+
+    async def watch_disconnect():
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass  # clients have nothing to say on this socket
+        sub.close()
+
+    watcher = asyncio.create_task(watch_disconnect())
+    try:
+        if snapshot:
+            await websocket.send_text(snapshot.decode())
+        while (payload := await sub.next()) is not None:
+            # protocol-level pings keep the socket alive; heartbeats are for SSE
+            if payload != HEARTBEAT:
+                await websocket.send_text(payload)
+        if sub.evicted:
+            await websocket.close(code=1013, reason="Too slow to keep up, reconnect")
+    except WebSocketDisconnect:
+        pass
+    finally:
+        watcher.cancel()
+        order_events.unsubscribe(sub)
+
+
+@router.get("/orders/{order_id}/events")
+async def order_status_events(order_id: int, user: dict = Depends(get_current_user)):
+    """Server-sent events for one order: its current status first, then
+    every change. Only the user who placed it and admins may watch. A client
+    that falls too far behind gets an ``evicted`` event and should
+    reconnect."""
+    return await _sse_stream("order", order_id, _order_snapshot, user)
+
+
+@router.get("/restaurants/{restaurant_id}/orders/events")
+async def restaurant_order_events(
+    restaurant_id: int,
+    user: dict = Depends(require_roles(*_RESTAURANT_STREAM_ROLES)),
+):
+    """Server-sent events for every new order and status change at one
+    restaurant (restaurant owners and admins)."""
+    return await _sse_stream("restaurant", restaurant_id, _restaurant_snapshot)
+
+
+async def _order_stream_user(token: str) -> tuple:
+    return (await get_current_user(token),)
+
+
+async def _restaurant_stream_user(token: str) -> tuple:
+    await require_roles(*_RESTAURANT_STREAM_ROLES)(await get_token_principal(token))
+    return ()
+
+
+@router.websocket("/orders/{order_id}/ws")
+async def order_status_websocket(websocket: WebSocket, order_id: int):
+    """Same as ``/orders/{order_id}/events``; the access token goes in
+    ``?token=`` or an ``Authorization: Bearer`` header."""
+    await _websocket_stream(websocket, "order", order_id, _order_stream_user, _order_snapshot)
+
+
+@router.websocket("/restaurants/{restaurant_id}/orders/ws")
+async def restaurant_order_websocket(websocket: WebSocket, restaurant_id: int):
+    """Same as ``/restaurants/{restaurant_id}/orders/events``; the access
+    token goes in ``?token=`` or an ``Authorization: Bearer`` header."""
+    await _websocket_stream(websocket, "restaurant", restaurant_id, _restaurant_stream_user, _restaurant_snapshot)
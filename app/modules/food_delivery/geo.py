@@ -0,0 +1,181 @@
+"""In-process spatial index over ``restaurant_location`` for "restaurants near me".
+
+Locations are bucketed into a fixed lat/lon grid (``GEO_CELL_DEGREES`` per
+side). A query collects the row numbers of the cells overlapping the search
+circle's bounding box, then computes haversine distances for those candidates
+in one NumPy pass, filters by radius and sorts. Coordinates live in growable
+NumPy arrays; cells only hold row numbers.
+
+``LocationIndex`` is a ``CatalogMirror``: other workers' location changes are
+picked up every ``GEO_INDEX_REFRESH_SECONDS``, and a full rebuild every
+``GEO_INDEX_REBUILD_SECONDS`` also compacts rows removed in place.
+"""
+import math
+from datetime import datetime
+from itertools import chain
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import select
+
+from app.core.config import GEO_CELL_DEGREES, GEO_INDEX_REBUILD_SECONDS, GEO_INDEX_REFRESH_SECONDS
+from app.modules.food_delivery.catalog import on_catalog_change
+from app.modules.food_delivery.catalog_mirror import CatalogMirror
+from app.modules.food_delivery.model import RestaurantLocation
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE_LAT = math.pi * EARTH_RADIUS_KM / 180.0
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance; scalars or NumPy arrays (degrees) in any mix."""
+    lat1, lon1, lat2, lon2 = (np.radians(v) for v in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+class _Grid:
+    """Row storage plus the cell buckets. Not thread-safe by itself."""
+
+    def __init__(self, cell_degrees: float, capacity: int = 1024):
+        self.cell = cell_degrees
+        self.columns = int(math.ceil(360.0 / cell_degrees))
+        self.size = 0
+        self.lat = np.empty(capacity)
+        self.lon = np.empty(capacity)
+        self.restaurant_ids = np.empty(capacity, dtype=np.int64)
+        self.location_ids = np.empty(capacity, dtype=np.int64)
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.cells: Dict[Tuple[int, int], List[int]] = {}
+        self.rows_by_restaurant: Dict[int, List[int]] = {}
+
+    def _grow(self, needed: int) -> None:
+        capacity = max(needed, 2 * len(self.lat))
+        for name in ("lat", "lon", "restaurant_ids", "location_ids", "alive"):
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[: self.size] = old[: self.size]
+            setattr(self, name, new)
+
+    def add(self, rows: Iterable[Tuple[int, int, float, float]]) -> int:
+        """Append ``(location_id, restaurant_id, lat, lon)`` rows."""
+        rows = list(rows)
+        if not rows:
+            return 0
+        start = self.size
+        end = start + len(rows)
+        if end > len(self.lat):
+            self._grow(end)
+        location_ids, restaurant_ids, lats, lons = zip(*rows)
+        self.location_ids[start:end] = location_ids
+        self.restaurant_ids[start:end] = restaurant_ids
+        self.lat[start:end] = lats
+        self.lon[start:end] = lons
+        self.alive[start:end] = True
+        # cell keys for the whole batch in one go
+        cell_i = np.floor(self.lat[start:end] / self.cell).astype(np.int64)
+        cell_j = np.floor((self.lon[start:end] + 180.0) / self.cell).astype(np.int64) % self.columns
+        for row, i, j, rid in zip(range(start, end), cell_i.tolist(), cell_j.tolist(), restaurant_ids):
+            self.cells.setdefault((i, j), []).append(row)
+            self.rows_by_restaurant.setdefault(rid, []).append(row)
+        self.size = end
+        return len(rows)
+
+    def remove_restaurants(self, restaurant_ids: Iterable[int]) -> None:
+        # rows stay in their cells as tombstones until the next rebuild
+        for rid in restaurant_ids:
+            for row in self.rows_by_restaurant.pop(rid, ()):
+                self.alive[row] = False
+
+    def candidates(self, lat: float, lon: float, radius_km: float) -> np.ndarray:
+        dlat = radius_km / KM_PER_DEGREE_LAT
+        cos_lat = math.cos(math.radians(min(abs(lat) + dlat, 90.0)))
+        dlon = 180.0 if cos_lat < 1e-9 else min(dlat / cos_lat, 180.0)
+        i_lo, i_hi = int(math.floor((lat - dlat) / self.cell)), int(math.floor((lat + dlat) / self.cell))
+        if dlon >= 180.0:
+            j_range = range(self.columns)
+        else:
+            j_lo = int(math.floor((lon - dlon + 180.0) / self.cell))
+            j_hi = int(math.floor((lon + dlon + 180.0) / self.cell))
+            j_range = sorted({j % self.columns for j in range(j_lo, j_hi + 1)})
+        probes = (i_hi - i_lo + 1) * len(j_range)
+        if probes > len(self.cells):
+            # huge radius or a sparse index: scanning occupied cells is cheaper
+            buckets = (rows for (i, _), rows in self.cells.items() if i_lo <= i <= i_hi)
+        else:
+            cells = self.cells
+            buckets = (cells[key] for key in ((i, j) for i in range(i_lo, i_hi + 1) for j in j_range) if key in cells)
+        rows = np.fromiter(chain.from_iterable(buckets), dtype=np.int64)
+        return rows[self.alive[rows]]
+
+
+_LOCATION_COLUMNS = (RestaurantLocation.id, RestaurantLocation.restaurant_id,
+                     RestaurantLocation.latitude, RestaurantLocation.longitude)
+
+
+class LocationIndex(CatalogMirror):
+    def __init__(self, cell_degrees: float = GEO_CELL_DEGREES):
+        super().__init__("restaurant location index", GEO_INDEX_REFRESH_SECONDS, GEO_INDEX_REBUILD_SECONDS)
+        self.cell_degrees = cell_degrees
+        self._grid: Optional[_Grid] = None
+
+    @property
+    def size(self) -> int:
+        grid = self._grid
+        return 0 if grid is None else int(grid.alive[: grid.size].sum())
+
+    def load(self, rows: Iterable[Tuple[int, int, float, float]], watermark: Optional[datetime] = None) -> None:
+        """Replace the whole index with ``(location_id, restaurant_id, lat, lon)`` rows."""
+        grid = _Grid(self.cell_degrees)
+        grid.add(rows)
+        with self._lock:
+            self._grid = grid
+            self._installed(watermark)
+
+    def _load(self, session, watermark: Optional[datetime]) -> int:
+        self.load(session.execute(select(*_LOCATION_COLUMNS)).tuples(), watermark)
+        return self.size
+
+    def _reread(self, session, restaurant_ids: List[int]) -> None:
+        rows = session.execute(
+            select(*_LOCATION_COLUMNS).where(RestaurantLocation.restaurant_id.in_(restaurant_ids))
+        ).all()
+        with self._lock:
+            self._grid.remove_restaurants(restaurant_ids)
+            self._grid.add(rows)
+
+    def nearby(self, lat: float, lon: float, radius_km: float, limit: int) -> List[Tuple[int, int, float]]:
+        """Nearest location of each restaurant within ``radius_km``, closest
+        first: ``[(restaurant_id, location_id, distance_km)]``."""
+        with self._lock:
+            grid = self._grid
+            if grid is None:
+                return []
+            rows = grid.candidates(lat, lon, radius_km)
+            lats, lons = grid.lat[rows], grid.lon[rows]
+            restaurant_ids, location_ids = grid.restaurant_ids[rows], grid.location_ids[rows]
+        if not len(rows):
+            return []
+        distances = haversine_km(lat, lon, lats, lons)
+        inside = distances <= radius_km
+        distances, restaurant_ids, location_ids = distances[inside], restaurant_ids[inside], location_ids[inside]
+        order = np.argsort(distances, kind="stable")
+        # first (= nearest) occurrence of each restaurant, then back in distance order
+        _, first = np.unique(restaurant_ids[order], return_index=True)
+        keep = order[np.sort(first)[:limit]]
+        return list(zip(restaurant_ids[keep].tolist(), location_ids[keep].tolist(), distances[keep].tolist()))
+
+    def branches(self, restaurant_ids: Iterable[int]) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Every location of ``restaurant_ids``, as ``(restaurant_ids,
+        location_ids, lats, lons)`` arrays."""
+        with self._lock:
+            grid = self._grid
+            if grid is None:
+                return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0), np.empty(0)
+            by_restaurant = grid.rows_by_restaurant
+            rows = np.fromiter(chain.from_iterable(by_restaurant.get(rid, ()) for rid in restaurant_ids), dtype=np.int64)
+            return grid.restaurant_ids[rows], grid.location_ids[rows], grid.lat[rows], grid.lon[rows]
+
+
+location_index = LocationIndex()
+on_catalog_change(location_index.mark_stale)
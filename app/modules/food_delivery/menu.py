@@ -0,0 +1,186 @@
+"""The restaurant menu document served by /food_delivery/restaurants_data/{id}.
+
+The document is built with a fixed number of queries (restaurant, locations,
+attached categories, the restaurant's own menu items) regardless of menu size,
+then cached per restaurant as serialized JSON. Catalog changes drop the
+affected entries (see ``catalog.on_catalog_change``); the TTL bounds how long
+another worker's write can take to show up here.
+
+The document's version is ``restaurant.updated_at``, which every catalog
+change bumps (``catalog.touch_restaurants``). A request carrying
+``If-None-Match``/``If-Modified-Since`` is checked against it with a single
+primary-key lookup, so a 304 never builds the document; when the validators
+no longer match, a cached copy older than the current version is rebuilt
+rather than served, whatever its TTL. Entries keep their gzip/brotli forms
+next to the JSON, so a hot document is compressed once, not per request.
+"""
+import threading
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+from fastapi import HTTPException
+from pydantic_core import to_json
+from sqlalchemy import select
+
+from app.core.cache import TTLCache
+from app.core.compression import CompressedBody
+from app.core.config import MENU_CACHE_SIZE, MENU_CACHE_TTL_SECONDS
+from app.modules.food_delivery import model as m
+from app.modules.food_delivery.catalog import on_catalog_change
+from app.shared.http_cache import version_etag
+
+# bump when the document's shape changes, so clients do not revalidate a
+# body from the previous release
+MENU_DOCUMENT_FORMAT = 1
+
+_LOCATION_COLUMNS = (
+    m.RestaurantLocation.id,
+    m.RestaurantLocation.latitude,
+    m.RestaurantLocation.longitude,
+    m.RestaurantLocation.address,
+    m.RestaurantLocation.city,
+    m.RestaurantLocation.state,
+    m.RestaurantLocation.country,
+    m.RestaurantLocation.postal_code,
+    m.RestaurantLocation.location_id,
+    m.RestaurantLocation.dining_type,
+    m.RestaurantLocation.created_at,
+)
+
+_ITEM_COLUMNS = (
+    m.MenuItem.id,
+    m.MenuItem.category_id,
+    m.MenuItem.name,
+    m.MenuItem.description,
+    m.MenuItem.price,
+    m.MenuItem.is_available,
+    m.MenuItem.image_url,
+    m.MenuItem.is_vegetarian,
+    m.MenuItem.cooking_time_minutes,
+    m.MenuItem.created_at,
+)
+
+
+def menu_version(session, restaurant_id: int) -> datetime:
+    version = session.execute(
+        select(m.Restaurant.updated_at).where(m.Restaurant.id == restaurant_id)
+    ).scalar_one_or_none()
+    if version is None:
+        raise HTTPException(status_code=404, detail="Restaurant not found")
+    return version
+
+
+def menu_etag(restaurant_id: int, version: datetime) -> str:
+    return version_etag(f"m{MENU_DOCUMENT_FORMAT}", restaurant_id, version)
+
+
+def build_menu_document(session, restaurant_id: int) -> Optional[dict]:
+    """Restaurant, its locations and its categories with the restaurant's
+    items nested under each, in four queries. None if there is no such
+    restaurant.
+
+    The document includes ``updated_at``, its version. It is read first, so
+    rows committed while the other queries run can only make the document
+    newer than its version, never older: a client holding it revalidates to a
+    fresh copy instead of keeping a stale one."""
+    restaurant = session.execute(
+        select(
+            m.Restaurant.id,
+            m.Restaurant.name,
+            m.Restaurant.cuisine_type,
+            m.Restaurant.phone_number,
+            m.Restaurant.email,
+            m.Restaurant.logo_url,
+            m.Restaurant.banner_url,
+            m.Restaurant.status,
+            m.Restaurant.is_favorite,
+            m.Restaurant.created_at,
+            m.Restaurant.updated_at,
+        ).where(m.Restaurant.id == restaurant_id)
+    ).mappings().first()
+    if restaurant is None:
+        return None
+
+    doc = dict(restaurant)
+    doc["locations"] = [
+        dict(row)
+        for row in session.execute(
+            select(*_LOCATION_COLUMNS)
+            .where(m.RestaurantLocation.restaurant_id == restaurant_id)
+            .order_by(m.RestaurantLocation.id)
+        ).mappings()
+    ]
+
+    categories = session.execute(
+        select(m.MenuCategory.id, m.MenuCategory.name, m.MenuCategory.description, m.MenuCategory.created_at)
+        .join(m.restaurant_category, m.restaurant_category.c.category_id == m.MenuCategory.id)
+        .where(m.restaurant_category.c.restaurant_id == restaurant_id)
+        .order_by(m.MenuCategory.id)
+    ).mappings()
+    by_category: Dict[int, dict] = {}
+    for row in categories:
+        by_category[row["id"]] = {**row, "items": []}
+
+    if by_category:
+        # only this restaurant's items: categories are shared between restaurants
+        items = session.execute(
+            select(*_ITEM_COLUMNS)
+            .where(m.MenuItem.restaurant_id == restaurant_id, m.MenuItem.category_id.in_(list(by_category)))
+            .order_by(m.MenuItem.id)
+        ).mappings()
+        for row in items:
+            item = dict(row)
+            by_category[item.pop("category_id")]["items"].append(item)
+
+    doc["categories"] = list(by_category.values())
+    return doc
+
+
+class MenuCache:
+    """Serialized menu documents per restaurant.
+
+    ``invalidate`` bumps a per-restaurant generation, and a document is only
+    stored if no invalidation happened while it was being built, so a slow
+    build that read pre-commit rows cannot overwrite a fresher invalidation.
+    """
+
+    def __init__(self, maxsize: int = MENU_CACHE_SIZE, ttl: float = MENU_CACHE_TTL_SECONDS):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._generations: Dict[int, int] = {}
+        self._lock = threading.Lock()
+
+    def get(self, session, restaurant_id: int, version: Optional[datetime] = None) -> Tuple[CompressedBody, datetime]:
+        """``(body, version)``. With ``version`` (the current one, from
+        ``menu_version``) a cached copy of any other version is rebuilt."""
+        entry = self._cache.get(restaurant_id)
+        if entry is not None and (version is None or entry[1] == version):
+            return entry
+        generation = self._generations.get(restaurant_id, 0)
+        doc = build_menu_document(session, restaurant_id)
+        if doc is None:
+            raise HTTPException(status_code=404, detail="Restaurant not found")
+        entry = (CompressedBody(to_json(doc)), doc["updated_at"])
+        with self._lock:
+            if self._generations.get(restaurant_id, 0) == generation:
+                self._cache.set(restaurant_id, entry)
+        return entry
+
+    def invalidate(self, restaurant_ids) -> None:
+        with self._lock:
+            for rid in restaurant_ids:
+                self._generations[rid] = self._generations.get(rid, 0) + 1
+                self._cache.pop(rid)
+
+    def clear(self) -> None:
+        with self._lock:
+            for rid in list(self._generations):
+                self._generations[rid] += 1
+            self._cache.clear()
+
+    @property
+    def stats(self) -> dict:
+        return {"size": len(self._cache), "hits": self._cache.hits, "misses": self._cache.misses}
+
+
+menu_cache = MenuCache()
+on_catalog_change(menu_cache.invalidate)
@@ -0,0 +1,168 @@
+"""Bulk menu import: stream CSV/NDJSON, validate, resolve ids, load in chunks.
+
+Rows are checked against ``MenuItemCreate``; their restaurant and category ids
+are resolved with one ``IN`` lookup per chunk for ids not seen before, never a
+query per row. Each chunk is one transaction: the items are COPYed (or
+multi-row INSERTed) into ``menu_item`` and their categories attached to their
+restaurants, so the items show up in the menu document. Bad rows are reported
+with their row number and skipped; the rest of the file is still imported.
+"""
+from datetime import datetime
+from typing import Iterable, List, Optional, Set, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from app.core.database import engine
+from app.modules.food_delivery.catalog import notify_catalog_change, touch_restaurants
+from app.modules.food_delivery.model import MenuCategory, MenuItem, Restaurant, restaurant_category
+from app.modules.food_delivery.schemas import MenuItemCreate
+from app.shared.bulk import ImportReport, RecordError, chunked, iter_records, validation_message
+
+DEFAULT_CHUNK_SIZE = 2000
+
+_COLUMNS = (
+    "restaurant_id", "category_id", "name", "description", "price", "is_available",
+    "image_url", "is_vegetarian", "cooking_time_minutes", "created_at",
+)
+
+
+def _parse(row_number: int, record, restaurant_id: Optional[int], report: ImportReport) -> Optional[MenuItemCreate]:
+    if isinstance(record, RecordError):
+        report.error(row_number, str(record))
+        return None
+    try:
+        item = MenuItemCreate(**record)
+    except ValidationError as e:
+        report.error(row_number, validation_message(e))
+        return None
+    if restaurant_id is not None:
+        if item.restaurant_id is None:
+            item.restaurant_id = restaurant_id
+        elif item.restaurant_id != restaurant_id:
+            report.error(row_number, f"Row is for restaurant {item.restaurant_id}, not {restaurant_id}", name=item.name)
+            return None
+    if item.restaurant_id is None:
+        report.error(row_number, "restaurant_id: Field required", name=item.name)
+        return None
+    return item
+
+
+class _KnownIds:
+    """Restaurant and category ids confirmed to exist, so each id costs at
+    most one lookup per import."""
+
+    def __init__(self):
+        self.restaurants: Set[int] = set()
+        self.categories: Set[int] = set()
+
+    def resolve(self, conn, items: List[MenuItemCreate]) -> None:
+        restaurants = {i.restaurant_id for i in items} - self.restaurants
+        if restaurants:
+            self.restaurants |= set(conn.execute(select(Restaurant.id).where(Restaurant.id.in_(restaurants))).scalars())
+        categories = {i.category_id for i in items} - self.categories
+        if categories:
+            self.categories |= set(conn.execute(select(MenuCategory.id).where(MenuCategory.id.in_(categories))).scalars())
+
+
+def _copy_rows(conn, rows: List[tuple]) -> None:
+    cursor = conn.connection.driver_connection.cursor()
+    with cursor.copy("COPY menu_item (" + ", ".join(_COLUMNS) + ") FROM STDIN") as copy:
+        for row in rows:
+            copy.write_row(row)
+
+
+def _insert_rows(conn, rows: List[tuple]) -> None:
+    """Multi-row INSERT for drivers without COPY support."""
+    conn.execute(insert(MenuItem), [dict(zip(_COLUMNS, row)) for row in rows])
+
+
+def _attach_categories(conn, pairs: Set[Tuple[int, int]]) -> None:
+    values = [{"restaurant_id": rid, "category_id": cid} for rid, cid in sorted(pairs)]
+    if conn.dialect.name == "postgresql":
+        conn.execute(pg_insert(restaurant_category).values(values).on_conflict_do_nothing())
+        return
+    attached = set(conn.execute(
+        select(restaurant_category.c.restaurant_id, restaurant_category.c.category_id)
+        .where(restaurant_category.c.restaurant_id.in_({rid for rid, _ in pairs}))
+    ).tuples())
+    values = [v for v in values if (v["restaurant_id"], v["category_id"]) not in attached]
+    if values:
+        conn.execute(insert(restaurant_category), values)
+
+
+def _load_chunk(parsed, known: _KnownIds, report: ImportReport, method: str, dry_run: bool) -> Set[int]:
+    """Returns the restaurant ids the chunk added items to."""
+    with engine.connect() as conn:
+        known.resolve(conn, [item for _, item in parsed])
+    fresh = []
+    for row_number, item in parsed:
+        if item.restaurant_id not in known.restaurants:
+            report.error(row_number, f"Restaurant {item.restaurant_id} not found", name=item.name)
+        elif item.category_id not in known.categories:
+            report.error(row_number, f"Category {item.category_id} not found", name=item.name)
+        else:
+            fresh.append((row_number, item))
+    if dry_run or not fresh:
+        if dry_run:
+            report.inserted += len(fresh)
+        return set()
+
+    now = datetime.utcnow()
+    rows = [
+        (
+            i.restaurant_id, i.category_id, i.name, i.description, i.price,
+            True if i.is_available is None else i.is_available, i.image_url,
+            bool(i.is_vegetarian), i.cooking_time_minutes, now,
+        )
+        for _, i in fresh
+    ]
+    try:
+        with engine.begin() as conn:
+            use_copy = method == "copy" and conn.dialect.driver == "psycopg"
+            (_copy_rows if use_copy else _insert_rows)(conn, rows)
+            _attach_categories(conn, {(i.restaurant_id, i.category_id) for _, i in fresh})
+            touch_restaurants(conn, {i.restaurant_id for _, i in fresh})
+    except Exception as e:
+        # e.g. a restaurant deleted mid-import; the chunk was rolled back as a whole
+        for row_number, item in fresh:
+            report.error(row_number, f"Chunk failed to load: {e.__class__.__name__}", name=item.name)
+        return set()
+    report.inserted += len(rows)
+    return {i.restaurant_id for _, i in fresh}
+
+
+def import_menu(
+    lines: Iterable[str],
+    fmt: str,
+    restaurant_id: Optional[int] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    method: str = "copy",
+    dry_run: bool = False,
+    max_errors: int = 1000,
+) -> dict:
+    """Import menu items from CSV/NDJSON lines; returns the report as a dict.
+
+    ``restaurant_id`` fills in rows without one and rejects rows for any other
+    restaurant. ``method`` is "copy" (Postgres + psycopg 3) or "insert".
+    ``dry_run`` validates and resolves ids without writing anything.
+    """
+    report = ImportReport(max_errors=max_errors)
+    known = _KnownIds()
+    changed: Set[int] = set()
+
+    def valid_rows():
+        for row_number, record in iter_records(lines, fmt):
+            report.total += 1
+            item = _parse(row_number, record, restaurant_id, report)
+            if item is not None:
+                yield row_number, item
+
+    try:
+        for chunk in chunked(valid_rows(), chunk_size):
+            changed |= _load_chunk(chunk, known, report, method, dry_run)
+    finally:
+        # Core writes bypass the session hooks
+        notify_catalog_change(changed)
+    return report.as_dict()
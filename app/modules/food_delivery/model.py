@@ -5,10 +5,12 @@ from sqlalchemy import (
     Column,
     Float,
     ForeignKey,
+    Index,
     Integer,
     String,
     DateTime,
     Table,
+    desc,
 )
 from sqlalchemy.orm import relationship
 from app.core.database import Base
@@ -24,6 +26,12 @@ restaurant_category = Table(
 
 class Restaurant(Base):
     __tablename__ = "restaurant"
+    # keyset pagination of the catalog listings
+    __table_args__ = (
+        Index("ix_restaurant_created_at_id", "created_at", "id"),
+        # catalog changes bump updated_at; in-process indexes poll it
+        Index("ix_restaurant_updated_at", "updated_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(256), unique=True, index=True, nullable=False)
@@ -115,6 +123,7 @@ class MenuCategory(Base):
 
 class MenuItem(Base):
     __tablename__ = "menu_item"
+    __table_args__ = (Index("ix_menu_item_created_at_id", "created_at", "id"),)
 
     id = Column(Integer, primary_key=True, index=True)
     restaurant_id = Column(Integer, ForeignKey("restaurant.id", ondelete="CASCADE"), nullable=False, index=True)
@@ -135,6 +144,8 @@ class MenuItem(Base):
 
 class FoodOrder(Base):
     __tablename__ = "food_order"
+    # a user's order history, newest first
+    __table_args__ = (Index("ix_food_order_user_created_at_id", "user_id", desc("created_at"), desc("id")),)
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, nullable=False, index=True)
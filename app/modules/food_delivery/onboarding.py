@@ -0,0 +1,198 @@
+"""Restaurant onboarding in set-based statements.
+
+A chunk of ``CreateRestaurant`` entries costs five statements however many
+entries it holds: one lookup for names/emails already taken, one for the
+category ids, then one multi-row ``INSERT ... RETURNING`` each for the
+restaurants, their ``restaurant_category`` links and their locations. The
+inserts are executemany calls, which SQLAlchemy sends as batched multi-row
+VALUES from one cached compilation, so a large chunk does not pay for
+compiling thousands of bound parameters. Entries
+that would collide on the unique name or email are reported, not fatal; the
+restaurant insert is ``ON CONFLICT DO NOTHING`` so a restaurant created
+concurrently is reported the same way instead of failing the chunk.
+
+``POST /food_delivery/restaurants`` goes through the same code with a chunk
+of one.
+"""
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import insert, or_, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from app.core.database import engine
+from app.modules.food_delivery.catalog import notify_catalog_change
+from app.modules.food_delivery.model import MenuCategory, Restaurant, RestaurantLocation, restaurant_category
+from app.modules.food_delivery.schemas import CreateRestaurant
+from app.shared.bulk import ImportReport, chunked, validation_message
+
+DEFAULT_BATCH_CHUNK_SIZE = 500
+MAX_BATCH_SIZE = 5000
+
+# error fields that mean "already exists" rather than "bad input"
+CONFLICT_FIELDS = ("name", "email")
+
+Entry = Tuple[int, CreateRestaurant]
+
+
+def _restaurant_row(p: CreateRestaurant, now: datetime) -> dict:
+    return {
+        "name": p.name,
+        "cuisine_type": p.cuisine_type,
+        "phone_number": p.phone_number,
+        "email": p.email,
+        "logo_url": p.logo_url,
+        "banner_url": p.banner_url,
+        "status": p.status or "open",
+        "is_favorite": bool(p.is_favorite),
+        "created_at": now,
+        "updated_at": now,
+    }
+
+
+def _taken(conn, entries: List[Entry]):
+    names = [p.name for _, p in entries]
+    emails = [p.email for _, p in entries if p.email]
+    cond = Restaurant.name.in_(names)
+    if emails:
+        cond = or_(cond, Restaurant.email.in_(emails))
+    taken_names, taken_emails = set(), set()
+    for name, email in conn.execute(select(Restaurant.name, Restaurant.email).where(cond)):
+        taken_names.add(name)
+        if email:
+            taken_emails.add(email)
+    return taken_names, taken_emails
+
+
+def _insert_restaurants(conn, rows: List[dict]) -> Dict[str, int]:
+    """name -> id of the rows actually inserted."""
+    stmt = pg_insert(Restaurant).on_conflict_do_nothing() if conn.dialect.name == "postgresql" else insert(Restaurant)
+    return {name: rid for rid, name in conn.execute(stmt.returning(Restaurant.id, Restaurant.name), rows)}
+
+
+def onboard_chunk(conn, entries: List[Entry], report: ImportReport) -> List[Dict[str, Any]]:
+    """Insert one chunk on ``conn``; the caller commits. Rejected entries go
+    to ``report``; returns ``{"row", "id", "name", "location_id"}`` for the
+    created ones."""
+    taken_names, taken_emails = _taken(conn, entries)
+    category_ids = {cid for _, p in entries for cid in (p.categories_id or [])}
+    known_categories = set(
+        conn.execute(select(MenuCategory.id).where(MenuCategory.id.in_(category_ids))).scalars()
+    ) if category_ids else set()
+
+    fresh: List[Entry] = []
+    for index, p in entries:
+        missing = sorted(set(p.categories_id or []) - known_categories)
+        if p.name in taken_names:
+            report.error(index, "A restaurant with this name already exists", name=p.name, field="name")
+        elif p.email and p.email in taken_emails:
+            report.error(index, "A restaurant with this email already exists", name=p.name, field="email")
+        elif missing:
+            report.error(index, f"Unknown categories: {missing}", name=p.name, field="categories_id")
+        else:
+            fresh.append((index, p))
+    if not fresh:
+        return []
+
+    now = datetime.utcnow()
+    ids = _insert_restaurants(conn, [_restaurant_row(p, now) for _, p in fresh])
+
+    created: List[Entry] = []
+    for index, p in fresh:
+        if p.name in ids:
+            created.append((index, p))
+        else:
+            report.error(index, "Conflicts with a restaurant created at the same time", name=p.name, field="name")
+
+    links = [
+        {"restaurant_id": ids[p.name], "category_id": cid}
+        for _, p in created for cid in dict.fromkeys(p.categories_id or [])
+    ]
+    if links:
+        conn.execute(insert(restaurant_category), links)
+
+    location_ids: Dict[int, int] = {}
+    locations = [
+        {"restaurant_id": ids[p.name], **p.location.model_dump(), "created_at": now}
+        for _, p in created if p.location is not None
+    ]
+    if locations:
+        stmt = insert(RestaurantLocation).returning(RestaurantLocation.id, RestaurantLocation.restaurant_id)
+        location_ids = {rid: lid for lid, rid in conn.execute(stmt, locations)}
+
+    return [
+        {"row": index, "id": ids[p.name], "name": p.name, "location_id": location_ids.get(ids[p.name])}
+        for index, p in created
+    ]
+
+
+def onboard_restaurants(
+    entries: Iterable[Any],
+    chunk_size: int = DEFAULT_BATCH_CHUNK_SIZE,
+    max_errors: int = 1000,
+) -> dict:
+    """Validate and create restaurants, one transaction per chunk.
+
+    ``entries`` are dicts (or ``CreateRestaurant``s); errors are reported by
+    their position in the input. Names and emails repeated within the input
+    are rejected after their first occurrence.
+    """
+    report = ImportReport(max_errors=max_errors)
+    seen_names, seen_emails = set(), set()
+    results: List[Dict[str, Any]] = []
+
+    def valid_entries():
+        for index, entry in enumerate(entries):
+            report.total += 1
+            try:
+                p = entry if isinstance(entry, CreateRestaurant) else CreateRestaurant(**entry)
+            except ValidationError as e:
+                report.error(index, validation_message(e))
+                continue
+            except TypeError:
+                report.error(index, "Expected a JSON object")
+                continue
+            if p.name in seen_names:
+                report.error(index, "Duplicate name in batch", name=p.name, field="name")
+                continue
+            if p.email and p.email in seen_emails:
+                report.error(index, "Duplicate email in batch", name=p.name, field="email")
+                continue
+            seen_names.add(p.name)
+            if p.email:
+                seen_emails.add(p.email)
+            yield index, p
+
+    for chunk in chunked(valid_entries(), chunk_size):
+        # errors are kept aside until the chunk commits, so a failed chunk
+        # reports each of its entries exactly once
+        chunk_report = ImportReport(max_errors=len(chunk))
+        try:
+            with engine.begin() as conn:
+                created = onboard_chunk(conn, chunk, chunk_report)
+        except Exception as e:
+            for index, p in chunk:
+                report.error(index, f"Chunk failed to load: {e.__class__.__name__}", name=p.name)
+            continue
+        for err in chunk_report.errors:
+            report.error(err.pop("row"), err.pop("error"), **err)
+        report.inserted += len(created)
+        results += created
+        # Core writes bypass the session hooks
+        notify_catalog_change(r["id"] for r in created)
+
+    return {**report.as_dict(), "created": results}
+
+
+def create_one(session, payload: CreateRestaurant) -> Tuple[Optional[dict], Optional[dict]]:
+    """Single-restaurant onboarding on a request session: ``(created,
+    None)`` or ``(None, error)``. Commits on success."""
+    report = ImportReport()
+    created = onboard_chunk(session.connection(), [(0, payload)], report)
+    if not created:
+        session.rollback()
+        return None, report.errors[0]
+    session.commit()
+    notify_catalog_change([created[0]["id"]])
+    return created[0], None
@@ -0,0 +1,228 @@
+"""Live order-status events for the SSE and WebSocket streams.
+
+Every write that creates an order or changes its status also runs
+``pg_notify('order_status', <json>)`` in the same transaction, so Postgres
+delivers the event to every worker once (and only if) the transaction
+commits:
+
+  * ORM writes (the admin panel, scripts) through the ``after_flush`` hook
+    below, one ``pg_notify`` statement per flush;
+  * ``orders.place_order`` from the ``RETURNING`` clause of its insert.
+
+Each worker holds one ``LISTEN`` connection and fans the events out in
+process. Subscribers are keyed by order id or by restaurant id and each gets
+a bounded queue; a subscriber whose queue is full when an event arrives is
+evicted rather than allowed to buffer without limit or hold up the others.
+The JSON payload is passed through untouched, so an event costs one parse
+per worker, not one encode per connection.
+"""
+import asyncio
+import json
+from datetime import datetime
+from itertools import chain
+from typing import Dict, Optional, Set, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import Text, bindparam, event, func, inspect, select
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.orm import Session
+
+from app.core.config import (
+    ORDER_EVENTS_HEARTBEAT_SECONDS,
+    ORDER_EVENTS_MAX_SUBSCRIBERS,
+    ORDER_EVENTS_QUEUE_SIZE,
+)
+from app.modules.food_delivery.model import FoodOrder
+
+CHANNEL = "order_status"
+
+Topic = Tuple[str, int]  # ("order", order_id) or ("restaurant", restaurant_id)
+
+HEARTBEAT = ""  # queued to idle subscribers every ``heartbeat`` seconds
+
+# queue markers, never sent to clients
+_EVICTED = object()
+_CLOSED = object()
+
+
+def order_status_notification(order_id, restaurant_id, order_status, at):
+    """``pg_notify`` call for one event, for use inside a statement."""
+    payload = func.json_build_object(
+        "order_id", order_id, "restaurant_id", restaurant_id, "status", order_status, "at", at,
+    )
+    return func.pg_notify(CHANNEL, payload.cast(Text))
+
+
+_payloads = func.unnest(bindparam("payloads", type_=ARRAY(Text))).table_valued("payload").render_derived()
+_NOTIFY_MANY = select(func.pg_notify(CHANNEL, _payloads.c.payload))
+
+
+class Subscription:
+    __slots__ = ("topic", "queue", "evicted")
+
+    def __init__(self, topic: Topic, queue_size: int):
+        self.topic = topic
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.evicted = False
+
+    async def next(self) -> Optional[str]:
+        """The next event's JSON, ``HEARTBEAT``, or None once the
+        subscription is over."""
+        item = await self.queue.get()
+        if item is _EVICTED or item is _CLOSED:
+            return None
+        return item
+
+    def close(self) -> None:
+        """End ``next`` from outside (the peer went away)."""
+        try:
+            self.queue.put_nowait(_CLOSED)
+        except asyncio.QueueFull:
+            pass
+
+
+class OrderEventBroker:
+    """Per-worker fan-out. Only touched from the event loop, so no locking.
+
+    Heartbeats come from one ticker for all subscribers rather than a timer
+    per connection, so an idle stream is just a parked ``queue.get()``.
+    """
+
+    def __init__(
+        self,
+        queue_size: int = ORDER_EVENTS_QUEUE_SIZE,
+        max_subscribers: int = ORDER_EVENTS_MAX_SUBSCRIBERS,
+        heartbeat: float = ORDER_EVENTS_HEARTBEAT_SECONDS,
+    ):
+        self.queue_size = queue_size
+        self.max_subscribers = max_subscribers
+        self.heartbeat = heartbeat
+        self._topics: Dict[Topic, Set[Subscription]] = {}
+        self._count = 0
+        self.published = 0
+        self.evictions = 0
+
+    def subscribe(self, kind: str, key: int) -> Subscription:
+        if self._count >= self.max_subscribers:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many live order streams on this server, try again later",
+                headers={"Retry-After": "5"},
+            )
+        sub = Subscription((kind, key), self.queue_size)
+        self._topics.setdefault(sub.topic, set()).add(sub)
+        self._count += 1
+        return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        subs = self._topics.get(sub.topic)
+        if subs is None or sub not in subs:
+            return
+        subs.discard(sub)
+        if not subs:
+            del self._topics[sub.topic]
+        self._count -= 1
+
+    def _evict(self, sub: Subscription) -> None:
+        self.unsubscribe(sub)
+        sub.evicted = True
+        self.evictions += 1
+        # drop the backlog; the client re-syncs from the snapshot when it reconnects
+        while not sub.queue.empty():
+            sub.queue.get_nowait()
+        sub.queue.put_nowait(_EVICTED)
+
+    def publish(self, payload: str) -> int:
+        """Fan one event's JSON out to its order's and restaurant's
+        subscribers; returns how many got it."""
+        try:
+            data = json.loads(payload)
+            topics = (("order", int(data["order_id"])), ("restaurant", int(data["restaurant_id"])))
+        except (ValueError, KeyError, TypeError):
+            print(f"⚠ Ignoring malformed order status event: {payload[:200]}")
+            return 0
+        delivered = 0
+        slow = []
+        for topic in topics:
+            for sub in self._topics.get(topic, ()):
+                try:
+                    sub.queue.put_nowait(payload)
+                    delivered += 1
+                except asyncio.QueueFull:
+                    slow.append(sub)
+        for sub in slow:
+            self._evict(sub)
+        self.published += 1
+        return delivered
+
+    def heartbeat_idle(self) -> int:
+        idle = 0
+        for subs in self._topics.values():
+            for sub in subs:
+                if sub.queue.empty():
+                    sub.queue.put_nowait(HEARTBEAT)
+                    idle += 1
+        return idle
+
+    async def run(self) -> None:
+        await asyncio.gather(self._listen(), self._heartbeats())
+
+    async def _heartbeats(self) -> None:
+        while True:
+            await asyncio.sleep(self.heartbeat)
+            self.heartbeat_idle()
+
+    async def _listen(self) -> None:
+        """Hold this worker's ``LISTEN`` connection, reconnecting with backoff.
+        Events committed while it is down are not replayed; streams start
+        from a snapshot, so a reconnecting client catches up."""
+        import psycopg
+
+        from app.core.database import engine
+
+        conninfo = engine.url.set(drivername="postgresql").render_as_string(hide_password=False)
+        delay = 1.0
+        while True:
+            try:
+                async with await psycopg.AsyncConnection.connect(conninfo, autocommit=True) as conn:
+                    await conn.execute(f"LISTEN {CHANNEL}")
+                    delay = 1.0
+                    async for notify in conn.notifies():
+                        self.publish(notify.payload)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠ Order status listener disconnected: {e}")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 30.0)
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "subscribers": self._count,
+            "topics": len(self._topics),
+            "published": self.published,
+            "evictions": self.evictions,
+        }
+
+
+order_events = OrderEventBroker()
+
+
+@event.listens_for(Session, "after_flush")
+def _notify_status_changes(session, flush_context):
+    payloads = []
+    for obj in chain(session.new, session.dirty):
+        if not isinstance(obj, FoodOrder):
+            continue
+        if obj not in session.new and not inspect(obj).attrs.status.history.has_changes():
+            continue
+        payloads.append(json.dumps({
+            "order_id": obj.id,
+            "restaurant_id": obj.restaurant_id,
+            "status": obj.status,
+            "at": datetime.utcnow().isoformat(),
+        }, separators=(",", ":")))
+    if payloads:
+        # queued by Postgres, delivered only if this transaction commits
+        session.connection().execute(_NOTIFY_MANY, {"payloads": payloads})
@@ -0,0 +1,204 @@
+"""Order placement: validate, price and insert an order in three statements.
+
+1. one read for every ordered menu item (restaurant, price, availability);
+2. one read for the restaurant's branches, each joined to the customer's
+   default address, which picks the branch nearest the customer;
+3. one write: the order row and all its items in a single
+   ``WITH new_order AS (INSERT ... RETURNING id) INSERT INTO order_item ...``,
+   whose ``RETURNING`` also queues the new order's status event
+   (see ``order_events``).
+
+The statements are built once at import with bind parameters (the order lines
+travel as arrays and are ``unnest``-ed server-side), so placing an order never
+re-compiles SQL.
+
+Prices always come from the menu. A ``total_amount`` sent by the client is
+only checked against the server's total, so a client showing stale prices gets
+a 409 instead of an order at the wrong price. Line and order totals are
+rounded by ``pricing``, the same code that prices ``/food_delivery/quote``.
+
+Items this worker's availability bitset already knows to be unavailable are
+refused before the first statement (see ``availability``).
+"""
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List
+
+import numpy as np
+from fastapi import HTTPException, status
+from sqlalchemy import DateTime, Float, Integer, and_, any_, bindparam, func, insert, select, true
+from sqlalchemy.dialects.postgresql import ARRAY
+
+from app.modules.food_delivery.availability import availability_index
+from app.modules.food_delivery.geo import haversine_km
+from app.modules.food_delivery.model import FoodOrder, MenuItem, OrderItem, RestaurantLocation
+from app.modules.food_delivery.order_events import order_status_notification
+from app.modules.food_delivery.pricing import cart_total, line_totals
+from app.modules.food_delivery.schemas import FoodOrderCreate, format_address
+from app.modules.order_address_list.models import Address
+
+# allowed gap between the client's total and ours before refusing the order
+TOTAL_TOLERANCE = 0.01
+
+_MENU_ITEMS = select(MenuItem.id, MenuItem.restaurant_id, MenuItem.price, MenuItem.is_available).where(
+    MenuItem.id == any_(bindparam("menu_item_ids", type_=ARRAY(Integer)))
+)
+
+_BRANCHES = (
+    select(
+        RestaurantLocation.id,
+        RestaurantLocation.latitude,
+        RestaurantLocation.longitude,
+        Address.latitude.label("address_latitude"),
+        Address.longitude.label("address_longitude"),
+        Address.flat,
+        Address.floor,
+        Address.locality,
+        Address.landmark,
+        Address.tag,
+        Address.your_name,
+        Address.phone_number,
+    )
+    .outerjoin(Address, and_(Address.user_id == bindparam("user_id"), Address.is_default == true()))
+    .where(RestaurantLocation.restaurant_id == bindparam("restaurant_id"))
+    .order_by(RestaurantLocation.id)
+)
+
+
+def _insert_order_statement():
+    new_order = (
+        insert(FoodOrder)
+        .values(
+            user_id=bindparam("user_id"),
+            restaurant_id=bindparam("restaurant_id"),
+            restaurant_location_id=bindparam("restaurant_location_id"),
+            total_amount=bindparam("total_amount"),
+            status="pending",
+            delivery_address=bindparam("delivery_address"),
+            delivery_instructions=bindparam("delivery_instructions"),
+            created_at=bindparam("now", type_=DateTime),
+            updated_at=bindparam("now", type_=DateTime),
+        )
+        .returning(
+            FoodOrder.id,
+            order_status_notification(FoodOrder.id, FoodOrder.restaurant_id, FoodOrder.status, FoodOrder.created_at),
+        )
+        .cte("new_order")
+    )
+    order_lines = func.unnest(
+        bindparam("menu_item_ids", type_=ARRAY(Integer)),
+        bindparam("quantities", type_=ARRAY(Integer)),
+        bindparam("prices", type_=ARRAY(Float)),
+        bindparam("line_totals", type_=ARRAY(Float)),
+    ).table_valued("menu_item_id", "quantity", "price_per_item", "total_price").render_derived(name="order_lines")
+    return (
+        insert(OrderItem)
+        .from_select(
+            ["order_id", "menu_item_id", "quantity", "price_per_item", "total_price", "created_at"],
+            select(
+                new_order.c.id,
+                order_lines.c.menu_item_id,
+                order_lines.c.quantity,
+                order_lines.c.price_per_item,
+                order_lines.c.total_price,
+                bindparam("now", type_=DateTime),
+            ).select_from(new_order.join(order_lines, true())),  # new_order is one row
+        )
+        # a data-modifying CTE has to sit at the top of the statement
+        .add_cte(new_order, nest_here=True)
+        .returning(OrderItem.order_id)
+    )
+
+
+_INSERT_ORDER = _insert_order_statement()
+
+
+def _priced_lines(session, conn, payload: FoodOrderCreate) -> List[dict]:
+    quantities: Dict[int, int] = defaultdict(int)
+    for line in payload.items:
+        quantities[line.menu_item_id] += line.quantity
+
+    # turned away before any query when this worker already knows
+    unavailable = availability_index.unavailable(session, quantities)
+    if unavailable:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=f"menu items currently unavailable: {unavailable}",
+        )
+
+    rows = conn.execute(_MENU_ITEMS, {"menu_item_ids": list(quantities)}).all()
+    found = {row.id: row for row in rows}
+
+    problems = []
+    missing = sorted(set(quantities) - set(found))
+    if missing:
+        problems.append(f"unknown menu items: {missing}")
+    elsewhere = sorted(r.id for r in rows if r.restaurant_id != payload.restaurant_id)
+    if elsewhere:
+        problems.append(f"menu items not sold by restaurant {payload.restaurant_id}: {elsewhere}")
+    unavailable = sorted(r.id for r in rows if not r.is_available)
+    if unavailable:
+        problems.append(f"menu items currently unavailable: {unavailable}")
+    if problems:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="; ".join(problems))
+
+    prices = [found[item_id].price for item_id in quantities]
+    totals = line_totals(prices, list(quantities.values()))
+    return [
+        {"menu_item_id": item_id, "quantity": quantity, "price_per_item": price, "total_price": total}
+        for (item_id, quantity), price, total in zip(quantities.items(), prices, totals.tolist())
+    ]
+
+
+def _branch_and_address(conn, payload: FoodOrderCreate):
+    """(branch location id, delivery address text)."""
+    rows = conn.execute(_BRANCHES, {"user_id": payload.user_id, "restaurant_id": payload.restaurant_id}).all()
+    if not rows:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Restaurant has no location to order from")
+
+    address = rows[0] if rows[0].address_latitude is not None else None
+    branch_id = rows[0].id
+    if address is not None and len(rows) > 1:
+        distances = haversine_km(
+            address.address_latitude, address.address_longitude,
+            np.array([r.latitude for r in rows]), np.array([r.longitude for r in rows]),
+        )
+        branch_id = rows[int(np.argmin(distances))].id
+
+    delivery_address = payload.delivery_address
+    if not delivery_address and address is not None:
+        delivery_address = format_address(address)
+    return branch_id, delivery_address
+
+
+def place_order(session, payload: FoodOrderCreate) -> dict:
+    conn = session.connection()
+    lines = _priced_lines(session, conn, payload)
+    total = cart_total([line["total_price"] for line in lines])
+    if payload.total_amount is not None and abs(payload.total_amount - total) > TOTAL_TOLERANCE:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail={"message": "Order total changed, please review the prices", "total_amount": total},
+        )
+    branch_id, delivery_address = _branch_and_address(conn, payload)
+
+    order_id = conn.execute(_INSERT_ORDER, {
+        "user_id": payload.user_id,
+        "restaurant_id": payload.restaurant_id,
+        "restaurant_location_id": branch_id,
+        "total_amount": total,
+        "delivery_address": delivery_address,
+        "delivery_instructions": payload.delivery_instructions,
+        "now": datetime.utcnow(),
+        "menu_item_ids": [line["menu_item_id"] for line in lines],
+        "quantities": [line["quantity"] for line in lines],
+        "prices": [line["price_per_item"] for line in lines],
+        "line_totals": [line["total_price"] for line in lines],
+    }).scalar()
+    session.commit()
+
+    return {
+        "order_id": order_id,
+        "total_amount": total,
+        "restaurant_location_id": branch_id,
+        "message": "Food order placed successfully",
+    }
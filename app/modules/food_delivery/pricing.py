@@ -0,0 +1,169 @@
+"""Cart quotes from an in-process menu price table.
+
+``PriceTable`` mirrors the ``menu_item`` columns a quote needs (owning
+restaurant, price, availability) as NumPy arrays indexed by ``menu_item_id``,
+so pricing a cart is a few array lookups over all of its lines at once and no
+query. It is a ``CatalogMirror``: other workers' menu changes are picked up
+every ``PRICE_TABLE_REFRESH_SECONDS``, everything is re-read every
+``PRICE_TABLE_REBUILD_SECONDS``. A restaurant's items are always replaced as a
+whole, so items deleted from a menu stop being quoted with the next re-read.
+
+A quote is a preview: ``place_order`` prices from the database again. Both go
+through ``line_totals`` and ``cart_total``, so a quoted ``total_amount`` passes
+the order's total check unless a price changed in between.
+"""
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import select
+
+from app.core.config import PRICE_TABLE_REBUILD_SECONDS, PRICE_TABLE_REFRESH_SECONDS
+from app.modules.food_delivery.catalog import on_catalog_change
+from app.modules.food_delivery.catalog_mirror import CatalogMirror
+from app.modules.food_delivery.model import MenuItem
+
+# ``restaurant`` value of ids that are not a menu item
+_NO_ITEM = -1
+
+_ITEM_COLUMNS = (MenuItem.id, MenuItem.restaurant_id, MenuItem.price, MenuItem.is_available)
+
+
+def line_totals(prices, quantities) -> np.ndarray:
+    """Price of each order line, rounded to the paisa."""
+    return np.round(np.asarray(prices, dtype=np.float64) * np.asarray(quantities, dtype=np.int64), 2)
+
+
+def cart_total(totals) -> float:
+    return round(float(np.sum(totals)), 2)
+
+
+def _by_restaurant(ids: np.ndarray, restaurants: np.ndarray) -> Dict[int, np.ndarray]:
+    order = np.argsort(restaurants, kind="stable")
+    owners, starts = np.unique(restaurants[order], return_index=True)
+    return dict(zip(owners.tolist(), np.split(ids[order], starts[1:])))
+
+
+class PriceTable(CatalogMirror):
+    def __init__(self):
+        super().__init__("menu price table", PRICE_TABLE_REFRESH_SECONDS, PRICE_TABLE_REBUILD_SECONDS)
+        self._restaurant: Optional[np.ndarray] = None
+        self._price: Optional[np.ndarray] = None
+        self._available: Optional[np.ndarray] = None
+        # restaurant id -> its menu item ids, to replace a restaurant's items as a whole
+        self._items_of: Dict[int, np.ndarray] = {}
+
+    @property
+    def stats(self) -> dict:
+        if self._restaurant is None:
+            return {"ready": False}
+        return {
+            "ready": True,
+            "items": int(np.count_nonzero(self._restaurant != _NO_ITEM)),
+            "restaurants": len(self._items_of),
+            "bytes": self._restaurant.nbytes + self._price.nbytes + self._available.nbytes,
+        }
+
+    @staticmethod
+    def _arrays(rows) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        n = len(rows)
+        return (
+            np.fromiter((r[0] for r in rows), dtype=np.int64, count=n),
+            np.fromiter((r[1] for r in rows), dtype=np.int64, count=n),
+            np.fromiter((r[2] for r in rows), dtype=np.float64, count=n),
+            np.fromiter((bool(r[3]) for r in rows), dtype=bool, count=n),
+        )
+
+    def load(self, rows: Sequence[Tuple[int, int, float, bool]], watermark: Optional[datetime] = None) -> int:
+        """Replace the whole table with ``(menu_item_id, restaurant_id, price,
+        is_available)`` rows."""
+        ids, restaurants, prices, available = self._arrays(rows)
+        size = int(ids.max()) + 1 if len(ids) else 1
+        restaurant = np.full(size, _NO_ITEM, dtype=np.int64)
+        price = np.zeros(size, dtype=np.float64)
+        flags = np.zeros(size, dtype=bool)
+        restaurant[ids], price[ids], flags[ids] = restaurants, prices, available
+        items_of = _by_restaurant(ids, restaurants)
+        with self._lock:
+            self._restaurant, self._price, self._available = restaurant, price, flags
+            self._items_of = items_of
+            self._installed(watermark)
+        return len(rows)
+
+    def _load(self, session, watermark: Optional[datetime]) -> int:
+        return self.load(session.execute(select(*_ITEM_COLUMNS)).all(), watermark)
+
+    def _grow(self, max_id: int) -> None:
+        if max_id < len(self._restaurant):
+            return
+        capacity = max(max_id + 1, 2 * len(self._restaurant))
+        for name, fill in (("_restaurant", _NO_ITEM), ("_price", 0.0), ("_available", False)):
+            old = getattr(self, name)
+            grown = np.full(capacity, fill, dtype=old.dtype)
+            grown[: len(old)] = old
+            setattr(self, name, grown)
+
+    def replace(self, restaurant_ids: Iterable[int], rows: Sequence[Tuple[int, int, float, bool]]) -> None:
+        """Make ``rows`` the complete menu of each of ``restaurant_ids``."""
+        ids, restaurants, prices, available = self._arrays(rows)
+        fresh = _by_restaurant(ids, restaurants)
+        with self._lock:
+            if self._restaurant is None:
+                return
+            for rid in restaurant_ids:
+                old = self._items_of.pop(rid, None)
+                if old is not None:
+                    # an item moved to another restaurant is not this one's to clear
+                    old = old[self._restaurant[old] == rid]
+                    self._restaurant[old] = _NO_ITEM
+            if len(ids):
+                self._grow(int(ids.max()))
+                self._restaurant[ids], self._price[ids], self._available[ids] = restaurants, prices, available
+            self._items_of.update(fresh)
+
+    def _reread(self, session, restaurant_ids: List[int]) -> None:
+        rows = session.execute(select(*_ITEM_COLUMNS).where(MenuItem.restaurant_id.in_(restaurant_ids))).all()
+        self.replace(restaurant_ids, rows)
+
+    def quote(self, session, restaurant_id: int, menu_item_ids: Sequence[int], quantities: Sequence[int]) -> dict:
+        """Price a cart of ``restaurant_id``. Lines of the same item are added
+        up, in the order the items first appear (as ``place_order`` does);
+        items that cannot be ordered are listed instead of priced."""
+        self.sync(session)
+        # a dict beats np.unique by far on cart-sized inputs
+        merged: Dict[int, int] = {}
+        for item_id, quantity in zip(menu_item_ids, quantities):
+            merged[item_id] = merged.get(item_id, 0) + quantity
+        ids = np.fromiter(merged, dtype=np.int64, count=len(merged))
+        quantities = np.fromiter(merged.values(), dtype=np.int64, count=len(merged))
+
+        with self._lock:
+            inside = (ids >= 0) & (ids < len(self._restaurant))
+            at = np.where(inside, ids, 0)
+            owner = np.where(inside, self._restaurant[at], _NO_ITEM)
+            prices = self._price[at]
+            available = self._available[at]
+
+        unknown = owner == _NO_ITEM
+        elsewhere = ~unknown & (owner != restaurant_id)
+        unavailable = ~unknown & ~elsewhere & ~available
+        priced = ~(unknown | elsewhere | unavailable)
+        totals = line_totals(prices[priced], quantities[priced])
+        return {
+            "restaurant_id": restaurant_id,
+            "lines": [
+                {"menu_item_id": item_id, "quantity": quantity, "price_per_item": price, "total_price": total}
+                for item_id, quantity, price, total in zip(
+                    ids[priced].tolist(), quantities[priced].tolist(), prices[priced].tolist(), totals.tolist(),
+                )
+            ],
+            "total_amount": cart_total(totals),
+            "unknown_items": ids[unknown].tolist(),
+            "other_restaurant_items": ids[elsewhere].tolist(),
+            "unavailable_items": ids[unavailable].tolist(),
+            "orderable": bool(priced.all()),
+        }
+
+
+price_table = PriceTable()
+on_catalog_change(price_table.mark_stale)
@@ -119,6 +119,17 @@ class MenuItemCreate(BaseModel):
         }
 
 
+class MenuItemAvailabilityUpdate(BaseModel):
+    menu_item_ids: List[int] = Field(..., min_length=1, max_length=5000)
+    is_available: bool
+    # when set, only this restaurant's items are changed; required unless
+    # the caller is an admin
+    restaurant_id: Optional[int] = None
+
+    class Config:
+        json_schema_extra = {"example": {"menu_item_ids": [3, 4, 9], "is_available": False, "restaurant_id": 1}}
+
+
 class MenuItemOut(BaseModel):
     id: int
     category_id: int
@@ -208,7 +219,8 @@ class OrderItemOut(BaseModel):
 class FoodOrderCreate(BaseModel):
     user_id: int
     restaurant_id: int
-    total_amount: Annotated[float, Field(ge=0)]
+    # what the client expects to pay; checked against server-side pricing
+    total_amount: Optional[Annotated[float, Field(ge=0)]] = None
     delivery_address: Optional[str] = Field(None, max_length=512)
     delivery_instructions: Optional[str] = Field(None, max_length=1024)
     items: List[OrderItemCreate]
@@ -226,6 +238,26 @@ class FoodOrderCreate(BaseModel):
         }
 
 
+class FoodOrderQuote(BaseModel):
+    restaurant_id: int
+    items: List[OrderItemCreate] = Field(..., min_length=1, max_length=500)
+
+    class Config:
+        json_schema_extra = {
+            "example": {"restaurant_id": 10, "items": [{"menu_item_id": 1, "quantity": 2}, {"menu_item_id": 4, "quantity": 1}]}
+        }
+
+
+class RestaurantEtaRequest(BaseModel):
+    restaurant_ids: List[int] = Field(..., min_length=1, max_length=500)
+    # deliver to this saved address, or else to user_id's default one
+    address_id: Optional[int] = None
+    user_id: Optional[int] = None
+
+    class Config:
+        json_schema_extra = {"example": {"restaurant_ids": [10, 11, 12], "user_id": 45}}
+
+
 class FoodOrderOut(BaseModel):
     id: int
     user_id: int
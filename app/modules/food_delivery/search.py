@@ -0,0 +1,360 @@
+"""In-process full-text search over restaurants and menu items.
+
+Indexed fields (weight): restaurant name (3) and cuisine_type (2), menu item
+name (2) and description (1). Text is lower-cased and split on word
+characters; every term has a posting list of (document, field weight) held in
+compact ``array`` buffers, so a million items cost a few bytes per posting
+rather than a Python object each.
+
+Typo tolerance comes from a trigram index over the *vocabulary* (not the
+documents): a query word is expanded to the known terms sharing enough padded
+trigrams with it ("chiken" -> "chicken", "piza" -> "pizza"), and the last word
+also to the terms it is a prefix of, for search-as-you-type. Scoring is
+vectorised with NumPy: per query word, the best (similarity x idf x field
+weight) over its expansions, summed over the words. Documents matching every
+query word are returned; only if there are none do partial matches (most
+words first) come back.
+
+``CatalogSearch`` is a ``CatalogMirror``: a restaurant is re-indexed with its
+items as a whole, within ``SEARCH_INDEX_REFRESH_SECONDS`` of another worker
+changing it, and everything is rebuilt every ``SEARCH_INDEX_REBUILD_SECONDS``.
+The first build starts at startup; searches arriving before it finishes get a
+503.
+
+Searches score concurrently (NumPy releases the GIL for most of it); only the
+in-place re-indexing of a few restaurants waits for them and holds them off,
+since it appends to buffers the scoring reads. A rebuild fills a new index
+without any lock and swaps it in at the end; once an index is serving, it
+also pauses between batches so request threads are not starved of the GIL.
+"""
+import math
+import re
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from contextlib import contextmanager
+from datetime import datetime
+from itertools import islice
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+from fastapi import HTTPException, status
+from sqlalchemy import select
+
+from app.core.config import SEARCH_INDEX_REBUILD_SECONDS, SEARCH_INDEX_REFRESH_SECONDS
+from app.modules.food_delivery.catalog import on_catalog_change
+from app.modules.food_delivery.catalog_mirror import CatalogMirror
+from app.modules.food_delivery.model import MenuItem, Restaurant
+
+KIND_RESTAURANT = 0
+KIND_ITEM = 1
+KINDS = {"restaurant": KIND_RESTAURANT, "item": KIND_ITEM}
+_KIND_NAMES = {code: name for name, code in KINDS.items()}
+
+RESTAURANT_NAME_WEIGHT = 3
+CUISINE_WEIGHT = 2
+ITEM_NAME_WEIGHT = 2
+DESCRIPTION_WEIGHT = 1
+
+# Jaccard similarity of padded trigram sets needed for a fuzzy match, and how
+# many expansions a query word may have.
+FUZZY_MIN_SIMILARITY = 0.4
+FUZZY_EXPANSIONS = 8
+PREFIX_SIMILARITY = 0.8
+PREFIX_EXPANSIONS = 30
+# ranks documents matching more query words above any score difference
+_MATCHED_WORD_BONUS = 1e4
+
+_WORD = re.compile(r"\w+")
+_LOAD_BATCH = 10000
+# share of the interpreter a rebuild takes while an older index is serving
+_REBUILD_DUTY = 0.5
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    return _WORD.findall(text.lower()) if text else []
+
+
+def trigrams(term: str) -> Set[str]:
+    padded = f"  {term} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class _SharedLock:
+    """Any number of ``shared`` holders or one ``exclusive`` one; a waiting
+    exclusive holder keeps new shared ones out so it is not starved."""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._shared = 0
+        self._exclusive = False
+        self._waiting = 0
+
+    @contextmanager
+    def shared(self):
+        with self._cond:
+            while self._exclusive or self._waiting:
+                self._cond.wait()
+            self._shared += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._shared -= 1
+                if not self._shared:
+                    self._cond.notify_all()
+
+    @contextmanager
+    def exclusive(self):
+        with self._cond:
+            self._waiting += 1
+            while self._exclusive or self._shared:
+                self._cond.wait()
+            self._waiting -= 1
+            self._exclusive = True
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._exclusive = False
+                self._cond.notify_all()
+
+
+class _Index:
+    """Documents, postings and the vocabulary trigram index. Callers lock."""
+
+    def __init__(self):
+        self.terms: Dict[str, int] = {}
+        self.vocabulary: List[str] = []
+        self._sorted_vocabulary: Optional[List[str]] = None
+        self.term_trigram_counts = array("H")
+        self.trigram_terms: Dict[str, array] = {}
+        self.posting_docs: List[array] = []
+        self.posting_weights: List[array] = []
+        self.doc_kind = array("b")
+        self.doc_entity = array("q")
+        self.alive = bytearray()
+        self.docs_by_restaurant: Dict[int, array] = {}
+        self.live_docs = 0
+
+    def _term_id(self, term: str) -> int:
+        tid = self.terms.get(term)
+        if tid is None:
+            tid = self.terms[term] = len(self.vocabulary)
+            self.vocabulary.append(term)
+            self._sorted_vocabulary = None
+            grams = trigrams(term)
+            self.term_trigram_counts.append(len(grams))
+            for gram in grams:
+                terms = self.trigram_terms.get(gram)
+                if terms is None:
+                    terms = self.trigram_terms[gram] = array("i")
+                terms.append(tid)
+            self.posting_docs.append(array("i"))
+            self.posting_weights.append(array("B"))
+        return tid
+
+    def _add(self, kind: int, entity_id: int, restaurant_id: int, fields: Iterable[Tuple[Optional[str], int]]) -> None:
+        doc = len(self.doc_kind)
+        self.doc_kind.append(kind)
+        self.doc_entity.append(entity_id)
+        self.alive.append(1)
+        self.live_docs += 1
+        docs = self.docs_by_restaurant.get(restaurant_id)
+        if docs is None:
+            docs = self.docs_by_restaurant[restaurant_id] = array("i")
+        docs.append(doc)
+        weights: Dict[str, int] = {}
+        for text, weight in fields:
+            for term in tokenize(text):
+                if weights.get(term, 0) < weight:
+                    weights[term] = weight
+        for term, weight in weights.items():
+            tid = self._term_id(term)
+            self.posting_docs[tid].append(doc)
+            self.posting_weights[tid].append(weight)
+
+    def add_restaurant(self, restaurant_id: int, name: str, cuisine_type: Optional[str]) -> None:
+        self._add(KIND_RESTAURANT, restaurant_id, restaurant_id, ((name, RESTAURANT_NAME_WEIGHT), (cuisine_type, CUISINE_WEIGHT)))
+
+    def add_item(self, item_id: int, restaurant_id: int, name: str, description: Optional[str]) -> None:
+        self._add(KIND_ITEM, item_id, restaurant_id, ((name, ITEM_NAME_WEIGHT), (description, DESCRIPTION_WEIGHT)))
+
+    def remove_restaurants(self, restaurant_ids: Iterable[int]) -> None:
+        """Drop a restaurant's document and all its items' (tombstoned until
+        the next rebuild)."""
+        for rid in restaurant_ids:
+            for doc in self.docs_by_restaurant.pop(rid, ()):
+                if self.alive[doc]:
+                    self.alive[doc] = 0
+                    self.live_docs -= 1
+
+    def _expand(self, word: str, prefix: bool) -> Dict[int, float]:
+        """Known terms matching a query word: {term id: similarity}."""
+        out: Dict[int, float] = {}
+        tid = self.terms.get(word)
+        if tid is not None:
+            out[tid] = 1.0
+        if prefix and len(word) >= 2:
+            if self._sorted_vocabulary is None:
+                self._sorted_vocabulary = sorted(self.vocabulary)
+            vocabulary = self._sorted_vocabulary
+            for term in islice(vocabulary, bisect_left(vocabulary, word), None):
+                if not term.startswith(word) or len(out) >= PREFIX_EXPANSIONS:
+                    break
+                out.setdefault(self.terms[term], PREFIX_SIMILARITY)
+        if len(word) >= 3:
+            grams = trigrams(word)
+            lists = [self.trigram_terms[g] for g in grams if g in self.trigram_terms]
+            if lists:
+                counts = np.bincount(np.concatenate([np.frombuffer(terms, dtype=np.int32) for terms in lists]))
+                candidates = np.flatnonzero(counts)
+                common = counts[candidates]
+                sizes = np.frombuffer(self.term_trigram_counts, dtype=np.uint16)[candidates]
+                similarity = common / (len(grams) + sizes - common)
+                good = similarity >= FUZZY_MIN_SIMILARITY
+                candidates, similarity = candidates[good], similarity[good]
+                best = np.argsort(-similarity, kind="stable")[:FUZZY_EXPANSIONS]
+                for tid, sim in zip(candidates[best].tolist(), similarity[best].tolist()):
+                    out.setdefault(tid, sim)
+        return out
+
+    def search(self, query: str, kind: Optional[int], offset: int, limit: int) -> Tuple[int, List[Tuple[int, int, float]]]:
+        words = tokenize(query)
+        n = len(self.doc_kind)
+        if not words or not n:
+            return 0, []
+        live = max(self.live_docs, 1)
+        total = None
+        matched_words = 0
+        for position, word in enumerate(words):
+            variants = self._expand(word, prefix=position == len(words) - 1)
+            if not variants:
+                continue
+            matched_words += 1
+            best = np.zeros(n, dtype=np.float32)
+            for tid, similarity in variants.items():
+                docs = np.frombuffer(self.posting_docs[tid], dtype=np.int32)
+                if not len(docs):
+                    continue
+                scale = np.float32(similarity * math.log(1.0 + live / len(docs)))
+                # the bonus rides on every score, so each matched word adds it once
+                scores = np.frombuffer(self.posting_weights[tid], dtype=np.uint8) * scale + np.float32(_MATCHED_WORD_BONUS)
+                # a document keeps its best expansion of this word
+                best[docs] = np.maximum(best[docs], scores)
+            if total is None:
+                total = best
+            else:
+                total += best
+        if total is None:
+            return 0, []
+
+        # documents matching every (known) query word; failing that, any of them
+        # (bool nonzero is several times faster than on the float scores)
+        hits = np.flatnonzero(total >= np.float32(matched_words * _MATCHED_WORD_BONUS))
+        if matched_words > 1 and not len(hits):
+            hits = np.flatnonzero(total > 0)
+        keep = np.frombuffer(self.alive, dtype=np.uint8)[hits] != 0
+        if kind is not None:
+            keep &= np.frombuffer(self.doc_kind, dtype=np.int8)[hits] == kind
+        hits = hits[keep]
+        count = len(hits)
+        wanted = offset + limit
+        if count > wanted:
+            hits = hits[np.argpartition(-total[hits], wanted - 1)[:wanted]]
+        ranked = hits[np.argsort(-total[hits], kind="stable")][offset:wanted]
+        kinds = np.frombuffer(self.doc_kind, dtype=np.int8)[ranked].tolist()
+        entities = np.frombuffer(self.doc_entity, dtype=np.int64)[ranked].tolist()
+        scores = (total[ranked] % _MATCHED_WORD_BONUS).tolist()
+        return count, list(zip(kinds, entities, scores))
+
+
+class CatalogSearch(CatalogMirror):
+    def __init__(self):
+        super().__init__("catalog search index", SEARCH_INDEX_REFRESH_SECONDS, SEARCH_INDEX_REBUILD_SECONDS)
+        self._index: Optional[_Index] = None
+        self._build_lock = threading.Lock()
+        # searches vs in-place updates of ``_index``; swapping it takes ``_lock``
+        self._access = _SharedLock()
+
+    @property
+    def stats(self) -> dict:
+        index = self._index
+        if index is None:
+            return {"ready": False}
+        return {
+            "ready": True,
+            "documents": index.live_docs,
+            "terms": len(index.vocabulary),
+            "postings": sum(len(p) for p in index.posting_docs),
+        }
+
+    @staticmethod
+    def _catalog_rows(session, restaurant_ids: Optional[List[int]] = None):
+        """``(kind, row)`` for restaurants, then items: all of them or those of
+        ``restaurant_ids``. Streamed in batches, one query at a time."""
+        restaurants = select(Restaurant.id, Restaurant.name, Restaurant.cuisine_type)
+        items = select(MenuItem.id, MenuItem.restaurant_id, MenuItem.name, MenuItem.description)
+        if restaurant_ids is not None:
+            restaurants = restaurants.where(Restaurant.id.in_(restaurant_ids))
+            items = items.where(MenuItem.restaurant_id.in_(restaurant_ids))
+        for kind, stmt in ((KIND_RESTAURANT, restaurants), (KIND_ITEM, items)):
+            for row in session.execute(stmt.execution_options(yield_per=_LOAD_BATCH)):
+                yield kind, row
+
+    @staticmethod
+    def _add(index: _Index, kind: int, row) -> None:
+        if kind == KIND_RESTAURANT:
+            index.add_restaurant(*row)
+        else:
+            index.add_item(*row)
+
+    def rebuild(self, session) -> int:
+        with self._build_lock:
+            return super().rebuild(session)
+
+    def _load(self, session, watermark: Optional[datetime]) -> int:
+        index = _Index()
+        started = time.monotonic()
+        for n, (kind, row) in enumerate(self._catalog_rows(session), 1):
+            self._add(index, kind, row)
+            if not n % _LOAD_BATCH:
+                # no pause on the first build: searches get a 503 until it is done
+                pause = (time.monotonic() - started) * (1 - _REBUILD_DUTY) / _REBUILD_DUTY if self._ready else 0
+                time.sleep(pause)
+                started = time.monotonic()
+        with self._lock:
+            self._index = index
+            self._installed(watermark)
+        return index.live_docs
+
+    def _reread(self, session, restaurant_ids: List[int]) -> None:
+        rows = list(self._catalog_rows(session, restaurant_ids=restaurant_ids))
+        with self._access.exclusive():
+            index = self._index
+            index.remove_restaurants(restaurant_ids)
+            for kind, row in rows:
+                self._add(index, kind, row)
+
+    def sync(self, session) -> None:
+        if not self._ready and self._build_lock.locked():
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Search index is warming up",
+                headers={"Retry-After": "5"},
+            )
+        super().sync(session)
+
+    def search(self, query: str, kind: Optional[str], offset: int, limit: int) -> Tuple[int, List[Tuple[str, int, float]]]:
+        """``(total matches, [(kind, id, score)])`` for one page, best first."""
+        with self._access.shared():
+            index = self._index
+            if index is None:
+                return 0, []
+            count, hits = index.search(query, KINDS.get(kind) if kind else None, offset, limit)
+        return count, [(_KIND_NAMES[k], entity_id, score) for k, entity_id, score in hits]
+
+
+catalog_search = CatalogSearch()
+on_catalog_change(catalog_search.mark_stale)
@@ -9,71 +9,70 @@ from app.modules.locations.schemas import  LocationCreate
 from app.modules.locations.services import create_location
 from app.modules.auth.security import  get_current_user
 from app.core.rbac import require_roles
+from app.core.database import get_db, run_db
+from app.core.responses import FastJSONResponse
 from fastapi.security import OAuth2PasswordBearer
 router = APIRouter(prefix="/place", tags=["place"])
 
 
+def _save_location(session, user_id: int, lat: float, lon: float) -> dict:
+    try:
+        db_location = Loaction(
+            user_id=user_id,
+            latitude=lat,
+            longitude=lon
+        )
+        session.add(db_location)
+        session.commit()
+        session.refresh(db_location)
+        print(f"✓ Location for user {user_id} saved to database")
+        return {
+            "id": db_location.id,
+            "user_id": db_location.user_id,
+            "latitude": db_location.latitude,
+            "longitude": db_location.longitude,
+            "timestamp": db_location.timestamp 
+        }
+    except Exception as db_err:
+        session.rollback()
+        print(f"⚠ Database error: {db_err}")
+        raise
+
+
+def _user_locations(session, user_id: int) -> list:
+    q = session.query(Loaction).filter(Loaction.user_id == user_id)
+    locations = q.all()
+    result = []
+    for loc in locations:
+        result.append({
+            "id": loc.id,
+            "user_id": loc.user_id,
+            "latitude": loc.latitude,
+            "longitude": loc.longitude,
+            "timestamp": loc.timestamp
+        })
+    return result
+
+
 @router.post("/locations")
-def log_location(location: LocationCreate, user: dict = Depends(get_current_user)):
+async def log_location(location: LocationCreate, user: dict = Depends(get_current_user), db=Depends(get_db)):
     # create_location(location, user)
     try:
-        from app.core.database import SessionLocal
-        from app.modules.locations.models import Loaction
-        session = SessionLocal()
         try:
-           
-            try:
-                lat = float(location.latitude)
-                lon = float(location.longitude)
-            except Exception:
-                raise ValueError("latitude and longitude must be numeric")
+            lat = float(location.latitude)
+            lon = float(location.longitude)
+        except Exception:
+            raise ValueError("latitude and longitude must be numeric")
 
-            db_location = Loaction(
-                user_id=user['id'],
-                latitude=lat,
-                longitude=lon
-            )
-            session.add(db_location)
-            session.commit()
-            session.refresh(db_location)
-            print(f"✓ Location for user {user['id']} saved to database")
-            return {
-                "id": db_location.id,
-                "user_id": db_location.user_id,
-                "latitude": db_location.latitude,
-                "longitude": db_location.longitude,
-                "timestamp": db_location.timestamp 
-            }
-        except Exception as db_err:
-            session.rollback()
-            print(f"⚠ Database error: {db_err}")
-            raise
-        finally:
-            session.close()
+        return await run_db(db, _save_location, user['id'], lat, lon)
     except Exception as e:
         print(f"⚠ Could not save location: {e}")
         raise
 
 @router.get("/locations")
-def get_locations(user: dict = Depends(get_current_user)):
-    from app.core.database import SessionLocal
-   
-    session = SessionLocal()
+async def get_locations(user: dict = Depends(get_current_user), db=Depends(get_db)):
     try:
-        q = session.query(Loaction).filter(Loaction.user_id == user["id"])
-        locations = q.all()
-        result = []
-        for loc in locations:
-            result.append({
-                "id": loc.id,
-                "user_id": loc.user_id,
-                "latitude": loc.latitude,
-                "longitude": loc.longitude,
-                "timestamp": loc.timestamp
-            })
-        return result
+        return FastJSONResponse(await run_db(db, _user_locations, user["id"]))
     except Exception as e:
         print(f"⚠ Error fetching locations: {e}")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Could not fetch locations")
-    finally:
-        session.close()
\ No newline at end of file
@@ -2,7 +2,7 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from typing import List
 
-from app.core.database import SessionLocal
+from app.core.database import get_db, run_db
 from app.modules.auth.models import User
 from app.modules.food_delivery.model import Restaurant
 from app.modules.order_address_list.models import Address
@@ -30,9 +30,7 @@ def get_address(session: Session, address_id: int):
     return session.query(Address).filter(Address.id == address_id).first()
 
 
-@router.post("/create_user_address", response_model=AddressOut)
-def create_address(payload: AddressBase):
-    session = SessionLocal()
+def _create_address(session: Session, payload: AddressBase) -> AddressOut:
     user = get_user_or_404(session, payload.user_id)
     # rest = get_restaurant_or_404(session, payload.resturant_id)
 
@@ -84,12 +82,15 @@ def create_address(payload: AddressBase):
     session.add(new_addr)
     session.commit()
     session.refresh(new_addr)
-    return new_addr
+    return AddressOut.model_validate(new_addr)
 
 
-@router.get("/users/{user_id}/addresses", response_model=List[AddressOut])
-def list_user_addresses(user_id: int, limit: int = 50, offset: int = 0):
-    session = SessionLocal()
+@router.post("/create_user_address", response_model=AddressOut)
+async def create_address(payload: AddressBase, db=Depends(get_db)):
+    return await run_db(db, _create_address, payload)
+
+
+def _list_user_addresses(session: Session, user_id: int, limit: int, offset: int) -> List[AddressOut]:
     user = session.query(User).filter(User.id == user_id).first()
     if not user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
@@ -101,22 +102,30 @@ def list_user_addresses(user_id: int, limit: int = 50, offset: int = 0):
         .limit(limit)
         .offset(offset)
     )
-    return query.all()
+    return [AddressOut.model_validate(a) for a in query.all()]
 
-@router.delete("/delete_address/{address_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_address(address_id: int):
-    session = SessionLocal()
+
+@router.get("/users/{user_id}/addresses", response_model=List[AddressOut])
+async def list_user_addresses(user_id: int, limit: int = 50, offset: int = 0, db=Depends(get_db)):
+    return await run_db(db, _list_user_addresses, user_id, limit, offset)
+
+
+def _delete_address(session: Session, address_id: int) -> None:
     addr = get_address(session, address_id)
     if not addr:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Address not found")
 
     session.delete(addr)
     session.commit()
+
+
+@router.delete("/delete_address/{address_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_address(address_id: int, db=Depends(get_db)):
+    await run_db(db, _delete_address, address_id)
     return
 
-@router.post("/set_default_address/{address_id}", response_model=AddressOut )   
-def set_default_address(address_id: int):
-    session = SessionLocal()
+
+def _set_default_address(session: Session, address_id: int) -> AddressOut:
     addr = get_address(session, address_id)
     if not addr:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Address not found")
@@ -128,10 +137,15 @@ def set_default_address(address_id: int):
     addr.is_default = True
     session.commit()
     session.refresh(addr)
-    return addr
-@router.put("/update_address/{address_id}", response_model=AddressOut)
-def update_address(address_id: int, payload: AddressBase):
-    session = SessionLocal()
+    return AddressOut.model_validate(addr)
+
+
+@router.post("/set_default_address/{address_id}", response_model=AddressOut )   
+async def set_default_address(address_id: int, db=Depends(get_db)):
+    return await run_db(db, _set_default_address, address_id)
+
+
+def _update_address(session: Session, address_id: int, payload: AddressBase) -> AddressOut:
     addr = get_address(session, address_id)
     if not addr:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Address not found")
@@ -141,4 +155,9 @@ def update_address(address_id: int, payload: AddressBase):
 
     session.commit()
     session.refresh(addr)
-    return addr
\ No newline at end of file
+    return AddressOut.model_validate(addr)
+
+
+@router.put("/update_address/{address_id}", response_model=AddressOut)
+async def update_address(address_id: int, payload: AddressBase, db=Depends(get_db)):
+    return await run_db(db, _update_address, address_id, payload)
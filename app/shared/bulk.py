@@ -0,0 +1,117 @@
+"""Streaming readers shared by the bulk import endpoints and scripts.
+
+Records are yielded one at a time from any iterable of text lines (an open
+file, an uploaded file wrapped in ``io.TextIOWrapper``), so input size is
+bounded by disk, not memory.
+"""
+import csv
+import io
+import json
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+FORMATS = ("csv", "ndjson")
+
+
+class RecordError(ValueError):
+    """A line that could not be parsed into a record."""
+
+
+def detect_format(filename: Optional[str] = None, content_type: Optional[str] = None) -> str:
+    name = (filename or "").lower()
+    ctype = (content_type or "").lower()
+    if name.endswith((".ndjson", ".jsonl")) or "ndjson" in ctype or "jsonl" in ctype:
+        return "ndjson"
+    if name.endswith(".csv") or "csv" in ctype:
+        return "csv"
+    raise ValueError("Cannot tell the file format; pass format=csv or format=ndjson")
+
+
+def text_stream(binary) -> io.TextIOWrapper:
+    """Wrap a binary file object (e.g. ``UploadFile.file``) for line reading."""
+    return io.TextIOWrapper(binary, encoding="utf-8-sig", newline="")
+
+
+def iter_records(lines: Iterable[str], fmt: str) -> Iterator[Tuple[int, Any]]:
+    """Yield ``(row_number, record)`` pairs; ``record`` is a dict, or a
+    ``RecordError`` for a line that does not parse. CSV rows are numbered
+    from the first data line (header is row 0), NDJSON from 1; blank lines
+    are skipped but still counted."""
+    if fmt == "csv":
+        reader = csv.DictReader(lines)
+        for row in reader:
+            row_number = reader.line_num - 1
+            if None in row:
+                yield row_number, RecordError("Too many columns")
+                continue
+            # empty CSV cells mean "not given"
+            yield row_number, {k: v for k, v in row.items() if k and v not in ("", None)}
+    elif fmt == "ndjson":
+        for row_number, line in enumerate(lines, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                yield row_number, RecordError(f"Invalid JSON: {e}")
+                continue
+            if not isinstance(record, dict):
+                yield row_number, RecordError("Expected a JSON object")
+                continue
+            yield row_number, record
+    else:
+        raise ValueError(f"Unsupported format {fmt!r}; expected one of {FORMATS}")
+
+
+def split_list(value: Any) -> List[str]:
+    """List-valued cells: JSON arrays pass through, CSV cells use ``;``."""
+    if value is None:
+        return []
+    if isinstance(value, list):
+        return value
+    return [part.strip() for part in str(value).split(";") if part.strip()]
+
+
+def chunked(iterable: Iterable, size: int) -> Iterator[list]:
+    it = iter(iterable)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def validation_message(err) -> str:
+    """Flatten a pydantic ValidationError into one line for a row report."""
+    parts = []
+    for e in err.errors():
+        loc = ".".join(str(p) for p in e.get("loc", ()))
+        parts.append(f"{loc}: {e.get('msg')}" if loc else e.get("msg", ""))
+    return "; ".join(parts)
+
+
+class ImportReport:
+    """Counts plus per-row errors. Only the first ``max_errors`` errors are
+    kept so a completely broken file cannot blow up the response."""
+
+    def __init__(self, max_errors: int = 1000):
+        self.max_errors = max_errors
+        self.total = 0
+        self.inserted = 0
+        self.failed = 0
+        self.errors: List[Dict[str, Any]] = []
+
+    def error(self, row: int, message: str, **extra) -> None:
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({"row": row, "error": message, **extra})
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "total": self.total,
+            "inserted": self.inserted,
+            "failed": self.failed,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors),
+        }
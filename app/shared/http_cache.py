@@ -0,0 +1,99 @@
+"""Conditional GET: ETag / Last-Modified validators, 304s and Cache-Control.
+
+``If-None-Match`` wins over ``If-Modified-Since`` when a request sends both
+(RFC 9110 13.2.2); Last-Modified only has one-second resolution, so clients
+that keep the ETag get exact revalidation. ETags are compared without the
+content-encoding suffix compressed variants carry (see
+``app.core.compression``).
+"""
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Dict, Mapping, Optional, Union
+
+from fastapi import Response
+
+from app.core.compression import CompressedBody, encoded_etag, strip_encoding
+from app.core.config import CATALOG_CACHE_CONTROL
+
+
+def body_etag(body: bytes) -> str:
+    """Strong ETag from the exact response bytes."""
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def version_etag(*parts) -> str:
+    """Strong ETag from whatever versions the body; ``datetime`` parts are
+    used at full (microsecond) resolution."""
+    return '"' + "-".join(
+        p.strftime("%Y%m%d%H%M%S%f") if isinstance(p, datetime) else str(p) for p in parts
+    ) + '"'
+
+
+def is_conditional(headers: Mapping[str, str]) -> bool:
+    return "if-none-match" in headers or "if-modified-since" in headers
+
+
+def _utc(value: datetime) -> datetime:
+    # the models store naive UTC
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+
+def not_modified(headers: Mapping[str, str], etag: str, last_modified: Optional[datetime] = None) -> bool:
+    if_none_match = headers.get("if-none-match")
+    if if_none_match is not None:
+        if if_none_match.strip() == "*":
+            return True
+        # weak comparison: a W/ prefix on either side still matches
+        tags = {strip_encoding(tag.strip().removeprefix("W/")) for tag in if_none_match.split(",")}
+        return strip_encoding(etag.removeprefix("W/")) in tags
+    if_modified_since = headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = _utc(parsedate_to_datetime(if_modified_since))
+        except (TypeError, ValueError):
+            return False
+        return _utc(last_modified).replace(microsecond=0) <= since
+    return False
+
+
+def validator_headers(
+    etag: str, last_modified: Optional[datetime] = None, cache_control: str = CATALOG_CACHE_CONTROL,
+) -> Dict[str, str]:
+    headers = {"ETag": etag}
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(_utc(last_modified), usegmt=True)
+    if cache_control:
+        headers["Cache-Control"] = cache_control
+    return headers
+
+
+def not_modified_response(etag: str, last_modified: Optional[datetime] = None) -> Response:
+    return Response(status_code=304, headers=validator_headers(etag, last_modified))
+
+
+def conditional_response(
+    request_headers: Mapping[str, str],
+    body: Union[bytes, CompressedBody],
+    etag: Optional[str] = None,
+    last_modified: Optional[datetime] = None,
+    media_type: str = "application/json",
+) -> Response:
+    """200 with ``body`` and its validators, or an empty 304 if the request's
+    validators still match. ``etag`` defaults to a hash of ``body``.
+
+    A ``CompressedBody`` is sent in the encoding the client accepts, from its
+    stored variants."""
+    raw = body.body if isinstance(body, CompressedBody) else body
+    etag = etag or body_etag(raw)
+    if not_modified(request_headers, etag, last_modified):
+        return not_modified_response(etag, last_modified)
+    if not isinstance(body, CompressedBody):
+        return Response(content=body, media_type=media_type, headers=validator_headers(etag, last_modified))
+    encoding, content = body.for_request(request_headers.get("accept-encoding"))
+    if encoding is None:
+        return Response(content=content, media_type=media_type, headers=validator_headers(etag, last_modified))
+    headers = validator_headers(encoded_etag(etag, encoding), last_modified)
+    headers["Content-Encoding"] = encoding
+    headers["Vary"] = "Accept-Encoding"
+    return Response(content=content, media_type=media_type, headers=headers)
@@ -0,0 +1,107 @@
+"""Compare requests/sec of the sync (threadpool) and async (DB_ASYNC=1) database paths.
+
+Starts one uvicorn server per mode against the configured DATABASE_URL, then
+hammers a read endpoint with many concurrent clients.
+
+    python scripts/bench_db_modes.py --concurrency 500 --requests 20000
+    python scripts/bench_db_modes.py --path /food_delivery/restaurants_data/1
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def start_server(port: int, async_mode: bool) -> subprocess.Popen:
+    env = dict(os.environ, DB_ASYNC="1" if async_mode else "0")
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1",
+         "--port", str(port), "--log-level", "warning"],
+        cwd=project_root,
+        env=env,
+    )
+
+
+async def wait_ready(base_url: str, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get(base_url + "/")).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"server at {base_url} did not come up")
+
+
+async def run_load(base_url: str, path: str, concurrency: int, total: int) -> dict:
+    latencies = []
+    errors = 0
+    remaining = total
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60.0) as client:
+        async def worker():
+            nonlocal remaining, errors
+            while remaining > 0:
+                remaining -= 1
+                t0 = time.perf_counter()
+                try:
+                    resp = await client.get(path)
+                    if resp.status_code >= 500:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append(time.perf_counter() - t0)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "rps": len(latencies) / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+        "errors": errors,
+    }
+
+
+async def bench_mode(async_mode: bool, args) -> dict:
+    proc = start_server(args.port, async_mode)
+    base_url = f"http://127.0.0.1:{args.port}"
+    try:
+        await wait_ready(base_url)
+        # warm up the pool and the interpreter before measuring
+        await run_load(base_url, args.path, min(args.concurrency, 50), 500)
+        return await run_load(base_url, args.path, args.concurrency, args.requests)
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--path", default="/food_delivery/all_restaurants")
+    parser.add_argument("--concurrency", type=int, default=500)
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    print(f"GET {args.path}  concurrency={args.concurrency}  requests={args.requests}")
+    for label, async_mode in (("sync ", False), ("async", True)):
+        r = asyncio.run(bench_mode(async_mode, args))
+        print(f"{label}  {r['rps']:8.1f} req/s   p50 {r['p50_ms']:7.1f} ms   "
+              f"p99 {r['p99_ms']:7.1f} ms   errors {r['errors']}")
+
+
+if __name__ == "__main__":
+    main()
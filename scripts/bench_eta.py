@@ -0,0 +1,113 @@
+"""Latency of batched delivery ETAs (``/food_delivery/eta``) against a budget.
+
+Loads a synthetic location index (``--restaurants`` restaurants with 1-4
+branches each around one city) and prep-time cache, then times ETAs for
+``--batch`` random restaurants to random delivery points:
+
+  * ``eta.estimate``, the vectorized pass the endpoint runs;
+  * a per-restaurant loop (``math`` haversine per branch, a dict of prep
+    times), for comparison.
+
+Fails (exit status 1) when the p99 of ``estimate`` is over ``--budget-ms``.
+No database needed; the endpoint adds one indexed read of the address.
+
+    python scripts/bench_eta.py
+    python scripts/bench_eta.py --restaurants 200000 --batch 500 --budget-ms 5
+"""
+import argparse
+import math
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import ETA_DEFAULT_PREP_MINUTES, ETA_HANDOFF_MINUTES  # noqa: E402
+from app.modules.food_delivery.eta import estimate, prep_times, travel_minutes  # noqa: E402
+from app.modules.food_delivery.geo import EARTH_RADIUS_KM, location_index  # noqa: E402
+
+CENTER = (12.97, 77.59)
+
+
+def seed(restaurants: int, rng):
+    branches = rng.integers(1, 5, restaurants)
+    owners = np.repeat(np.arange(1, restaurants + 1), branches)
+    lats = CENTER[0] + rng.normal(0, 0.15, len(owners))
+    lons = CENTER[1] + rng.normal(0, 0.15, len(owners))
+    location_index.load(zip(range(1, len(owners) + 1), owners.tolist(), lats.tolist(), lons.tolist()))
+    with_times = np.flatnonzero(rng.random(restaurants) < 0.8) + 1
+    median = rng.uniform(8, 35, len(with_times))
+    prep_times.load(zip(with_times.tolist(), median.tolist(), (median * rng.uniform(1.1, 1.8, len(median))).tolist()))
+
+    branches_of = {}
+    for location_id, rid, lat, lon in zip(range(1, len(owners) + 1), owners.tolist(), lats.tolist(), lons.tolist()):
+        branches_of.setdefault(rid, []).append((location_id, lat, lon))
+    return branches_of, dict(zip(with_times.tolist(), median.tolist()))
+
+
+def loop_estimate(lat, lon, restaurant_ids, branches_of, prep_of):
+    out = []
+    for rid in restaurant_ids:
+        best = None
+        for location_id, blat, blon in branches_of.get(rid, ()):
+            p1, p2 = math.radians(lat), math.radians(blat)
+            a = math.sin((p2 - p1) / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(math.radians(blon - lon) / 2) ** 2
+            d = 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(min(a, 1.0)))
+            if best is None or d < best[1]:
+                best = (location_id, d)
+        if best is not None:
+            prep = prep_of.get(rid, ETA_DEFAULT_PREP_MINUTES)
+            out.append({"restaurant_id": rid, "location_id": best[0],
+                        "eta_minutes": math.ceil(prep + ETA_HANDOFF_MINUTES + float(travel_minutes(best[1])))})
+    return out
+
+
+def timings(fn, requests) -> np.ndarray:
+    for args in requests[:20]:  # warm-up
+        fn(*args)
+    ms = []
+    for args in requests:
+        started = time.perf_counter()
+        fn(*args)
+        ms.append((time.perf_counter() - started) * 1000)
+    return np.array(ms)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--restaurants", type=int, default=50_000)
+    parser.add_argument("--batch", type=int, default=500)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--budget-ms", type=float, default=10.0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(11)
+    branches_of, prep_of = seed(args.restaurants, rng)
+    print(f"{location_index.size} branches of {args.restaurants} restaurants, "
+          f"{prep_times.stats['restaurants']} with prep times; {args.batch} restaurants per request")
+    requests = [
+        (CENTER[0] + rng.normal(0, 0.1), CENTER[1] + rng.normal(0, 0.1),
+         rng.choice(args.restaurants, args.batch, replace=False) + 1)
+        for _ in range(args.requests)
+    ]
+    vectorized = [(lat, lon, ids.tolist()) for lat, lon, ids in requests]
+    assert [e["eta_minutes"] for e in estimate(*vectorized[0])] == \
+        [e["eta_minutes"] for e in loop_estimate(*vectorized[0], branches_of, prep_of)], "ETAs differ"
+
+    p99 = None
+    for label, fn in (("eta.estimate (vectorized)", estimate),
+                      ("per-restaurant loop", lambda lat, lon, ids: loop_estimate(lat, lon, ids, branches_of, prep_of))):
+        ms = timings(fn, vectorized)
+        p99 = p99 if p99 is not None else np.percentile(ms, 99)
+        print(f"  {label:<28} p50 {np.percentile(ms, 50):7.3f} ms  p99 {np.percentile(ms, 99):7.3f} ms  "
+              f"max {ms.max():7.3f} ms")
+
+    within = p99 <= args.budget_ms
+    print(f"p99 {p99:.3f} ms {'within' if within else 'OVER'} the {args.budget_ms:g} ms budget")
+    sys.exit(0 if within else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""Serialization cost of hand-built response payloads, old path vs FastJSONResponse.
+
+Builds the payloads the list endpoints return, ``--restaurants`` restaurant
+rows (a ``/food_delivery/all_restaurants`` page) and ``--users`` admin user
+rows (``/admin/users``), and times turning each into response bytes:
+
+  * FastAPI's path for a handler returning a dict: ``jsonable_encoder`` then
+    ``json.dumps`` (``JSONResponse``);
+  * for the users, the ``response_model=List[UserOut]`` path: validate every
+    row against the model, serialize it back, then ``json.dumps``;
+  * ``FastJSONResponse``, i.e. what a handler returning it directly costs;
+  * ``orjson.dumps`` for reference, when orjson is installed.
+
+No database needed.
+
+    python scripts/bench_json_responses.py
+    python scripts/bench_json_responses.py --users 50000 --repeat 20
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+from fastapi.routing import serialize_response  # noqa: E402
+from fastapi.utils import create_model_field  # noqa: E402
+
+from app.core.responses import FastJSONResponse  # noqa: E402
+from app.modules.auth.schemas import UserOut  # noqa: E402
+from app.shared.pagination import page_response  # noqa: E402
+
+
+def restaurant_rows(n: int) -> dict:
+    start = datetime(2024, 1, 1)
+    rows = [
+        {
+            "id": i,
+            "name": f"Restaurant {i}",
+            "cuisine_type": "Indian",
+            "phone_number": f"+9198{i:08d}",
+            "email": f"r{i}@example.com",
+            "logo_url": f"https://cdn.example.com/logos/{i}.png",
+            "banner_url": None,
+            "status": "open",
+            "is_favorite": i % 7 == 0,
+            "created_at": start + timedelta(minutes=i),
+        }
+        for i in range(n)
+    ]
+    return page_response(rows, (rows[-1]["created_at"], rows[-1]["id"]))
+
+
+def user_rows(n: int) -> list:
+    start = datetime(2024, 1, 1)
+    return [
+        {
+            "id": i,
+            "email": f"user{i}@example.com",
+            "username": f"user{i}",
+            "first_name": "First",
+            "last_name": None,
+            "phone_number": f"+9190{i:08d}",
+            "role": "user",
+            "status": "active",
+            "is_email_verified": i % 2 == 0,
+            "roles": ["user"],
+            "created_at": start + timedelta(seconds=i),
+            "updated_at": start + timedelta(seconds=i),
+            "last_login": None if i % 3 else start + timedelta(days=1, seconds=i),
+        }
+        for i in range(n)
+    ]
+
+
+def time_it(fn, repeat: int):
+    fn()  # warm-up
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        body = fn()
+        timings.append(time.perf_counter() - started)
+    return np.array(timings) * 1000, body
+
+
+def report(label: str, fn, repeat: int, baseline=None):
+    ms, body = time_it(fn, repeat)
+    p50 = np.percentile(ms, 50)
+    speedup = f"  {baseline / p50:5.1f}x" if baseline else ""
+    print(f"  {label:<40} p50 {p50:8.2f} ms  p99 {np.percentile(ms, 99):8.2f} ms  {len(body) / 1024:8.0f} KB{speedup}")
+    return p50, body
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--restaurants", type=int, default=1000)
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    try:
+        import orjson
+    except ImportError:
+        orjson = None
+
+    restaurants = restaurant_rows(args.restaurants)
+    users = user_rows(args.users)
+    users_field = create_model_field("Response_list_all_users", List[UserOut], mode="serialization")
+    loop = asyncio.new_event_loop()
+
+    def with_response_model(rows):
+        content = loop.run_until_complete(serialize_response(field=users_field, response_content=rows))
+        return JSONResponse(content).body
+
+    for label, payload in ((f"{args.restaurants} restaurants", restaurants), (f"{args.users} users", users)):
+        print(f"{label}:")
+        baseline, old = report("jsonable_encoder + JSONResponse", lambda: JSONResponse(jsonable_encoder(payload)).body, args.repeat)
+        if payload is users:
+            report("response_model validation + JSONResponse", lambda: with_response_model(users), args.repeat, baseline)
+        _, new = report("FastJSONResponse", lambda: FastJSONResponse(payload).body, args.repeat, baseline)
+        if orjson is not None:
+            report("orjson.dumps (reference)", lambda: orjson.dumps(payload), args.repeat, baseline)
+        assert json.loads(old) == json.loads(new), "FastJSONResponse output differs"
+    loop.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Per-request cost of the metrics middleware and per-statement cost of the SQL hooks.
+
+Wraps a no-op ASGI app so the middleware is the only work being timed, and
+interleaves the variants round by round so CPU frequency drift hits them all
+alike. Reports the best round for each.
+
+    python scripts/bench_metrics_overhead.py
+    python scripts/bench_metrics_overhead.py --requests 50000 --rounds 9
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.metrics import (  # noqa: E402
+    MetricsMiddleware,
+    MetricsRegistry,
+    _after_cursor_execute,
+    _before_cursor_execute,
+)
+
+SCOPE = {"type": "http", "method": "GET", "path": "/bench", "headers": []}
+
+
+async def noop_app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b""})
+
+
+async def receive():
+    return {"type": "http.request", "body": b""}
+
+
+async def send(message):
+    pass
+
+
+async def time_app(app, requests: int) -> float:
+    started = time.perf_counter()
+    for _ in range(requests):
+        await app(dict(SCOPE), receive, send)
+    return (time.perf_counter() - started) / requests
+
+
+class FakeConnection:
+    def __init__(self):
+        self.info = {}
+
+
+def time_hooks(statements: int) -> float:
+    conn = FakeConnection()
+    started = time.perf_counter()
+    for _ in range(statements):
+        _before_cursor_execute(conn, None, "SELECT 1", None, None, False)
+        _after_cursor_execute(conn, None, "SELECT 1", None, None, False)
+    return (time.perf_counter() - started) / statements
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    # METRICS_SAMPLE_RATE=0 does not install the middleware at all
+    variants = {
+        "METRICS_SAMPLE_RATE=0": noop_app,
+        "METRICS_SAMPLE_RATE=0.1": MetricsMiddleware(noop_app, sample_rate=0.1, registry=MetricsRegistry()),
+        "METRICS_SAMPLE_RATE=1": MetricsMiddleware(noop_app, sample_rate=1.0, registry=MetricsRegistry()),
+    }
+    best = {label: float("inf") for label in variants}
+    for _ in range(args.rounds):
+        for label, app in variants.items():
+            best[label] = min(best[label], asyncio.run(time_app(app, args.requests)))
+
+    baseline = best["METRICS_SAMPLE_RATE=0"]
+    print(f"Middleware, best of {args.rounds} x {args.requests} requests:")
+    for label, seconds in best.items():
+        print(f"  {label:<24} {seconds * 1e6:6.2f} us/request  (+{(seconds - baseline) * 1e6:5.2f} us)")
+
+    hook = min(time_hooks(args.requests) for _ in range(args.rounds))
+    print(f"SQL hooks: {hook * 1e6:.2f} us per statement (not installed when the rate is 0)")
+
+
+if __name__ == "__main__":
+    main()
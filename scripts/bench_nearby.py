@@ -0,0 +1,94 @@
+"""Latency of the nearby-restaurants spatial index on synthetic data.
+
+Generates ``--locations`` restaurant locations clustered around a set of city
+centres (Gaussian spread, like real restaurant density), loads them into a
+``LocationIndex`` and times ``nearby`` for random points in those cities.
+A brute-force NumPy scan over every location is timed alongside for
+reference. No database needed.
+
+    python scripts/bench_nearby.py
+    python scripts/bench_nearby.py --locations 100000 --queries 20000 --radius-km 10
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.modules.food_delivery.geo import LocationIndex, haversine_km  # noqa: E402
+
+
+def synthetic_locations(n: int, cities: int, spread_km: float, rng):
+    centres = np.column_stack([rng.uniform(8, 35, cities), rng.uniform(68, 97, cities)])
+    which = rng.integers(0, cities, n)
+    spread_deg = spread_km / 111.0
+    lat = centres[which, 0] + rng.normal(0, spread_deg, n)
+    lon = centres[which, 1] + rng.normal(0, spread_deg, n)
+    # a few restaurants have more than one location
+    restaurant_ids = np.arange(1, n + 1) - rng.binomial(1, 0.1, n)
+    return centres, list(zip(range(1, n + 1), restaurant_ids.tolist(), lat.tolist(), lon.tolist()))
+
+
+def percentiles(samples):
+    arr = np.array(samples) * 1000
+    return {p: float(np.percentile(arr, p)) for p in (50, 95, 99)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--locations", type=int, default=100_000)
+    parser.add_argument("--cities", type=int, default=40)
+    parser.add_argument("--spread-km", type=float, default=8.0)
+    parser.add_argument("--queries", type=int, default=10_000)
+    parser.add_argument("--radius-km", type=float, default=5.0)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    centres, rows = synthetic_locations(args.locations, args.cities, args.spread_km, rng)
+
+    index = LocationIndex()
+    started = time.perf_counter()
+    index.load(rows)
+    print(f"Built index over {args.locations} locations in {(time.perf_counter() - started) * 1000:.0f} ms "
+          f"({len(index._grid.cells)} occupied cells)")
+
+    which = rng.integers(0, args.cities, args.queries)
+    q_lat = centres[which, 0] + rng.normal(0, args.spread_km / 111.0, args.queries)
+    q_lon = centres[which, 1] + rng.normal(0, args.spread_km / 111.0, args.queries)
+
+    for lat, lon in zip(q_lat[:200], q_lon[:200]):  # warm-up
+        index.nearby(lat, lon, args.radius_km, args.limit)
+    timings, found = [], 0
+    for lat, lon in zip(q_lat, q_lon):
+        started = time.perf_counter()
+        found += len(index.nearby(lat, lon, args.radius_km, args.limit))
+        timings.append(time.perf_counter() - started)
+    p = percentiles(timings)
+    print(f"Index nearby(radius={args.radius_km} km, limit={args.limit}) over {args.queries} queries: "
+          f"p50 {p[50]:.3f} ms  p95 {p[95]:.3f} ms  p99 {p[99]:.3f} ms  ({found / args.queries:.1f} results avg)")
+
+    all_lat = np.array([r[2] for r in rows])
+    all_lon = np.array([r[3] for r in rows])
+    brute = []
+    for lat, lon in zip(q_lat[:500], q_lon[:500]):
+        started = time.perf_counter()
+        d = haversine_km(lat, lon, all_lat, all_lon)
+        np.sort(d[d <= args.radius_km])
+        brute.append(time.perf_counter() - started)
+    p = percentiles(brute)
+    print(f"Brute-force scan of all locations (500 queries):       p50 {p[50]:.3f} ms  p99 {p[99]:.3f} ms")
+
+    started = time.perf_counter()
+    extra = 1000
+    for n in range(extra):
+        index._grid.add([(args.locations + n + 1, args.locations + n + 1, q_lat[n], q_lon[n])])
+    print(f"Incremental single-location adds: {(time.perf_counter() - started) / extra * 1e6:.1f} us each")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""Page latency of a user's order history against the database in DATABASE_URL.
+
+Seeds a throwaway restaurant and one user with ``--orders`` orders of
+``--lines`` items each, then walks the whole history ``--limit`` orders at a
+time through the cursor-paginated endpoint code, timing every page. The
+same pages are fetched the old way (OFFSET paging, items lazy-loaded per
+order) for comparison. Everything seeded is deleted at the end.
+
+    python scripts/bench_order_history.py
+    python scripts/bench_order_history.py --orders 10000 --limit 50
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import delete, event, insert  # noqa: E402
+
+import app.main  # noqa: E402,F401  (registers every model)
+from app.core.database import SessionLocal, engine  # noqa: E402
+from app.modules.food_delivery import model as m  # noqa: E402
+from app.modules.food_delivery.food_delivery import _user_orders_page  # noqa: E402
+
+
+def seed(orders: int, lines: int, user_id: int):
+    with SessionLocal() as s:
+        category = m.MenuCategory(name="bench")
+        restaurant = m.Restaurant(name=f"bench-{uuid.uuid4().hex[:8]}")
+        s.add_all([category, restaurant])
+        s.flush()
+        location = m.RestaurantLocation(restaurant_id=restaurant.id, latitude=12.97, longitude=77.59)
+        items = [m.MenuItem(restaurant_id=restaurant.id, category_id=category.id, name=f"dish {n}", price=100 + n)
+                 for n in range(50)]
+        s.add_all([location, *items])
+        s.commit()
+        restaurant_id, category_id, location_id = restaurant.id, category.id, location.id
+        item_ids = [i.id for i in items]
+
+    started = datetime.utcnow() - timedelta(days=3 * 365)
+    with engine.begin() as conn:
+        order_ids = conn.execute(
+            insert(m.FoodOrder).returning(m.FoodOrder.id, sort_by_parameter_order=True),
+            [
+                {"user_id": user_id, "restaurant_id": restaurant_id, "restaurant_location_id": location_id,
+                 "total_amount": 0, "status": "delivered",
+                 "created_at": started + timedelta(hours=n), "updated_at": started + timedelta(hours=n)}
+                for n in range(orders)
+            ],
+        ).scalars().all()
+        conn.execute(insert(m.OrderItem), [
+            {"order_id": order_id, "menu_item_id": item_id, "quantity": 1, "price_per_item": 1, "total_price": 1}
+            for order_id in order_ids for item_id in random.sample(item_ids, lines)
+        ])
+    return restaurant_id, category_id
+
+
+def baseline_page(session, user_id: int, limit: int, offset: int) -> list:
+    """OFFSET paging on the single-column index, one lazy load per order and
+    per menu item."""
+    orders = (
+        session.query(m.FoodOrder).filter_by(user_id=user_id)
+        .order_by(m.FoodOrder.created_at.desc(), m.FoodOrder.id.desc()).offset(offset).limit(limit).all()
+    )
+    return [
+        {"id": o.id, "items": [{"menu_item_id": i.menu_item_id, "name": i.menu_item.name} for i in o.items]}
+        for o in orders
+    ]
+
+
+def report(label: str, timings: list, statements: int, pages: int) -> None:
+    ms = np.array(timings) * 1000
+    print(f"  {label:<28} p50 {np.percentile(ms, 50):7.2f} ms  p99 {np.percentile(ms, 99):7.2f} ms  "
+          f"max {ms.max():7.2f} ms  {statements / pages:6.1f} statements/page")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--orders", type=int, default=5000)
+    parser.add_argument("--lines", type=int, default=3, help="items per order")
+    parser.add_argument("--limit", type=int, default=20, help="orders per page")
+    args = parser.parse_args()
+
+    user_id = random.randint(10**8, 2 * 10**8)
+    restaurant_id, category_id = seed(args.orders, args.lines, user_id)
+    statements = []
+    listener = lambda *a: statements.append(1)  # noqa: E731
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        print(f"User with {args.orders} orders x {args.lines} items, {args.limit} orders per page:")
+        with SessionLocal() as session:
+            _user_orders_page(session, user_id, args.limit, None, None)  # warm-up
+            statements.clear()
+            timings, after, pages = [], None, 0
+            while True:
+                started = time.perf_counter()
+                rows, after = _user_orders_page(session, user_id, args.limit, after, None)
+                timings.append(time.perf_counter() - started)
+                pages += 1
+                session.rollback()
+                if after is None:
+                    break
+            report("keyset + batched items", timings, len(statements), pages)
+
+            statements.clear()
+            timings = []
+            # every 10th page is enough to show the trend of the old path
+            sampled = range(0, args.orders, args.limit * 10)
+            for offset in sampled:
+                started = time.perf_counter()
+                baseline_page(session, user_id, args.limit, offset)
+                timings.append(time.perf_counter() - started)
+                session.expunge_all()
+                session.rollback()
+            report("offset + lazy loads baseline", timings, len(statements), len(sampled))
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+        with engine.begin() as conn:
+            conn.execute(delete(m.Restaurant).where(m.Restaurant.id == restaurant_id))  # cascades
+            conn.execute(delete(m.MenuCategory).where(m.MenuCategory.id == category_id))
+
+
+if __name__ == "__main__":
+    main()
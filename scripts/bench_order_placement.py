@@ -0,0 +1,130 @@
+"""Orders/sec of the order engine against the database in DATABASE_URL.
+
+Seeds a throwaway restaurant (two branches, ``--menu-size`` items), then places
+``--orders`` orders of ``--lines`` random items from ``--concurrency`` threads,
+each with its own session. The same workload runs through a per-row ORM
+baseline (one lookup per item, one ORM object per line) for comparison.
+Everything seeded, orders included, is deleted at the end. With a durable
+commit per order the WAL flush usually dominates; ``--async-commit`` takes it
+out to compare the work each approach does per order.
+
+    python scripts/bench_order_placement.py
+    python scripts/bench_order_placement.py --orders 5000 --concurrency 8
+"""
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import delete, event  # noqa: E402
+
+import app.main  # noqa: E402,F401  (registers every model)
+from app.core.database import SessionLocal, engine  # noqa: E402
+from app.modules.food_delivery import model as m  # noqa: E402
+from app.modules.food_delivery.orders import place_order  # noqa: E402
+from app.modules.food_delivery.schemas import FoodOrderCreate  # noqa: E402
+
+
+def seed(menu_size: int):
+    with SessionLocal() as s:
+        category = m.MenuCategory(name="bench")
+        restaurant = m.Restaurant(name=f"bench-{uuid.uuid4().hex[:8]}")
+        s.add_all([category, restaurant])
+        s.flush()
+        s.add_all([
+            m.RestaurantLocation(restaurant_id=restaurant.id, latitude=12.97, longitude=77.59),
+            m.RestaurantLocation(restaurant_id=restaurant.id, latitude=13.03, longitude=77.63),
+        ])
+        items = [m.MenuItem(restaurant_id=restaurant.id, category_id=category.id, name=f"dish {n}",
+                            price=round(random.uniform(50, 400), 2)) for n in range(menu_size)]
+        s.add_all(items)
+        s.commit()
+        return restaurant.id, category.id, [i.id for i in items]
+
+
+def baseline_order(session, payload: FoodOrderCreate) -> int:
+    """One query per concern, ORM objects per line."""
+    lines = []
+    for line in payload.items:
+        item = session.get(m.MenuItem, line.menu_item_id)
+        if item is None or item.restaurant_id != payload.restaurant_id or not item.is_available:
+            raise ValueError("invalid item")
+        lines.append((item, line.quantity))
+    location = session.query(m.RestaurantLocation).filter_by(restaurant_id=payload.restaurant_id).first()
+    order = m.FoodOrder(user_id=payload.user_id, restaurant_id=payload.restaurant_id,
+                        restaurant_location_id=location.id,
+                        total_amount=sum(i.price * q for i, q in lines))
+    session.add(order)
+    session.flush()
+    for item, quantity in lines:
+        session.add(m.OrderItem(order_id=order.id, menu_item_id=item.id, quantity=quantity,
+                                price_per_item=item.price, total_price=item.price * quantity))
+    session.commit()
+    return order.id
+
+
+def engine_order(session, payload: FoodOrderCreate) -> int:
+    return place_order(session, payload)["order_id"]
+
+
+def run(label, place, payloads, concurrency: int, statements: list, async_commit: bool):
+    local = threading.local()
+
+    def one(payload):
+        session = getattr(local, "session", None)
+        if session is None:
+            session = local.session = SessionLocal()
+            if async_commit:
+                session.connection().exec_driver_sql("SET synchronous_commit TO off")
+                session.commit()
+        return place(session, payload)
+
+    statements.clear()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        list(pool.map(one, payloads))
+    elapsed = time.perf_counter() - started
+    print(f"  {label:<22} {len(payloads) / elapsed:8.0f} orders/s   "
+          f"{len(statements) / len(payloads):5.1f} statements/order")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--orders", type=int, default=2000)
+    parser.add_argument("--lines", type=int, default=5, help="menu items per order")
+    parser.add_argument("--menu-size", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--async-commit", action="store_true",
+                        help="SET synchronous_commit TO off, to take the WAL flush out of the timing")
+    args = parser.parse_args()
+
+    restaurant_id, category_id, item_ids = seed(args.menu_size)
+    statements = []
+    listener = lambda *a: statements.append(1)  # noqa: E731
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        payloads = [
+            FoodOrderCreate(user_id=1, restaurant_id=restaurant_id, delivery_address="bench",
+                            items=[{"menu_item_id": i, "quantity": random.randint(1, 3)}
+                                   for i in random.sample(item_ids, args.lines)])
+            for _ in range(args.orders)
+        ]
+        print(f"{args.orders} orders x {args.lines} lines, {args.concurrency} threads"
+              f"{', synchronous_commit off' if args.async_commit else ''}:")
+        run("per-row ORM baseline", baseline_order, payloads, args.concurrency, statements, args.async_commit)
+        run("order engine", engine_order, payloads, args.concurrency, statements, args.async_commit)
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+        with engine.begin() as conn:
+            conn.execute(delete(m.Restaurant).where(m.Restaurant.id == restaurant_id))  # cascades
+            conn.execute(delete(m.MenuCategory).where(m.MenuCategory.id == category_id))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""Idle-connection capacity and fan-out latency of the live order streams.
+
+Starts one uvicorn worker, opens ``--connections`` streams (SSE or WebSocket)
+spread over the order events of ``--restaurants`` restaurants and holds them
+idle for ``--idle`` seconds with a short heartbeat, then checks every stream
+is still open. It then publishes ``--events`` status events through
+``pg_notify``, the same path real order writes take, each to one restaurant,
+and times how long each one takes to reach that restaurant's streams. With
+the default single restaurant every event fans out to every connection.
+Reports the worker's resident memory per open stream.
+
+Needs the database in DATABASE_URL and an open-file limit above the
+connection count (``ulimit -n``). Streams authenticate with an admin access
+token minted from SECRET_KEY.
+
+    python scripts/bench_order_streams.py
+    python scripts/bench_order_streams.py --connections 10000 --kind ws --idle 60
+    python scripts/bench_order_streams.py --restaurants 100
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import func, select  # noqa: E402
+
+from app.core.database import engine  # noqa: E402
+from app.modules.auth.security import create_user_access_token  # noqa: E402
+from app.modules.food_delivery import model as m  # noqa: E402
+from app.modules.food_delivery.order_events import CHANNEL  # noqa: E402
+
+
+def rss_mb(pid: int) -> float:
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+class Stream:
+    """One client connection; records when each benchmark event arrived."""
+
+    def __init__(self):
+        self.arrivals = {}
+        self.heartbeats = 0
+        self.closed = False
+
+    def received(self, payload: bytes) -> None:
+        seq = json.loads(payload).get("status", "")
+        if seq.startswith("bench-"):
+            self.arrivals[int(seq[6:])] = time.perf_counter()
+
+
+async def open_sse(host: str, port: int, path: str, token: str, stream: Stream):
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: {host}\r\nAccept: text/event-stream\r\n"
+                 f"Authorization: Bearer {token}\r\n\r\n".encode())
+    head = await reader.readuntil(b"\r\n\r\n")
+    if b" 200 " not in head.split(b"\r\n", 1)[0]:
+        raise RuntimeError(head.split(b"\r\n", 1)[0].decode())
+
+    async def consume():
+        try:
+            while line := await reader.readline():
+                if line.startswith(b"data: "):
+                    stream.received(line[6:])
+                elif line.startswith(b": heartbeat"):
+                    stream.heartbeats += 1
+        finally:
+            stream.closed = True
+
+    return asyncio.create_task(consume()), writer.close
+
+
+async def open_ws(host: str, port: int, path: str, token: str, stream: Stream):
+    import websockets
+
+    ws = await websockets.connect(f"ws://{host}:{port}{path}?token={token}", open_timeout=60, ping_interval=None)
+
+    async def consume():
+        try:
+            async for message in ws:
+                stream.received(message.encode() if isinstance(message, str) else message)
+        finally:
+            stream.closed = True
+
+    return asyncio.create_task(consume()), ws.transport.close
+
+
+async def run(args, server_pid: int, restaurant_ids):
+    opener, suffix = (open_sse, "events") if args.kind == "sse" else (open_ws, "ws")
+    streams = [Stream() for _ in range(args.connections)]
+    paths = [f"/food_delivery/restaurants/{restaurant_ids[n % len(restaurant_ids)]}/orders/{suffix}"
+             for n in range(args.connections)]
+    token = create_user_access_token({"id": 0, "username": "bench", "roles": ["admin"], "phone_number": "bench"}, 0)
+    handles = []
+    base_rss = rss_mb(server_pid)
+
+    started = time.perf_counter()
+    for start in range(0, args.connections, args.connect_batch):
+        batch = range(start, min(start + args.connect_batch, args.connections))
+        handles += await asyncio.gather(*(opener(args.host, args.port, paths[n], token, streams[n]) for n in batch))
+    print(f"Opened {len(handles)} {args.kind.upper()} streams in {time.perf_counter() - started:.1f} s")
+    await asyncio.sleep(1)
+    held_rss = rss_mb(server_pid)
+    print(f"Worker RSS {base_rss:.0f} MB idle -> {held_rss:.0f} MB with streams open "
+          f"({(held_rss - base_rss) * 1024 / args.connections:.1f} KB per stream)")
+
+    await asyncio.sleep(args.idle)
+    open_streams = sum(not s.closed for s in streams)
+    heartbeats = sum(s.heartbeats for s in streams)
+    print(f"After {args.idle:.0f} s idle: {open_streams}/{len(streams)} streams still open, "
+          f"{heartbeats} heartbeats received, worker RSS {rss_mb(server_pid):.0f} MB")
+
+    sent = {}
+    with engine.connect() as conn:
+        for seq in range(args.events):
+            restaurant_id = restaurant_ids[seq % len(restaurant_ids)]
+            payload = json.dumps({"order_id": 0, "restaurant_id": restaurant_id, "status": f"bench-{seq}", "at": ""})
+            sent[seq] = time.perf_counter()
+            conn.execute(select(func.pg_notify(CHANNEL, payload)))
+            conn.commit()
+            await asyncio.sleep(args.event_gap)
+    await asyncio.sleep(2)
+
+    for seq in range(args.events):
+        latencies = np.array([s.arrivals[seq] - sent[seq] for s in streams if seq in s.arrivals]) * 1000
+        expected = sum(1 for n in range(args.connections) if n % len(restaurant_ids) == seq % len(restaurant_ids))
+        if not len(latencies):
+            print(f"event {seq}: delivered to no stream")
+            continue
+        print(f"event {seq}: delivered to {len(latencies)}/{expected} streams, "
+              f"first {latencies.min():.1f} ms  p50 {np.percentile(latencies, 50):.1f} ms  "
+              f"p99 {np.percentile(latencies, 99):.1f} ms  last {latencies.max():.1f} ms")
+
+    for task, close in handles:
+        close()
+        task.cancel()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--connections", type=int, default=10_000)
+    parser.add_argument("--kind", choices=("sse", "ws"), default="sse")
+    parser.add_argument("--restaurants", type=int, default=1, help="spread the streams over this many restaurants")
+    parser.add_argument("--idle", type=float, default=20.0, help="seconds to hold the streams idle")
+    parser.add_argument("--heartbeat", type=float, default=5.0, help="ORDER_EVENTS_HEARTBEAT_SECONDS for the worker")
+    parser.add_argument("--events", type=int, default=5)
+    parser.add_argument("--event-gap", type=float, default=1.0)
+    parser.add_argument("--ws", default="auto", help="uvicorn --ws implementation (auto, websockets, websockets-sansio, wsproto)")
+    parser.add_argument("--connect-batch", type=int, default=500)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8799)
+    args = parser.parse_args()
+
+    with engine.connect() as conn:
+        restaurant_ids = conn.execute(select(m.Restaurant.id).order_by(m.Restaurant.id).limit(args.restaurants)).scalars().all()
+    if len(restaurant_ids) < args.restaurants:
+        sys.exit(f"Needs at least {args.restaurants} restaurants in the database")
+
+    env = dict(
+        os.environ,
+        ORDER_EVENTS_HEARTBEAT_SECONDS=str(args.heartbeat),
+        ORDER_EVENTS_MAX_SUBSCRIBERS=str(args.connections + 100),
+        SLOW_QUERY_MS="60000",  # the connect burst queues on the pool; not what is measured
+    )
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", args.host, "--port", str(args.port),
+         "--log-level", "warning", "--backlog", "4096", "--ws", args.ws],
+        env=env,
+    )
+    try:
+        import httpx
+
+        for _ in range(150):
+            try:
+                httpx.get(f"http://{args.host}:{args.port}/")
+                break
+            except httpx.TransportError:
+                time.sleep(0.2)
+        asyncio.run(run(args, server.pid, restaurant_ids))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Load test for the OTP stores: put / verify / sweep with many outstanding codes.
+
+Fills each backend with --count OTPs, verifies every one of them (half with a
+wrong code first), lets a fraction expire and times the sweep. The memory
+backend also reports its memory footprint.
+
+    python scripts/bench_otp_store.py --count 100000
+    python scripts/bench_otp_store.py --backends memory
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.modules.auth.otp_store import build_otp_store  # noqa: E402
+
+
+def timed(label: str, n: int, fn) -> None:
+    started = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - started
+    print(f"  {label:<22} {elapsed * 1000:9.1f} ms   {n / elapsed:10.0f} ops/s")
+
+
+def memory_footprint(phones) -> int:
+    """Traced allocation of a fresh memory store holding every code."""
+    tracemalloc.start()
+    store = build_otp_store("memory")
+    for phone in phones:
+        store.put(phone, "123456", 3600)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size
+
+
+def bench(backend: str, count: int, expire_fraction: float) -> None:
+    store = build_otp_store(backend)
+    if backend == "database":
+        from app.core.database import init_models
+        init_models()
+        store.sweep()
+
+    phones = [f"+77{i:010d}" for i in range(count)]
+    n_expiring = int(count * expire_fraction)
+    print(f"{backend}: {count} outstanding OTPs, {n_expiring} expiring")
+
+    # long-lived codes first, then the ones that will have expired by the sweep
+    def put_all():
+        for i, phone in enumerate(phones[n_expiring:], start=n_expiring):
+            store.put(phone, f"{i % 1000000:06d}", 3600)
+        for i, phone in enumerate(phones[:n_expiring]):
+            store.put(phone, f"{i % 1000000:06d}", 1)
+
+    timed("put", count, put_all)
+    if backend == "memory":
+        print(f"  {'memory':<22} {memory_footprint(phones) / 1e6:9.1f} MB")
+
+    time.sleep(1.1)
+    swept = []
+    timed("sweep", n_expiring, lambda: swept.append(store.sweep()))
+
+    live = phones[n_expiring:]
+
+    def verify_wrong():
+        for phone in live[::2]:
+            assert not store.verify(phone, "bad")
+
+    def verify_right():
+        for i, phone in enumerate(live, start=n_expiring):
+            assert store.verify(phone, f"{i % 1000000:06d}")
+
+    timed("verify (wrong code)", len(live[::2]), verify_wrong)
+    timed("verify (consume)", len(live), verify_right)
+    print(f"  swept {swept[0]} expired codes, {len(live)} consumed")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=100000)
+    parser.add_argument("--expire-fraction", type=float, default=0.25)
+    parser.add_argument("--backends", nargs="+", default=["memory", "database"])
+    args = parser.parse_args()
+    for backend in args.backends:
+        bench(backend, args.count, args.expire_fraction)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Quotes/sec of the cart quote engine (``/food_delivery/quote``), per core.
+
+Loads a synthetic price table of ``--items`` menu items spread over
+``--restaurants`` restaurants (a few percent unavailable), then prices
+``--quotes`` random carts of each size in ``--lines`` from one thread:
+
+  * ``PriceTable.quote`` alone;
+  * the endpoint's request work around it: validating the JSON body into
+    ``FoodOrderQuote`` and rendering the result with ``FastJSONResponse``.
+
+No database needed: a quote against a warm table runs no statement, so this
+is the whole per-request cost minus the HTTP server.
+
+    python scripts/bench_quotes.py
+    python scripts/bench_quotes.py --items 5000000 --lines 1 10 50
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pydantic_core import to_json  # noqa: E402
+
+from app.core.responses import FastJSONResponse  # noqa: E402
+from app.modules.food_delivery.pricing import PriceTable  # noqa: E402
+from app.modules.food_delivery.schemas import FoodOrderQuote  # noqa: E402
+
+
+def build_table(items: int, restaurants: int, rng) -> PriceTable:
+    ids = np.arange(1, items + 1)
+    owners = rng.integers(1, restaurants + 1, items)
+    prices = np.round(rng.uniform(20, 600, items), 2)
+    available = rng.random(items) > 0.03
+    table = PriceTable()
+    table.load(list(zip(ids.tolist(), owners.tolist(), prices.tolist(), available.tolist())))
+    return table
+
+
+def carts(table: PriceTable, restaurants: int, lines: int, n: int, rng) -> list:
+    out = []
+    while len(out) < n:
+        rid = int(rng.integers(1, restaurants + 1))
+        menu = table._items_of.get(rid)
+        if menu is None:
+            continue
+        picked = rng.choice(menu, size=lines).tolist()
+        out.append({
+            "restaurant_id": rid,
+            "items": [{"menu_item_id": i, "quantity": int(q)} for i, q in zip(picked, rng.integers(1, 4, lines))],
+        })
+    return out
+
+
+def rate(fn, payloads) -> float:
+    for payload in payloads[:100]:  # warm-up
+        fn(payload)
+    started = time.perf_counter()
+    for payload in payloads:
+        fn(payload)
+    return len(payloads) / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=1_000_000)
+    parser.add_argument("--restaurants", type=int, default=20_000)
+    parser.add_argument("--quotes", type=int, default=20_000)
+    parser.add_argument("--lines", type=int, nargs="+", default=[1, 5, 20, 100])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(7)
+    started = time.perf_counter()
+    table = build_table(args.items, args.restaurants, rng)
+    stats = table.stats
+    print(f"price table: {stats['items']} items, {stats['restaurants']} restaurants, "
+          f"{stats['bytes'] / 2**20:.1f} MB, loaded in {time.perf_counter() - started:.2f} s")
+
+    def engine(payload):
+        lines = payload["items"]
+        return table.quote(None, payload["restaurant_id"],
+                           [line["menu_item_id"] for line in lines], [line["quantity"] for line in lines])
+
+    def request(body: bytes):
+        payload = FoodOrderQuote.model_validate_json(body)
+        return FastJSONResponse(table.quote(
+            None, payload.restaurant_id,
+            [line.menu_item_id for line in payload.items], [line.quantity for line in payload.items],
+        )).body
+
+    for lines in args.lines:
+        payloads = carts(table, args.restaurants, lines, args.quotes, rng)
+        bodies = [to_json(p) for p in payloads]
+        quote_rate = rate(engine, payloads)
+        request_rate = rate(request, bodies)
+        print(f"  {lines:>4} lines/cart   quote {quote_rate:9,.0f}/s ({1e6 / quote_rate:6.1f} us)"
+              f"   validate + quote + render {request_rate:9,.0f}/s ({1e6 / request_rate:6.1f} us)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""Registration burst vs. the rest of the API, with bcrypt inline and in the process pool.
+
+For each mode a server is started, a burst of POST /auth/register is fired
+and, at the same time, a steady trickle of requests to another endpoint
+measures how much the burst hurts unrelated traffic.
+
+    python scripts/bench_registration_burst.py --registrations 400 --concurrency 100
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import time
+import uuid
+
+import httpx
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def start_server(port: int, env_overrides: dict) -> subprocess.Popen:
+    env = dict(os.environ, **env_overrides)
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1",
+         "--port", str(port), "--log-level", "warning"],
+        cwd=project_root,
+        env=env,
+    )
+
+
+async def wait_ready(client: httpx.AsyncClient, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if (await client.get("/")).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError("server did not come up")
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[max(int(len(values) * q) - 1, 0)] if values else float("nan")
+
+
+async def burst(base_url: str, args) -> dict:
+    limits = httpx.Limits(max_connections=args.concurrency + 10)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120.0) as client:
+        await wait_ready(client)
+        run = uuid.uuid4().hex[:8]
+        pending = list(range(args.registrations))
+        statuses = {}
+        probe_latencies = []
+        done = asyncio.Event()
+
+        async def register_worker():
+            while pending:
+                i = pending.pop()
+                body = {
+                    "username": f"bench{run}{i}",
+                    "password": "BenchPass123!",
+                    "email": f"bench{run}{i}@example.com",
+                    "phone_number": f"+99{run}{i}",
+                }
+                try:
+                    resp = await client.post("/auth/register", json=body)
+                    statuses[resp.status_code] = statuses.get(resp.status_code, 0) + 1
+                except httpx.HTTPError:
+                    statuses["error"] = statuses.get("error", 0) + 1
+
+        async def probe():
+            while not done.is_set():
+                t0 = time.perf_counter()
+                try:
+                    await client.get(args.probe_path)
+                except httpx.HTTPError:
+                    pass
+                probe_latencies.append(time.perf_counter() - t0)
+                await asyncio.sleep(args.probe_interval)
+
+        probe_task = asyncio.create_task(probe())
+        started = time.perf_counter()
+        await asyncio.gather(*(register_worker() for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - started
+        done.set()
+        await probe_task
+
+    return {
+        "registrations_per_s": statuses.get(200, 0) / elapsed,
+        "statuses": statuses,
+        "probe_p50_ms": statistics.median(probe_latencies) * 1000,
+        "probe_p99_ms": percentile(probe_latencies, 0.99) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--registrations", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--probe-path", default="/food_delivery/all_restaurants")
+    parser.add_argument("--probe-interval", type=float, default=0.01)
+    parser.add_argument("--port", type=int, default=8766)
+    args = parser.parse_args()
+
+    modes = (
+        ("inline bcrypt", {"BCRYPT_WORKERS": "0"}),
+        ("process pool ", {}),
+    )
+    for label, env in modes:
+        proc = start_server(args.port, env)
+        try:
+            r = asyncio.run(burst(f"http://127.0.0.1:{args.port}", args))
+        finally:
+            proc.terminate()
+            proc.wait()
+        print(f"{label}  {r['registrations_per_s']:7.1f} reg/s   {args.probe_path} "
+              f"p50 {r['probe_p50_ms']:7.1f} ms  p99 {r['probe_p99_ms']:7.1f} ms   statuses {r['statuses']}")
+
+
+if __name__ == "__main__":
+    main()
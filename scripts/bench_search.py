@@ -0,0 +1,106 @@
+"""Build time, memory and query latency of the catalog search index.
+
+Indexes ``--items`` synthetic menu items (dish names from a small cuisine
+vocabulary, descriptions mixing common ingredients with a long tail of rarer
+words) spread over ``--restaurants`` restaurants, then times exact, multi-word,
+misspelt and prefix queries. Memory is the resident-set growth while building.
+No database needed.
+
+    python scripts/bench_search.py
+    python scripts/bench_search.py --items 1000000 --queries 500
+"""
+import argparse
+import gc
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.modules.food_delivery.search import KIND_ITEM, _Index  # noqa: E402
+
+DISHES = ("pizza burger biryani curry noodles ramen sushi taco burrito salad sandwich wrap kebab "
+          "dumplings pasta lasagna risotto paneer tikka masala dosa idli pho soup steak wings "
+          "fries pancakes waffles brownie cheesecake smoothie lassi falafel hummus shawarma").split()
+STYLES = ("spicy classic grilled crispy smoked creamy garlic butter tandoori schezwan vegan "
+          "cheesy double loaded mini jumbo special house chef").split()
+INGREDIENTS = ("chicken mutton lamb beef pork prawn fish tofu paneer mushroom onion tomato "
+               "mozzarella cheddar basil oregano chilli ginger coriander mint lemon rice wheat "
+               "egg potato spinach corn olive avocado cream yogurt honey chocolate vanilla").split()
+
+
+def synthetic_word(rng: random.Random) -> str:
+    syllables = ("ka", "ri", "mo", "lu", "ne", "ta", "po", "si", "za", "ve", "ro", "chi", "ba", "de")
+    return "".join(rng.choice(syllables) for _ in range(rng.randint(2, 4)))
+
+
+def synthetic_items(n: int, restaurants: int, seed: int):
+    rng = random.Random(seed)
+    rare = [synthetic_word(rng) for _ in range(20000)]
+    for item_id in range(1, n + 1):
+        name = f"{rng.choice(STYLES)} {rng.choice(INGREDIENTS)} {rng.choice(DISHES)}"
+        words = rng.sample(INGREDIENTS, 4) + [rng.choice(rare) for _ in range(rng.randint(1, 3))]
+        yield item_id, rng.randint(1, restaurants), name, " ".join(words)
+
+
+def rss_mb() -> float:
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=1_000_000)
+    parser.add_argument("--restaurants", type=int, default=20_000)
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--seed", type=int, default=11)
+    args = parser.parse_args()
+
+    gc.collect()
+    before = rss_mb()
+    index = _Index()
+    started = time.perf_counter()
+    for rid in range(1, args.restaurants + 1):
+        index.add_restaurant(rid, f"restaurant {rid}", random.Random(rid).choice(("italian", "indian", "chinese", "mexican")))
+    for row in synthetic_items(args.items, args.restaurants, args.seed):
+        index.add_item(*row)
+    build = time.perf_counter() - started
+    gc.collect()
+    postings = sum(len(p) for p in index.posting_docs)
+    print(f"Indexed {args.restaurants} restaurants + {args.items} items in {build:.1f} s "
+          f"({args.items / build:,.0f} items/s)")
+    print(f"  {len(index.vocabulary)} terms, {postings:,} postings, RSS +{rss_mb() - before:.0f} MB")
+
+    rng = random.Random(args.seed + 1)
+    workloads = {
+        "one common word  ": lambda: rng.choice(INGREDIENTS),
+        "dish + ingredient": lambda: f"{rng.choice(INGREDIENTS)} {rng.choice(DISHES)}",
+        "misspelt word    ": lambda: (lambda w: w[:2] + w[3:])(rng.choice(DISHES)),
+        "prefix (as typed)": lambda: f"{rng.choice(STYLES)} {rng.choice(DISHES)[:3]}",
+    }
+    print(f"Query latency over {args.queries} queries each, limit 20 (page 1):")
+    for label, make in workloads.items():
+        timings = []
+        for _ in range(args.queries):
+            query = make()
+            started = time.perf_counter()
+            index.search(query, None, 0, 20)
+            timings.append(time.perf_counter() - started)
+        ms = np.array(timings) * 1000
+        print(f"  {label}  p50 {np.percentile(ms, 50):7.2f} ms  p99 {np.percentile(ms, 99):7.2f} ms")
+
+    started = time.perf_counter()
+    extra = 1000
+    for n, row in enumerate(synthetic_items(extra, args.restaurants, args.seed + 2)):
+        index.add_item(args.items + n + 1, *row[1:])
+    print(f"Incremental add: {(time.perf_counter() - started) / extra * 1e6:.1f} us per item")
+    started = time.perf_counter()
+    total, hits = index.search("pizza", KIND_ITEM, 0, 20)
+    print(f"Sanity: 'pizza' -> {total:,} matches, top {hits[0] if hits else None}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""Create indexes declared on the models that an existing database lacks.
+
+``create_all`` (and so the app's startup schema check) only creates missing
+tables; an index added to a table that already exists has to be created
+separately. Safe to re-run: existing indexes are skipped.
+
+    python scripts/create_indexes.py
+    python scripts/create_indexes.py --dry-run
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import inspect  # noqa: E402
+from sqlalchemy.schema import CreateIndex  # noqa: E402
+
+import app.main  # noqa: E402,F401  (registers every model on Base.metadata)
+from app.core.database import Base, engine  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dry-run", action="store_true", help="only list the missing indexes")
+    args = parser.parse_args()
+
+    with engine.begin() as conn:
+        inspector = inspect(conn)
+        existing_tables = set(inspector.get_table_names())
+        created = 0
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            existing = {ix["name"] for ix in inspector.get_indexes(table.name)}
+            for index in sorted(table.indexes, key=lambda ix: ix.name):
+                if index.name in existing:
+                    continue
+                ddl = str(CreateIndex(index).compile(dialect=engine.dialect))
+                print(f"{'would run' if args.dry_run else 'running'}: {ddl}")
+                if not args.dry_run:
+                    index.create(conn)
+                created += 1
+    print(f"{created} index(es) {'missing' if args.dry_run else 'created'}")
+
+
+if __name__ == "__main__":
+    main()
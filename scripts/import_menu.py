@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+"""Bulk-import menu items from a CSV or NDJSON file.
+
+CSV needs a header row with the MenuItemCreate fields (category_id,
+restaurant_id, name, description, price, cooking_time_minutes, is_available,
+image_url, is_vegetarian). NDJSON has one MenuItemCreate object per line.
+``--restaurant-id`` fills in rows that leave restaurant_id out.
+
+    python scripts/import_menu.py menu.csv --restaurant-id 42
+    python scripts/import_menu.py catalog.ndjson --chunk-size 5000
+    python scripts/import_menu.py menu.csv --dry-run
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.database import init_models  # noqa: E402
+from app.modules.food_delivery.menu_import import DEFAULT_CHUNK_SIZE, import_menu  # noqa: E402
+from app.shared.bulk import FORMATS, detect_format  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("path", help="CSV/NDJSON file, or - for stdin")
+    parser.add_argument("--format", choices=FORMATS, help="default: from the file extension")
+    parser.add_argument("--restaurant-id", type=int, help="restaurant for rows that do not name one")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--method", choices=("copy", "insert"), default="copy")
+    parser.add_argument("--dry-run", action="store_true", help="validate and resolve ids only")
+    parser.add_argument("--errors", help="write the full error list to this JSON file")
+    args = parser.parse_args()
+
+    fmt = args.format or detect_format(args.path)
+    init_models()
+
+    started = time.perf_counter()
+    source = sys.stdin if args.path == "-" else open(args.path, encoding="utf-8-sig", newline="")
+    try:
+        report = import_menu(
+            source, fmt, restaurant_id=args.restaurant_id, chunk_size=args.chunk_size,
+            method=args.method, dry_run=args.dry_run, max_errors=sys.maxsize,
+        )
+    finally:
+        if source is not sys.stdin:
+            source.close()
+    elapsed = time.perf_counter() - started
+
+    verb = "would insert" if args.dry_run else "inserted"
+    print(f"✓ {report['total']} rows, {verb} {report['inserted']}, {report['failed']} failed "
+          f"in {elapsed:.1f}s ({report['total'] / elapsed:.0f} rows/s)")
+    for err in report["errors"][:20]:
+        print(f"  row {err['row']}: {err['error']}")
+    if report["failed"] > 20:
+        print(f"  ... {report['failed'] - 20} more")
+    if args.errors:
+        with open(args.errors, "w") as f:
+            json.dump(report["errors"], f, indent=2)
+        print(f"  errors written to {args.errors}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+"""Bulk-import users from a CSV or NDJSON file.
+
+CSV needs a header row with the UserCreate fields (username, password, email,
+first_name, last_name, phone_number, roles); ``roles`` is ``;``-separated.
+NDJSON has one UserCreate object per line.
+
+    python scripts/import_users.py users.csv
+    python scripts/import_users.py users.ndjson --chunk-size 2000 --workers 8
+    python scripts/import_users.py users.csv --dry-run
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.database import init_models  # noqa: E402
+from app.modules.auth.bulk_import import DEFAULT_CHUNK_SIZE, import_users  # noqa: E402
+from app.modules.auth.hashing import password_hasher  # noqa: E402
+from app.shared.bulk import FORMATS, detect_format  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("path", help="CSV/NDJSON file, or - for stdin")
+    parser.add_argument("--format", choices=FORMATS, help="default: from the file extension")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--method", choices=("copy", "insert"), default="copy")
+    parser.add_argument("--workers", type=int, help="bcrypt processes (default BCRYPT_WORKERS)")
+    parser.add_argument("--dry-run", action="store_true", help="validate and check duplicates only")
+    parser.add_argument("--errors", help="write the full error list to this JSON file")
+    args = parser.parse_args()
+
+    fmt = args.format or detect_format(args.path)
+    if args.workers is not None:
+        password_hasher.workers = args.workers
+    init_models()
+
+    started = time.perf_counter()
+    source = sys.stdin if args.path == "-" else open(args.path, encoding="utf-8-sig", newline="")
+    try:
+        report = import_users(
+            source, fmt, chunk_size=args.chunk_size, method=args.method,
+            dry_run=args.dry_run, max_errors=sys.maxsize,
+        )
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        password_hasher.shutdown()
+    elapsed = time.perf_counter() - started
+
+    verb = "would insert" if args.dry_run else "inserted"
+    print(f"✓ {report['total']} rows, {verb} {report['inserted']}, {report['failed']} failed "
+          f"in {elapsed:.1f}s ({report['total'] / elapsed:.0f} rows/s)")
+    for err in report["errors"][:20]:
+        print(f"  row {err['row']}: {err['error']}")
+    if report["failed"] > 20:
+        print(f"  ... {report['failed'] - 20} more")
+    if args.errors:
+        with open(args.errors, "w") as f:
+            json.dump(report["errors"], f, indent=2)
+        print(f"  errors written to {args.errors}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""Import-time profile and time-to-first-request for the app's startup modes.
+
+The import profile comes from ``python -X importtime -c "import app.main"``,
+aggregated per top-level package. Time-to-first-request is measured from
+spawning uvicorn until ``GET /`` first answers 200, i.e. including imports,
+the startup hook (schema check) and socket bind.
+
+    python scripts/profile_startup.py
+    python scripts/profile_startup.py --runs 10 --top 25
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+import httpx
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODES = (
+    ("eager admin, create_all every boot", {"ADMIN_PANEL": "eager", "DB_SCHEMA_CHECK": "always"}),
+    ("lazy admin, schema fingerprint    ", {"ADMIN_PANEL": "lazy", "DB_SCHEMA_CHECK": "fingerprint"}),
+    ("no admin, schema fingerprint      ", {"ADMIN_PANEL": "off", "DB_SCHEMA_CHECK": "fingerprint"}),
+)
+
+
+def import_profile(env_overrides: dict):
+    """Returns (total seconds, {package: self seconds}, [(cumulative s, module)])."""
+    env = dict(os.environ, **env_overrides)
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        cwd=project_root, env=env, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr[-2000:])
+    by_package = defaultdict(float)
+    modules = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        name = name.strip()
+        by_package[name.split(".")[0]] += int(self_us) / 1e6
+        modules.append((int(cumulative_us) / 1e6, name))
+    return sum(by_package.values()), by_package, modules
+
+
+def schema_check_cost(mode: str):
+    """(SQL statements, ms) for one ``init_models(mode)`` against an up-to-date schema."""
+    sys.path.insert(0, project_root)
+    from sqlalchemy import event
+
+    from app.core.database import engine, init_models
+
+    init_models("fingerprint")  # make sure the stored fingerprint is current
+    statements = []
+    listener = lambda *args: statements.append(1)  # noqa: E731
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        started = time.perf_counter()
+        init_models(mode)
+        return len(statements), (time.perf_counter() - started) * 1000
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+
+
+def time_to_first_request(env_overrides: dict, port: int, timeout: float = 60.0) -> float:
+    env = dict(os.environ, **env_overrides)
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1",
+         "--port", str(port), "--log-level", "warning"],
+        cwd=project_root, env=env, stdout=subprocess.DEVNULL,
+    )
+    try:
+        with httpx.Client(timeout=1.0) as client:
+            while time.perf_counter() - started < timeout:
+                try:
+                    if client.get(f"http://127.0.0.1:{port}/").status_code == 200:
+                        return time.perf_counter() - started
+                except httpx.HTTPError:
+                    pass
+                time.sleep(0.01)
+        raise RuntimeError("server did not come up")
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="packages/modules to list")
+    parser.add_argument("--port", type=int, default=8767)
+    args = parser.parse_args()
+
+    label, env = MODES[0]
+    total, by_package, modules = import_profile(env)
+    print(f"Import profile ({label.strip()}): {total * 1000:.0f} ms total")
+    print("  by top-level package (self time):")
+    for package, seconds in sorted(by_package.items(), key=lambda kv: -kv[1])[:args.top]:
+        print(f"    {seconds * 1000:8.1f} ms  {package}")
+    print("  slowest modules (cumulative):")
+    for seconds, name in sorted(modules, reverse=True)[:args.top]:
+        print(f"    {seconds * 1000:8.1f} ms  {name}")
+    print()
+
+    print("Startup schema check:")
+    for mode in ("always", "fingerprint"):
+        count, ms = schema_check_cost(mode)
+        print(f"  DB_SCHEMA_CHECK={mode:<12} {count:3d} SQL statements  {ms:6.1f} ms")
+    print()
+
+    # warm the OS page cache and the schema fingerprint row before timing
+    time_to_first_request(MODES[1][1], args.port)
+    print(f"Time to first request (median of {args.runs}):")
+    for label, env in MODES:
+        imports = import_profile(env)[0]
+        ttfr = [time_to_first_request(env, args.port) for _ in range(args.runs)]
+        print(f"  {label}  imports {imports * 1000:6.0f} ms   first request "
+              f"{statistics.median(ttfr) * 1000:6.0f} ms (min {min(ttfr) * 1000:.0f})")
+
+
+if __name__ == "__main__":
+    main()